@@ -0,0 +1,53 @@
+"""notify lookup invalidation
+
+Revision ID: 0eeca1532851
+Revises: 50c82a474cdd
+Create Date: 2026-10-18 09:12:31.402187
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0eeca1532851'
+down_revision: Union[str, Sequence[str], None] = '50c82a474cdd'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.execute(
+        """
+        CREATE FUNCTION planet.notify_lookup_invalidation() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'UPDATE' AND OLD.name = NEW.name THEN
+                RETURN NULL;
+            END IF;
+            PERFORM pg_notify(
+                'planet_lookup_invalidation',
+                json_build_object('table', TG_TABLE_NAME, 'name', OLD.name)::text
+            );
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    for table in ("sector", "cargo_type"):
+        op.execute(
+            f"""
+            CREATE TRIGGER {table}_notify_lookup_invalidation
+            AFTER UPDATE OF name OR DELETE ON planet.{table}
+            FOR EACH ROW EXECUTE FUNCTION planet.notify_lookup_invalidation()
+            """
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for table in ("sector", "cargo_type"):
+        op.execute(f"DROP TRIGGER {table}_notify_lookup_invalidation ON planet.{table}")
+    op.execute("DROP FUNCTION planet.notify_lookup_invalidation()")
@@ -0,0 +1,54 @@
+"""add foreign key indexes
+
+Revision ID: 174b15043052
+Revises: 0eeca1532851
+Create Date: 2026-10-18 11:03:56.118240
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '174b15043052'
+down_revision: Union[str, Sequence[str], None] = '0eeca1532851'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FOREIGN_KEY_INDEXES = (
+    ('ix_planet_planet_sector_id', 'planet', 'sector_id'),
+    ('ix_planet_planet_scarce_cargo_type_id', 'planet', 'scarce_cargo_type_id'),
+    ('ix_planet_starship_planet_id', 'starship', 'planet_id'),
+    ('ix_planet_manifest_cargo_type_id', 'manifest', 'cargo_type_id'),
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CONCURRENTLY cannot run inside a transaction block.
+    with op.get_context().autocommit_block():
+        for name, table, column in FOREIGN_KEY_INDEXES:
+            op.create_index(
+                op.f(name),
+                table,
+                [column],
+                unique=False,
+                schema='planet',
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        for name, table, _ in reversed(FOREIGN_KEY_INDEXES):
+            op.drop_index(
+                op.f(name),
+                table_name=table,
+                schema='planet',
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
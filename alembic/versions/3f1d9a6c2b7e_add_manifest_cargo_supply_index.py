@@ -0,0 +1,40 @@
+"""add manifest cargo supply index
+
+Revision ID: 3f1d9a6c2b7e
+Revises: e870c4b333cc
+Create Date: 2026-10-18 21:12:05.331904
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f1d9a6c2b7e'
+down_revision: Union[str, Sequence[str], None] = 'e870c4b333cc'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTITIONS = 16
+INDEX = 'ix_manifest_cargo_supply'
+COLUMNS = 'cargo_type_id, quantity DESC, starship_id'
+PREDICATE = 'quantity > 0'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # A partitioned table's index cannot be built CONCURRENTLY. Instead the parent's index is created empty and
+    # invalid, each partition's index is built concurrently, and attaching the last of them makes the parent's valid.
+    op.execute(f'CREATE INDEX IF NOT EXISTS {INDEX} ON ONLY planet.manifest ({COLUMNS}) WHERE {PREDICATE}')
+    with op.get_context().autocommit_block():
+        for remainder in range(PARTITIONS):
+            op.execute(f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {INDEX}_p{remainder} ON planet.manifest_p{remainder} ({COLUMNS}) WHERE {PREDICATE}')
+            op.execute(f'ALTER INDEX planet.{INDEX} ATTACH PARTITION planet.{INDEX}_p{remainder}')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Dropping the parent's index drops the partitions' with it.
+    op.execute(f'DROP INDEX IF EXISTS planet.{INDEX}')
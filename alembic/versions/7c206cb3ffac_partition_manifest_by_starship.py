@@ -0,0 +1,85 @@
+"""partition manifest by starship
+
+Revision ID: 7c206cb3ffac
+Revises: 174b15043052
+Create Date: 2026-10-18 18:24:10.551903
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c206cb3ffac'
+down_revision: Union[str, Sequence[str], None] = '174b15043052'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+PARTITIONS = 16
+
+# Names that must be unique across the schema, not just the table, so the table being replaced gives them up first.
+SCHEMA_UNIQUE_NAMES = (
+    ('CONSTRAINT', 'pk_manifest'),
+    ('CONSTRAINT', 'uq_manifest_starship_cargo'),
+    ('INDEX', 'ix_planet_manifest_cargo_type_id'),
+)
+
+COLUMNS = 'manifest_id, starship_id, cargo_type_id, quantity, date_created'
+
+
+def _set_aside_manifest(suffix: str) -> None:
+    """Rename the current manifest table and its schema-unique names out of the way of its replacement."""
+    op.execute(f'ALTER TABLE planet.manifest RENAME TO manifest_{suffix}')
+    for kind, name in SCHEMA_UNIQUE_NAMES:
+        if kind == 'CONSTRAINT':
+            op.execute(f'ALTER TABLE planet.manifest_{suffix} RENAME CONSTRAINT {name} TO {name}_{suffix}')
+        else:
+            op.execute(f'ALTER INDEX planet.{name} RENAME TO {name}_{suffix}')
+
+
+def _create_manifest(primary_key: Sequence[str], **kwargs) -> None:
+    op.create_table('manifest',
+    # The existing sequence keeps numbering manifests where the old table left off.
+    sa.Column('manifest_id', sa.BigInteger(), server_default=sa.text("nextval('planet.manifest_manifest_id_seq'::regclass)"), nullable=False),
+    sa.Column('starship_id', sa.BigInteger(), nullable=False),
+    sa.Column('cargo_type_id', sa.BigInteger(), nullable=False),
+    sa.Column('quantity', sa.BigInteger(), nullable=False),
+    sa.Column('date_created', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.CheckConstraint('quantity >= 0', name=op.f('ck_manifest_ck_manifest_quantity_non_negative')),
+    sa.ForeignKeyConstraint(['cargo_type_id'], ['planet.cargo_type.cargo_type_id'], name=op.f('fk_manifest_cargo_type_id_cargo_type')),
+    sa.ForeignKeyConstraint(['starship_id'], ['planet.starship.starship_id'], name=op.f('fk_manifest_starship_id_starship')),
+    sa.PrimaryKeyConstraint(*primary_key, name=op.f('pk_manifest')),
+    sa.UniqueConstraint('starship_id', 'cargo_type_id', name='uq_manifest_starship_cargo'),
+    schema='planet',
+    **kwargs
+    )
+
+
+def _move_manifests_from(suffix: str) -> None:
+    op.create_index(op.f('ix_planet_manifest_cargo_type_id'), 'manifest', ['cargo_type_id'], unique=False, schema='planet')
+    op.execute(f'INSERT INTO planet.manifest ({COLUMNS}) SELECT {COLUMNS} FROM planet.manifest_{suffix}')
+    op.execute('ALTER SEQUENCE planet.manifest_manifest_id_seq OWNED BY planet.manifest.manifest_id')
+    op.execute(f'DROP TABLE planet.manifest_{suffix}')
+    op.execute('ANALYZE planet.manifest')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Every manifest row is copied while manifest is locked, so run this in a maintenance window on large fleets.
+    _set_aside_manifest('unpartitioned')
+    _create_manifest(['manifest_id', 'starship_id'], postgresql_partition_by='HASH (starship_id)')
+    for remainder in range(PARTITIONS):
+        op.execute(
+            f'CREATE TABLE planet.manifest_p{remainder} PARTITION OF planet.manifest '
+            f'FOR VALUES WITH (MODULUS {PARTITIONS}, REMAINDER {remainder})'
+        )
+    _move_manifests_from('unpartitioned')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _set_aside_manifest('partitioned')
+    _create_manifest(['manifest_id'])
+    _move_manifests_from('partitioned')
@@ -0,0 +1,61 @@
+"""add change event outbox
+
+Revision ID: 9b4e27d05a13
+Revises: 3f1d9a6c2b7e
+Create Date: 2026-10-18 22:04:51.660327
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '9b4e27d05a13'
+down_revision: Union[str, Sequence[str], None] = '3f1d9a6c2b7e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('change_event',
+    sa.Column('change_event_id', sa.BigInteger(), nullable=False),
+    sa.Column('transaction_id', sa.BigInteger(), server_default=sa.text('pg_current_xact_id()::text::bigint'), nullable=False),
+    sa.Column('change_type', sa.SmallInteger(), nullable=False),
+    sa.Column('starship_id', sa.BigInteger(), nullable=False),
+    sa.Column('planet_id', sa.BigInteger(), nullable=True),
+    sa.Column('from_planet_id', sa.BigInteger(), nullable=True),
+    sa.Column('cargo_type_id', sa.BigInteger(), nullable=True),
+    sa.Column('quantity', sa.BigInteger(), nullable=True),
+    sa.Column('date_created', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('change_event_id', name=op.f('pk_change_event')),
+    schema='planet'
+    )
+    op.create_index('ix_change_event_cursor', 'change_event', ['transaction_id', 'change_event_id'], unique=False, schema='planet')
+    op.execute(
+        """
+        CREATE FUNCTION planet.notify_change_event() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('planet_change_event', '');
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER change_event_notify
+        AFTER INSERT ON planet.change_event
+        FOR EACH STATEMENT EXECUTE FUNCTION planet.notify_change_event()
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER change_event_notify ON planet.change_event")
+    op.execute("DROP FUNCTION planet.notify_change_event()")
+    op.drop_index('ix_change_event_cursor', table_name='change_event', schema='planet')
+    op.drop_table('change_event', schema='planet')
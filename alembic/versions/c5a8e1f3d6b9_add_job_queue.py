@@ -0,0 +1,66 @@
+"""add job queue
+
+Revision ID: c5a8e1f3d6b9
+Revises: 9b4e27d05a13
+Create Date: 2026-10-18 23:37:12.418205
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c5a8e1f3d6b9'
+down_revision: Union[str, Sequence[str], None] = '9b4e27d05a13'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('job',
+    sa.Column('job_id', sa.BigInteger(), nullable=False),
+    sa.Column('job_type', sa.SmallInteger(), nullable=False),
+    sa.Column('state', sa.SmallInteger(), nullable=False),
+    sa.Column('payload', sa.LargeBinary(), nullable=True),
+    sa.Column('total_items', sa.BigInteger(), nullable=False),
+    sa.Column('completed_items', sa.BigInteger(), server_default=sa.text('0'), nullable=False),
+    sa.Column('result_ids', postgresql.ARRAY(sa.BigInteger()), server_default=sa.text("'{}'"), nullable=False),
+    sa.Column('outcome', sa.LargeBinary(), nullable=True),
+    sa.Column('attempts', sa.SmallInteger(), server_default=sa.text('0'), nullable=False),
+    sa.Column('lease_expires', sa.DateTime(), nullable=True),
+    sa.Column('date_started', sa.DateTime(), nullable=True),
+    sa.Column('date_finished', sa.DateTime(), nullable=True),
+    sa.Column('date_created', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.PrimaryKeyConstraint('job_id', name=op.f('pk_job')),
+    schema='planet'
+    )
+    op.create_index('ix_job_pending', 'job', ['job_id'], unique=False, schema='planet', postgresql_where=sa.text('state IN (1, 2)'))
+    op.execute(
+        """
+        CREATE FUNCTION planet.notify_job_submitted() RETURNS trigger AS $$
+        BEGIN
+            PERFORM pg_notify('planet_job_submitted', '');
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER job_submitted_notify
+        AFTER INSERT ON planet.job
+        FOR EACH STATEMENT EXECUTE FUNCTION planet.notify_job_submitted()
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP TRIGGER job_submitted_notify ON planet.job")
+    op.execute("DROP FUNCTION planet.notify_job_submitted()")
+    op.drop_index('ix_job_pending', table_name='job', schema='planet', postgresql_where=sa.text('state IN (1, 2)'))
+    op.drop_table('job', schema='planet')
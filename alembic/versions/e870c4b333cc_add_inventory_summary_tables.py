@@ -0,0 +1,67 @@
+"""add inventory summary tables
+
+Revision ID: e870c4b333cc
+Revises: 7c206cb3ffac
+Create Date: 2026-10-18 20:41:37.208415
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e870c4b333cc'
+down_revision: Union[str, Sequence[str], None] = '7c206cb3ffac'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('planet_inventory',
+    sa.Column('planet_id', sa.BigInteger(), nullable=False),
+    sa.Column('cargo_type_id', sa.BigInteger(), nullable=False),
+    sa.Column('quantity', sa.BigInteger(), nullable=False),
+    sa.Column('date_created', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['cargo_type_id'], ['planet.cargo_type.cargo_type_id'], name=op.f('fk_planet_inventory_cargo_type_id_cargo_type')),
+    sa.ForeignKeyConstraint(['planet_id'], ['planet.planet.planet_id'], name=op.f('fk_planet_inventory_planet_id_planet')),
+    sa.PrimaryKeyConstraint('planet_id', 'cargo_type_id', name=op.f('pk_planet_inventory')),
+    schema='planet'
+    )
+    op.create_index(op.f('ix_planet_planet_inventory_cargo_type_id'), 'planet_inventory', ['cargo_type_id'], unique=False, schema='planet')
+    op.create_table('sector_inventory',
+    sa.Column('sector_id', sa.BigInteger(), nullable=False),
+    sa.Column('cargo_type_id', sa.BigInteger(), nullable=False),
+    sa.Column('quantity', sa.BigInteger(), nullable=False),
+    sa.Column('date_created', sa.DateTime(), server_default=sa.text('now()'), nullable=False),
+    sa.ForeignKeyConstraint(['cargo_type_id'], ['planet.cargo_type.cargo_type_id'], name=op.f('fk_sector_inventory_cargo_type_id_cargo_type')),
+    sa.ForeignKeyConstraint(['sector_id'], ['planet.sector.sector_id'], name=op.f('fk_sector_inventory_sector_id_sector')),
+    sa.PrimaryKeyConstraint('sector_id', 'cargo_type_id', name=op.f('pk_sector_inventory')),
+    schema='planet'
+    )
+    op.create_index(op.f('ix_planet_sector_inventory_cargo_type_id'), 'sector_inventory', ['cargo_type_id'], unique=False, schema='planet')
+
+    # Manifest writes and moves keep the tables current from here on; this backfills what is already there. The same
+    # totals come from `python -m src.rebuild_inventory`, which also reports how far the tables had drifted.
+    op.execute(
+        'INSERT INTO planet.planet_inventory (planet_id, cargo_type_id, quantity) '
+        'SELECT s.planet_id, m.cargo_type_id, sum(m.quantity) FROM planet.manifest m '
+        'JOIN planet.starship s ON s.starship_id = m.starship_id '
+        'GROUP BY s.planet_id, m.cargo_type_id HAVING sum(m.quantity) <> 0'
+    )
+    op.execute(
+        'INSERT INTO planet.sector_inventory (sector_id, cargo_type_id, quantity) '
+        'SELECT p.sector_id, i.cargo_type_id, sum(i.quantity) FROM planet.planet_inventory i '
+        'JOIN planet.planet p ON p.planet_id = i.planet_id '
+        'GROUP BY p.sector_id, i.cargo_type_id HAVING sum(i.quantity) <> 0'
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_planet_sector_inventory_cargo_type_id'), table_name='sector_inventory', schema='planet')
+    op.drop_table('sector_inventory', schema='planet')
+    op.drop_index(op.f('ix_planet_planet_inventory_cargo_type_id'), table_name='planet_inventory', schema='planet')
+    op.drop_table('planet_inventory', schema='planet')
@@ -6,9 +6,13 @@
 from dataclasses import dataclass
 from typing import (
     TYPE_CHECKING,
+    AsyncIterable,
+    AsyncIterator,
     Dict,
+    Iterable,
     List,
     Optional,
+    Union,
 )
 
 import betterproto
@@ -31,6 +35,34 @@ class StatusCode(betterproto.Enum):
     INTERNAL_ERROR = 6
 
 
+class MoveOutcome(betterproto.Enum):
+    UNSPECIFIED = 0
+    MOVED = 1
+    STARSHIP_NOT_FOUND = 2
+    PLANET_NOT_FOUND = 3
+    ALREADY_THERE = 4
+
+
+class ChangeType(betterproto.Enum):
+    UNSPECIFIED = 0
+    STARSHIP_MOVED = 1
+    MANIFEST_CHANGED = 2
+
+
+class JobType(betterproto.Enum):
+    UNSPECIFIED = 0
+    BULK_CREATE_MANIFEST = 1
+    BULK_CREATE_CARGO_TYPE = 2
+
+
+class JobState(betterproto.Enum):
+    UNSPECIFIED = 0
+    QUEUED = 1
+    RUNNING = 2
+    SUCCEEDED = 3
+    FAILED = 4
+
+
 @dataclass(eq=False, repr=False)
 class ResponseMessage(betterproto.Message):
     status_code: "StatusCode" = betterproto.enum_field(1)
@@ -103,6 +135,49 @@ class BulkCreateManifestRequest(betterproto.Message):
 class BulkCreateManifestResponse(betterproto.Message):
     message: "ResponseMessage" = betterproto.message_field(1)
     manifest_id: List[int] = betterproto.int64_field(2)
+    """
+    One id per requested manifest, in request order; manifests for the same starship and cargo type share one id.
+    """
+
+
+@dataclass(eq=False, repr=False)
+class StreamManifestsResponse(betterproto.Message):
+    message: "ResponseMessage" = betterproto.message_field(1)
+    chunk_row_counts: List[int] = betterproto.int64_field(2)
+    total_row_count: int = betterproto.int64_field(3)
+
+
+@dataclass(eq=False, repr=False)
+class FleetCargo(betterproto.Message):
+    cargo_type_id: int = betterproto.int64_field(1)
+    quantity: int = betterproto.int64_field(2)
+
+
+@dataclass(eq=False, repr=False)
+class FleetStarship(betterproto.Message):
+    starship_name: str = betterproto.string_field(1)
+    starship_model: str = betterproto.string_field(2)
+    cargo: List["FleetCargo"] = betterproto.message_field(3)
+
+
+@dataclass(eq=False, repr=False)
+class FleetPlanet(betterproto.Message):
+    planet_name: str = betterproto.string_field(1)
+    starships: List["FleetStarship"] = betterproto.message_field(2)
+
+
+@dataclass(eq=False, repr=False)
+class OnboardFleetRequest(betterproto.Message):
+    sector_name: str = betterproto.string_field(1)
+    planets: List["FleetPlanet"] = betterproto.message_field(2)
+
+
+@dataclass(eq=False, repr=False)
+class OnboardFleetResponse(betterproto.Message):
+    message: "ResponseMessage" = betterproto.message_field(1)
+    sector_id: int = betterproto.int64_field(2)
+    planet_ids: List[int] = betterproto.int64_field(3)
+    starship_ids: List[int] = betterproto.int64_field(4)
 
 
 @dataclass(eq=False, repr=False)
@@ -116,6 +191,218 @@ class MoveStarshipResponse(betterproto.Message):
     message: "ResponseMessage" = betterproto.message_field(1)
 
 
+@dataclass(eq=False, repr=False)
+class BulkMoveStarshipsRequest(betterproto.Message):
+    moves: List["MoveStarshipRequest"] = betterproto.message_field(1)
+
+
+@dataclass(eq=False, repr=False)
+class StarshipMoveResult(betterproto.Message):
+    starship_id: int = betterproto.int64_field(1)
+    planet_id: int = betterproto.int64_field(2)
+    outcome: "MoveOutcome" = betterproto.enum_field(3)
+
+
+@dataclass(eq=False, repr=False)
+class BulkMoveStarshipsResponse(betterproto.Message):
+    message: "ResponseMessage" = betterproto.message_field(1)
+    results: List["StarshipMoveResult"] = betterproto.message_field(2)
+
+
+@dataclass(eq=False, repr=False)
+class PlanetObject(betterproto.Message):
+    planet_id: int = betterproto.int64_field(1)
+    name: str = betterproto.string_field(2)
+    sector_id: int = betterproto.int64_field(3)
+    scarce_cargo_type_id: int = betterproto.int64_field(4)
+
+
+@dataclass(eq=False, repr=False)
+class StarshipObject(betterproto.Message):
+    starship_id: int = betterproto.int64_field(1)
+    name: str = betterproto.string_field(2)
+    model: str = betterproto.string_field(3)
+    planet_id: int = betterproto.int64_field(4)
+
+
+@dataclass(eq=False, repr=False)
+class ListPlanetsRequest(betterproto.Message):
+    sector_id: int = betterproto.int64_field(1)
+    after_planet_id: int = betterproto.int64_field(2)
+    page_size: int = betterproto.int32_field(3)
+
+
+@dataclass(eq=False, repr=False)
+class ListPlanetsResponse(betterproto.Message):
+    message: "ResponseMessage" = betterproto.message_field(1)
+    """
+    The stream always ends with a message that has no planets and carries its status, SUCCESS or NOT_FOUND.
+    """
+
+    planets: List["PlanetObject"] = betterproto.message_field(2)
+    last_planet_id: int = betterproto.int64_field(3)
+
+
+@dataclass(eq=False, repr=False)
+class ListStarshipsRequest(betterproto.Message):
+    sector_id: int = betterproto.int64_field(1)
+    planet_id: int = betterproto.int64_field(2)
+    after_starship_id: int = betterproto.int64_field(3)
+    page_size: int = betterproto.int32_field(4)
+
+
+@dataclass(eq=False, repr=False)
+class ListStarshipsResponse(betterproto.Message):
+    message: "ResponseMessage" = betterproto.message_field(1)
+    """
+    The stream always ends with a message that has no starships and carries its status, SUCCESS or NOT_FOUND.
+    """
+
+    starships: List["StarshipObject"] = betterproto.message_field(2)
+    last_starship_id: int = betterproto.int64_field(3)
+
+
+@dataclass(eq=False, repr=False)
+class InventoryObject(betterproto.Message):
+    cargo_type_id: int = betterproto.int64_field(1)
+    quantity: int = betterproto.int64_field(2)
+
+
+@dataclass(eq=False, repr=False)
+class GetPlanetInventoryRequest(betterproto.Message):
+    planet_id: int = betterproto.int64_field(1)
+
+
+@dataclass(eq=False, repr=False)
+class GetPlanetInventoryResponse(betterproto.Message):
+    message: "ResponseMessage" = betterproto.message_field(1)
+    inventory: List["InventoryObject"] = betterproto.message_field(2)
+
+
+@dataclass(eq=False, repr=False)
+class GetSectorInventoryRequest(betterproto.Message):
+    sector_id: int = betterproto.int64_field(1)
+
+
+@dataclass(eq=False, repr=False)
+class GetSectorInventoryResponse(betterproto.Message):
+    message: "ResponseMessage" = betterproto.message_field(1)
+    inventory: List["InventoryObject"] = betterproto.message_field(2)
+
+
+@dataclass(eq=False, repr=False)
+class SetScarceCargoTypeRequest(betterproto.Message):
+    planet_id: int = betterproto.int64_field(1)
+    cargo_type_id: int = betterproto.int64_field(2)
+    """0 clears the planet's scarce cargo type."""
+
+
+@dataclass(eq=False, repr=False)
+class SetScarceCargoTypeResponse(betterproto.Message):
+    message: "ResponseMessage" = betterproto.message_field(1)
+
+
+@dataclass(eq=False, repr=False)
+class SupplierObject(betterproto.Message):
+    starship_id: int = betterproto.int64_field(1)
+    planet_id: int = betterproto.int64_field(2)
+    quantity: int = betterproto.int64_field(3)
+    same_sector: bool = betterproto.bool_field(4)
+
+
+@dataclass(eq=False, repr=False)
+class FindSuppliersRequest(betterproto.Message):
+    planet_id: int = betterproto.int64_field(1)
+    limit: int = betterproto.int32_field(2)
+
+
+@dataclass(eq=False, repr=False)
+class FindSuppliersResponse(betterproto.Message):
+    message: "ResponseMessage" = betterproto.message_field(1)
+    scarce_cargo_type_id: int = betterproto.int64_field(2)
+    suppliers: List["SupplierObject"] = betterproto.message_field(3)
+
+
+@dataclass(eq=False, repr=False)
+class PlanetSuppliers(betterproto.Message):
+    planet_id: int = betterproto.int64_field(1)
+    scarce_cargo_type_id: int = betterproto.int64_field(2)
+    suppliers: List["SupplierObject"] = betterproto.message_field(3)
+
+
+@dataclass(eq=False, repr=False)
+class FindAllSuppliersRequest(betterproto.Message):
+    after_planet_id: int = betterproto.int64_field(1)
+    limit: int = betterproto.int32_field(2)
+    page_size: int = betterproto.int32_field(3)
+
+
+@dataclass(eq=False, repr=False)
+class FindAllSuppliersResponse(betterproto.Message):
+    message: "ResponseMessage" = betterproto.message_field(1)
+    planets: List["PlanetSuppliers"] = betterproto.message_field(2)
+    last_planet_id: int = betterproto.int64_field(3)
+
+
+@dataclass(eq=False, repr=False)
+class ChangeCursor(betterproto.Message):
+    transaction_id: int = betterproto.int64_field(1)
+    change_event_id: int = betterproto.int64_field(2)
+
+
+@dataclass(eq=False, repr=False)
+class ChangeEventObject(betterproto.Message):
+    change_event_id: int = betterproto.int64_field(1)
+    change_type: "ChangeType" = betterproto.enum_field(2)
+    starship_id: int = betterproto.int64_field(3)
+    planet_id: int = betterproto.int64_field(4)
+    from_planet_id: int = betterproto.int64_field(5)
+    cargo_type_id: int = betterproto.int64_field(6)
+    quantity: int = betterproto.int64_field(7)
+
+
+@dataclass(eq=False, repr=False)
+class WatchChangesRequest(betterproto.Message):
+    after: "ChangeCursor" = betterproto.message_field(1)
+    page_size: int = betterproto.int32_field(2)
+
+
+@dataclass(eq=False, repr=False)
+class WatchChangesResponse(betterproto.Message):
+    message: "ResponseMessage" = betterproto.message_field(1)
+    events: List["ChangeEventObject"] = betterproto.message_field(2)
+    cursor: "ChangeCursor" = betterproto.message_field(3)
+
+
+@dataclass(eq=False, repr=False)
+class SubmitJobResponse(betterproto.Message):
+    message: "ResponseMessage" = betterproto.message_field(1)
+    job_id: int = betterproto.int64_field(2)
+
+
+@dataclass(eq=False, repr=False)
+class GetJobStatusRequest(betterproto.Message):
+    job_id: int = betterproto.int64_field(1)
+
+
+@dataclass(eq=False, repr=False)
+class GetJobStatusResponse(betterproto.Message):
+    message: "ResponseMessage" = betterproto.message_field(1)
+    job_type: "JobType" = betterproto.enum_field(2)
+    state: "JobState" = betterproto.enum_field(3)
+    total_items: int = betterproto.int64_field(4)
+    completed_items: int = betterproto.int64_field(5)
+    outcome: "ResponseMessage" = betterproto.message_field(6)
+    """
+    What the synchronous RPC would have returned, once the job has finished.
+    """
+
+    cargo_type_ids: List[int] = betterproto.int64_field(7)
+    """
+    One id per submitted name, in order, once a cargo type job has succeeded.
+    """
+
+
 class PlanetAdminStub(betterproto.ServiceStub):
     async def create_planet(
         self,
@@ -202,6 +489,112 @@ class PlanetAdminStub(betterproto.ServiceStub):
             metadata=metadata,
         )
 
+    async def stream_manifests(
+        self,
+        bulk_create_manifest_request_iterator: Union[
+            AsyncIterable[BulkCreateManifestRequest],
+            Iterable[BulkCreateManifestRequest],
+        ],
+        *,
+        timeout: Optional[float] = None,
+        deadline: Optional["Deadline"] = None,
+        metadata: Optional["MetadataLike"] = None
+    ) -> "StreamManifestsResponse":
+        return await self._stream_unary(
+            "/co.za.planet.PlanetAdmin/StreamManifests",
+            bulk_create_manifest_request_iterator,
+            BulkCreateManifestRequest,
+            StreamManifestsResponse,
+            timeout=timeout,
+            deadline=deadline,
+            metadata=metadata,
+        )
+
+    async def onboard_fleet(
+        self,
+        onboard_fleet_request: "OnboardFleetRequest",
+        *,
+        timeout: Optional[float] = None,
+        deadline: Optional["Deadline"] = None,
+        metadata: Optional["MetadataLike"] = None
+    ) -> "OnboardFleetResponse":
+        return await self._unary_unary(
+            "/co.za.planet.PlanetAdmin/OnboardFleet",
+            onboard_fleet_request,
+            OnboardFleetResponse,
+            timeout=timeout,
+            deadline=deadline,
+            metadata=metadata,
+        )
+
+    async def set_scarce_cargo_type(
+        self,
+        set_scarce_cargo_type_request: "SetScarceCargoTypeRequest",
+        *,
+        timeout: Optional[float] = None,
+        deadline: Optional["Deadline"] = None,
+        metadata: Optional["MetadataLike"] = None
+    ) -> "SetScarceCargoTypeResponse":
+        return await self._unary_unary(
+            "/co.za.planet.PlanetAdmin/SetScarceCargoType",
+            set_scarce_cargo_type_request,
+            SetScarceCargoTypeResponse,
+            timeout=timeout,
+            deadline=deadline,
+            metadata=metadata,
+        )
+
+    async def submit_bulk_create_manifest(
+        self,
+        bulk_create_manifest_request: "BulkCreateManifestRequest",
+        *,
+        timeout: Optional[float] = None,
+        deadline: Optional["Deadline"] = None,
+        metadata: Optional["MetadataLike"] = None
+    ) -> "SubmitJobResponse":
+        return await self._unary_unary(
+            "/co.za.planet.PlanetAdmin/SubmitBulkCreateManifest",
+            bulk_create_manifest_request,
+            SubmitJobResponse,
+            timeout=timeout,
+            deadline=deadline,
+            metadata=metadata,
+        )
+
+    async def submit_bulk_create_cargo_type(
+        self,
+        bulk_create_cargo_type_request: "BulkCreateCargoTypeRequest",
+        *,
+        timeout: Optional[float] = None,
+        deadline: Optional["Deadline"] = None,
+        metadata: Optional["MetadataLike"] = None
+    ) -> "SubmitJobResponse":
+        return await self._unary_unary(
+            "/co.za.planet.PlanetAdmin/SubmitBulkCreateCargoType",
+            bulk_create_cargo_type_request,
+            SubmitJobResponse,
+            timeout=timeout,
+            deadline=deadline,
+            metadata=metadata,
+        )
+
+    async def get_job_status(
+        self,
+        get_job_status_request: "GetJobStatusRequest",
+        *,
+        timeout: Optional[float] = None,
+        deadline: Optional["Deadline"] = None,
+        metadata: Optional["MetadataLike"] = None
+    ) -> "GetJobStatusResponse":
+        return await self._unary_unary(
+            "/co.za.planet.PlanetAdmin/GetJobStatus",
+            get_job_status_request,
+            GetJobStatusResponse,
+            timeout=timeout,
+            deadline=deadline,
+            metadata=metadata,
+        )
+
 
 class PlanetUserStub(betterproto.ServiceStub):
     async def move_starship(
@@ -221,6 +614,146 @@ class PlanetUserStub(betterproto.ServiceStub):
             metadata=metadata,
         )
 
+    async def bulk_move_starships(
+        self,
+        bulk_move_starships_request: "BulkMoveStarshipsRequest",
+        *,
+        timeout: Optional[float] = None,
+        deadline: Optional["Deadline"] = None,
+        metadata: Optional["MetadataLike"] = None
+    ) -> "BulkMoveStarshipsResponse":
+        return await self._unary_unary(
+            "/co.za.planet.PlanetUser/BulkMoveStarships",
+            bulk_move_starships_request,
+            BulkMoveStarshipsResponse,
+            timeout=timeout,
+            deadline=deadline,
+            metadata=metadata,
+        )
+
+    async def list_planets(
+        self,
+        list_planets_request: "ListPlanetsRequest",
+        *,
+        timeout: Optional[float] = None,
+        deadline: Optional["Deadline"] = None,
+        metadata: Optional["MetadataLike"] = None
+    ) -> AsyncIterator[ListPlanetsResponse]:
+        async for response in self._unary_stream(
+            "/co.za.planet.PlanetUser/ListPlanets",
+            list_planets_request,
+            ListPlanetsResponse,
+            timeout=timeout,
+            deadline=deadline,
+            metadata=metadata,
+        ):
+            yield response
+
+    async def list_starships(
+        self,
+        list_starships_request: "ListStarshipsRequest",
+        *,
+        timeout: Optional[float] = None,
+        deadline: Optional["Deadline"] = None,
+        metadata: Optional["MetadataLike"] = None
+    ) -> AsyncIterator[ListStarshipsResponse]:
+        async for response in self._unary_stream(
+            "/co.za.planet.PlanetUser/ListStarships",
+            list_starships_request,
+            ListStarshipsResponse,
+            timeout=timeout,
+            deadline=deadline,
+            metadata=metadata,
+        ):
+            yield response
+
+    async def get_planet_inventory(
+        self,
+        get_planet_inventory_request: "GetPlanetInventoryRequest",
+        *,
+        timeout: Optional[float] = None,
+        deadline: Optional["Deadline"] = None,
+        metadata: Optional["MetadataLike"] = None
+    ) -> "GetPlanetInventoryResponse":
+        return await self._unary_unary(
+            "/co.za.planet.PlanetUser/GetPlanetInventory",
+            get_planet_inventory_request,
+            GetPlanetInventoryResponse,
+            timeout=timeout,
+            deadline=deadline,
+            metadata=metadata,
+        )
+
+    async def get_sector_inventory(
+        self,
+        get_sector_inventory_request: "GetSectorInventoryRequest",
+        *,
+        timeout: Optional[float] = None,
+        deadline: Optional["Deadline"] = None,
+        metadata: Optional["MetadataLike"] = None
+    ) -> "GetSectorInventoryResponse":
+        return await self._unary_unary(
+            "/co.za.planet.PlanetUser/GetSectorInventory",
+            get_sector_inventory_request,
+            GetSectorInventoryResponse,
+            timeout=timeout,
+            deadline=deadline,
+            metadata=metadata,
+        )
+
+    async def find_suppliers(
+        self,
+        find_suppliers_request: "FindSuppliersRequest",
+        *,
+        timeout: Optional[float] = None,
+        deadline: Optional["Deadline"] = None,
+        metadata: Optional["MetadataLike"] = None
+    ) -> "FindSuppliersResponse":
+        return await self._unary_unary(
+            "/co.za.planet.PlanetUser/FindSuppliers",
+            find_suppliers_request,
+            FindSuppliersResponse,
+            timeout=timeout,
+            deadline=deadline,
+            metadata=metadata,
+        )
+
+    async def find_all_suppliers(
+        self,
+        find_all_suppliers_request: "FindAllSuppliersRequest",
+        *,
+        timeout: Optional[float] = None,
+        deadline: Optional["Deadline"] = None,
+        metadata: Optional["MetadataLike"] = None
+    ) -> AsyncIterator[FindAllSuppliersResponse]:
+        async for response in self._unary_stream(
+            "/co.za.planet.PlanetUser/FindAllSuppliers",
+            find_all_suppliers_request,
+            FindAllSuppliersResponse,
+            timeout=timeout,
+            deadline=deadline,
+            metadata=metadata,
+        ):
+            yield response
+
+    async def watch_changes(
+        self,
+        watch_changes_request: "WatchChangesRequest",
+        *,
+        timeout: Optional[float] = None,
+        deadline: Optional["Deadline"] = None,
+        metadata: Optional["MetadataLike"] = None
+    ) -> AsyncIterator[WatchChangesResponse]:
+        async for response in self._unary_stream(
+            "/co.za.planet.PlanetUser/WatchChanges",
+            watch_changes_request,
+            WatchChangesResponse,
+            timeout=timeout,
+            deadline=deadline,
+            metadata=metadata,
+        ):
+            yield response
+
 
 class PlanetAdminBase(ServiceBase):
 
@@ -249,6 +782,37 @@ class PlanetAdminBase(ServiceBase):
     ) -> "BulkCreateManifestResponse":
         raise grpclib.GRPCError(grpclib.const.Status.UNIMPLEMENTED)
 
+    async def stream_manifests(
+        self,
+        bulk_create_manifest_request_iterator: AsyncIterator[BulkCreateManifestRequest],
+    ) -> "StreamManifestsResponse":
+        raise grpclib.GRPCError(grpclib.const.Status.UNIMPLEMENTED)
+
+    async def onboard_fleet(
+        self, onboard_fleet_request: "OnboardFleetRequest"
+    ) -> "OnboardFleetResponse":
+        raise grpclib.GRPCError(grpclib.const.Status.UNIMPLEMENTED)
+
+    async def set_scarce_cargo_type(
+        self, set_scarce_cargo_type_request: "SetScarceCargoTypeRequest"
+    ) -> "SetScarceCargoTypeResponse":
+        raise grpclib.GRPCError(grpclib.const.Status.UNIMPLEMENTED)
+
+    async def submit_bulk_create_manifest(
+        self, bulk_create_manifest_request: "BulkCreateManifestRequest"
+    ) -> "SubmitJobResponse":
+        raise grpclib.GRPCError(grpclib.const.Status.UNIMPLEMENTED)
+
+    async def submit_bulk_create_cargo_type(
+        self, bulk_create_cargo_type_request: "BulkCreateCargoTypeRequest"
+    ) -> "SubmitJobResponse":
+        raise grpclib.GRPCError(grpclib.const.Status.UNIMPLEMENTED)
+
+    async def get_job_status(
+        self, get_job_status_request: "GetJobStatusRequest"
+    ) -> "GetJobStatusResponse":
+        raise grpclib.GRPCError(grpclib.const.Status.UNIMPLEMENTED)
+
     async def __rpc_create_planet(
         self, stream: "grpclib.server.Stream[CreatePlanetRequest, CreatePlanetResponse]"
     ) -> None:
@@ -288,6 +852,52 @@ class PlanetAdminBase(ServiceBase):
         response = await self.bulk_create_manifest(request)
         await stream.send_message(response)
 
+    async def __rpc_stream_manifests(
+        self,
+        stream: "grpclib.server.Stream[BulkCreateManifestRequest, StreamManifestsResponse]",
+    ) -> None:
+        request = stream.__aiter__()
+        response = await self.stream_manifests(request)
+        await stream.send_message(response)
+
+    async def __rpc_onboard_fleet(
+        self, stream: "grpclib.server.Stream[OnboardFleetRequest, OnboardFleetResponse]"
+    ) -> None:
+        request = await stream.recv_message()
+        response = await self.onboard_fleet(request)
+        await stream.send_message(response)
+
+    async def __rpc_set_scarce_cargo_type(
+        self,
+        stream: "grpclib.server.Stream[SetScarceCargoTypeRequest, SetScarceCargoTypeResponse]",
+    ) -> None:
+        request = await stream.recv_message()
+        response = await self.set_scarce_cargo_type(request)
+        await stream.send_message(response)
+
+    async def __rpc_submit_bulk_create_manifest(
+        self,
+        stream: "grpclib.server.Stream[BulkCreateManifestRequest, SubmitJobResponse]",
+    ) -> None:
+        request = await stream.recv_message()
+        response = await self.submit_bulk_create_manifest(request)
+        await stream.send_message(response)
+
+    async def __rpc_submit_bulk_create_cargo_type(
+        self,
+        stream: "grpclib.server.Stream[BulkCreateCargoTypeRequest, SubmitJobResponse]",
+    ) -> None:
+        request = await stream.recv_message()
+        response = await self.submit_bulk_create_cargo_type(request)
+        await stream.send_message(response)
+
+    async def __rpc_get_job_status(
+        self, stream: "grpclib.server.Stream[GetJobStatusRequest, GetJobStatusResponse]"
+    ) -> None:
+        request = await stream.recv_message()
+        response = await self.get_job_status(request)
+        await stream.send_message(response)
+
     def __mapping__(self) -> Dict[str, grpclib.const.Handler]:
         return {
             "/co.za.planet.PlanetAdmin/CreatePlanet": grpclib.const.Handler(
@@ -320,6 +930,42 @@ class PlanetAdminBase(ServiceBase):
                 BulkCreateManifestRequest,
                 BulkCreateManifestResponse,
             ),
+            "/co.za.planet.PlanetAdmin/StreamManifests": grpclib.const.Handler(
+                self.__rpc_stream_manifests,
+                grpclib.const.Cardinality.STREAM_UNARY,
+                BulkCreateManifestRequest,
+                StreamManifestsResponse,
+            ),
+            "/co.za.planet.PlanetAdmin/OnboardFleet": grpclib.const.Handler(
+                self.__rpc_onboard_fleet,
+                grpclib.const.Cardinality.UNARY_UNARY,
+                OnboardFleetRequest,
+                OnboardFleetResponse,
+            ),
+            "/co.za.planet.PlanetAdmin/SetScarceCargoType": grpclib.const.Handler(
+                self.__rpc_set_scarce_cargo_type,
+                grpclib.const.Cardinality.UNARY_UNARY,
+                SetScarceCargoTypeRequest,
+                SetScarceCargoTypeResponse,
+            ),
+            "/co.za.planet.PlanetAdmin/SubmitBulkCreateManifest": grpclib.const.Handler(
+                self.__rpc_submit_bulk_create_manifest,
+                grpclib.const.Cardinality.UNARY_UNARY,
+                BulkCreateManifestRequest,
+                SubmitJobResponse,
+            ),
+            "/co.za.planet.PlanetAdmin/SubmitBulkCreateCargoType": grpclib.const.Handler(
+                self.__rpc_submit_bulk_create_cargo_type,
+                grpclib.const.Cardinality.UNARY_UNARY,
+                BulkCreateCargoTypeRequest,
+                SubmitJobResponse,
+            ),
+            "/co.za.planet.PlanetAdmin/GetJobStatus": grpclib.const.Handler(
+                self.__rpc_get_job_status,
+                grpclib.const.Cardinality.UNARY_UNARY,
+                GetJobStatusRequest,
+                GetJobStatusResponse,
+            ),
         }
 
 
@@ -330,6 +976,50 @@ class PlanetUserBase(ServiceBase):
     ) -> "MoveStarshipResponse":
         raise grpclib.GRPCError(grpclib.const.Status.UNIMPLEMENTED)
 
+    async def bulk_move_starships(
+        self, bulk_move_starships_request: "BulkMoveStarshipsRequest"
+    ) -> "BulkMoveStarshipsResponse":
+        raise grpclib.GRPCError(grpclib.const.Status.UNIMPLEMENTED)
+
+    async def list_planets(
+        self, list_planets_request: "ListPlanetsRequest"
+    ) -> AsyncIterator[ListPlanetsResponse]:
+        raise grpclib.GRPCError(grpclib.const.Status.UNIMPLEMENTED)
+        yield ListPlanetsResponse()
+
+    async def list_starships(
+        self, list_starships_request: "ListStarshipsRequest"
+    ) -> AsyncIterator[ListStarshipsResponse]:
+        raise grpclib.GRPCError(grpclib.const.Status.UNIMPLEMENTED)
+        yield ListStarshipsResponse()
+
+    async def get_planet_inventory(
+        self, get_planet_inventory_request: "GetPlanetInventoryRequest"
+    ) -> "GetPlanetInventoryResponse":
+        raise grpclib.GRPCError(grpclib.const.Status.UNIMPLEMENTED)
+
+    async def get_sector_inventory(
+        self, get_sector_inventory_request: "GetSectorInventoryRequest"
+    ) -> "GetSectorInventoryResponse":
+        raise grpclib.GRPCError(grpclib.const.Status.UNIMPLEMENTED)
+
+    async def find_suppliers(
+        self, find_suppliers_request: "FindSuppliersRequest"
+    ) -> "FindSuppliersResponse":
+        raise grpclib.GRPCError(grpclib.const.Status.UNIMPLEMENTED)
+
+    async def find_all_suppliers(
+        self, find_all_suppliers_request: "FindAllSuppliersRequest"
+    ) -> AsyncIterator[FindAllSuppliersResponse]:
+        raise grpclib.GRPCError(grpclib.const.Status.UNIMPLEMENTED)
+        yield FindAllSuppliersResponse()
+
+    async def watch_changes(
+        self, watch_changes_request: "WatchChangesRequest"
+    ) -> AsyncIterator[WatchChangesResponse]:
+        raise grpclib.GRPCError(grpclib.const.Status.UNIMPLEMENTED)
+        yield WatchChangesResponse()
+
     async def __rpc_move_starship(
         self, stream: "grpclib.server.Stream[MoveStarshipRequest, MoveStarshipResponse]"
     ) -> None:
@@ -337,6 +1027,80 @@ class PlanetUserBase(ServiceBase):
         response = await self.move_starship(request)
         await stream.send_message(response)
 
+    async def __rpc_bulk_move_starships(
+        self,
+        stream: "grpclib.server.Stream[BulkMoveStarshipsRequest, BulkMoveStarshipsResponse]",
+    ) -> None:
+        request = await stream.recv_message()
+        response = await self.bulk_move_starships(request)
+        await stream.send_message(response)
+
+    async def __rpc_list_planets(
+        self, stream: "grpclib.server.Stream[ListPlanetsRequest, ListPlanetsResponse]"
+    ) -> None:
+        request = await stream.recv_message()
+        await self._call_rpc_handler_server_stream(
+            self.list_planets,
+            stream,
+            request,
+        )
+
+    async def __rpc_list_starships(
+        self,
+        stream: "grpclib.server.Stream[ListStarshipsRequest, ListStarshipsResponse]",
+    ) -> None:
+        request = await stream.recv_message()
+        await self._call_rpc_handler_server_stream(
+            self.list_starships,
+            stream,
+            request,
+        )
+
+    async def __rpc_get_planet_inventory(
+        self,
+        stream: "grpclib.server.Stream[GetPlanetInventoryRequest, GetPlanetInventoryResponse]",
+    ) -> None:
+        request = await stream.recv_message()
+        response = await self.get_planet_inventory(request)
+        await stream.send_message(response)
+
+    async def __rpc_get_sector_inventory(
+        self,
+        stream: "grpclib.server.Stream[GetSectorInventoryRequest, GetSectorInventoryResponse]",
+    ) -> None:
+        request = await stream.recv_message()
+        response = await self.get_sector_inventory(request)
+        await stream.send_message(response)
+
+    async def __rpc_find_suppliers(
+        self,
+        stream: "grpclib.server.Stream[FindSuppliersRequest, FindSuppliersResponse]",
+    ) -> None:
+        request = await stream.recv_message()
+        response = await self.find_suppliers(request)
+        await stream.send_message(response)
+
+    async def __rpc_find_all_suppliers(
+        self,
+        stream: "grpclib.server.Stream[FindAllSuppliersRequest, FindAllSuppliersResponse]",
+    ) -> None:
+        request = await stream.recv_message()
+        await self._call_rpc_handler_server_stream(
+            self.find_all_suppliers,
+            stream,
+            request,
+        )
+
+    async def __rpc_watch_changes(
+        self, stream: "grpclib.server.Stream[WatchChangesRequest, WatchChangesResponse]"
+    ) -> None:
+        request = await stream.recv_message()
+        await self._call_rpc_handler_server_stream(
+            self.watch_changes,
+            stream,
+            request,
+        )
+
     def __mapping__(self) -> Dict[str, grpclib.const.Handler]:
         return {
             "/co.za.planet.PlanetUser/MoveStarship": grpclib.const.Handler(
@@ -345,4 +1109,52 @@ class PlanetUserBase(ServiceBase):
                 MoveStarshipRequest,
                 MoveStarshipResponse,
             ),
+            "/co.za.planet.PlanetUser/BulkMoveStarships": grpclib.const.Handler(
+                self.__rpc_bulk_move_starships,
+                grpclib.const.Cardinality.UNARY_UNARY,
+                BulkMoveStarshipsRequest,
+                BulkMoveStarshipsResponse,
+            ),
+            "/co.za.planet.PlanetUser/ListPlanets": grpclib.const.Handler(
+                self.__rpc_list_planets,
+                grpclib.const.Cardinality.UNARY_STREAM,
+                ListPlanetsRequest,
+                ListPlanetsResponse,
+            ),
+            "/co.za.planet.PlanetUser/ListStarships": grpclib.const.Handler(
+                self.__rpc_list_starships,
+                grpclib.const.Cardinality.UNARY_STREAM,
+                ListStarshipsRequest,
+                ListStarshipsResponse,
+            ),
+            "/co.za.planet.PlanetUser/GetPlanetInventory": grpclib.const.Handler(
+                self.__rpc_get_planet_inventory,
+                grpclib.const.Cardinality.UNARY_UNARY,
+                GetPlanetInventoryRequest,
+                GetPlanetInventoryResponse,
+            ),
+            "/co.za.planet.PlanetUser/GetSectorInventory": grpclib.const.Handler(
+                self.__rpc_get_sector_inventory,
+                grpclib.const.Cardinality.UNARY_UNARY,
+                GetSectorInventoryRequest,
+                GetSectorInventoryResponse,
+            ),
+            "/co.za.planet.PlanetUser/FindSuppliers": grpclib.const.Handler(
+                self.__rpc_find_suppliers,
+                grpclib.const.Cardinality.UNARY_UNARY,
+                FindSuppliersRequest,
+                FindSuppliersResponse,
+            ),
+            "/co.za.planet.PlanetUser/FindAllSuppliers": grpclib.const.Handler(
+                self.__rpc_find_all_suppliers,
+                grpclib.const.Cardinality.UNARY_STREAM,
+                FindAllSuppliersRequest,
+                FindAllSuppliersResponse,
+            ),
+            "/co.za.planet.PlanetUser/WatchChanges": grpclib.const.Handler(
+                self.__rpc_watch_changes,
+                grpclib.const.Cardinality.UNARY_STREAM,
+                WatchChangesRequest,
+                WatchChangesResponse,
+            ),
         }
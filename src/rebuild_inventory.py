@@ -0,0 +1,28 @@
+import asyncio
+import os
+import sys
+
+from dotenv import load_dotenv
+
+from src.resources.database.config import configure_database, dispose_database, unit_of_work
+from src.resources.database.inventory_queries import rebuild_inventory
+
+
+async def rebuild(database_url: str) -> tuple[int, int]:
+    """Recompute the planet and sector inventories from every manifest, returning how many rows had drifted."""
+    configure_database(database_url, database_pool_size=1, database_overflow_size=0)
+    try:
+        async with unit_of_work() as session:
+            planet_rows, sector_rows = await rebuild_inventory(session)
+    finally:
+        await dispose_database()
+
+    print(f"Inventory rebuilt: corrected {planet_rows} planet rows and {sector_rows} sector rows.")
+    return planet_rows, sector_rows
+
+
+if __name__ == "__main__":
+    load_dotenv()
+    if not os.getenv("DATABASE_URL"):
+        sys.exit("rebuild_inventory: the DATABASE_URL environment variable is required")
+    asyncio.run(rebuild(os.environ["DATABASE_URL"]))
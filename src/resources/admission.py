@@ -0,0 +1,179 @@
+import asyncio
+import enum
+import itertools
+import time
+from bisect import insort
+from collections import defaultdict
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional
+
+from grpclib.const import Status
+from grpclib.events import RecvRequest, listen
+from grpclib.exceptions import GRPCError
+from grpclib.metadata import Deadline
+from grpclib.server import Server
+
+from src.resources.metrics import Counter, Gauge, Histogram
+from src.strings import en_za as strings
+
+rpc_shed = Counter("planets_rpc_shed_total", "RPCs rejected with RESOURCE_EXHAUSTED before running, by reason.", ("method", "reason"))
+admission_wait = Histogram("planets_admission_wait_seconds", "Time an RPC queued for an admission slot.", ("method",))
+admission_queued = Gauge("planets_admission_queued", "RPCs queued for an admission slot, by priority.", ("priority",))
+
+
+class Priority(enum.IntEnum):
+    INTERACTIVE = 0
+    BATCH = 1
+    BULK = 2
+
+
+@dataclass(frozen=True)
+class MethodPolicy:
+    priority: Priority = Priority.INTERACTIVE
+    # The most RPCs of this method admitted at once, or None for no limit beyond the shared capacity.
+    concurrency: Optional[int] = None
+    # Exempt RPCs take no slot, e.g. long-lived streams that only touch the database in short reads.
+    exempt: bool = False
+
+
+class _Waiter:
+    __slots__ = ("priority", "sequence", "method", "policy", "future")
+
+    def __init__(self, priority: Priority, sequence: int, method: str, policy: MethodPolicy, future: asyncio.Future):
+        self.priority = priority
+        self.sequence = sequence
+        self.method = method
+        self.policy = policy
+        self.future = future
+
+
+class AdmissionController:
+    """
+    Lets at most ``capacity`` RPCs run at once, and at most a method's ``concurrency`` of that method.
+
+    RPCs that find no free slot queue, and a freed slot goes to the highest-priority queued RPC that its method's limit
+    allows, oldest first. A queued RPC is shed with ``RESOURCE_EXHAUSTED`` up front when ``max_queue`` RPCs are already
+    ahead of it, or when its deadline would pass before it could finish. The estimate uses the queue ahead of it and a
+    moving average, weighted by ``smoothing``, of how long each method has held its slot.
+    """
+
+    def __init__(self, capacity: int, policies: dict[str, MethodPolicy], default: MethodPolicy = MethodPolicy(), max_queue: int = 1000, smoothing: float = 0.2):
+        self.capacity = capacity
+        self.policies = policies
+        self.default = default
+        self.max_queue = max_queue
+        self.smoothing = smoothing
+        self.admitted = 0
+        self._running: dict[str, int] = defaultdict(int)
+        self._hold_time: dict[str, float] = {}
+        self._waiters: list[_Waiter] = []
+        self._sequence = itertools.count()
+
+    def queued(self) -> dict[Priority, int]:
+        queued = {priority: 0 for priority in Priority}
+        for waiter in self._waiters:
+            queued[waiter.priority] += 1
+        return queued
+
+    def policy(self, method: str) -> MethodPolicy:
+        return self.policies.get(method, self.default)
+
+    @asynccontextmanager
+    async def admit(self, method: str, deadline: Optional[Deadline] = None) -> AsyncIterator[None]:
+        """Hold a slot for ``method`` while the block runs, queueing for one or raising ``GRPCError`` when shed."""
+        policy = self.policy(method)
+        if policy.exempt:
+            yield
+            return
+
+        if self._has_room(method, policy):
+            self._take(method)
+        else:
+            await self._queue(method, policy, deadline)
+
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            held = time.monotonic() - started
+            average = self._hold_time.get(method)
+            self._hold_time[method] = held if average is None else average + self.smoothing * (held - average)
+            self._release(method)
+
+    def _has_room(self, method: str, policy: MethodPolicy) -> bool:
+        return self.admitted < self.capacity and (policy.concurrency is None or self._running[method] < policy.concurrency)
+
+    def _take(self, method: str) -> None:
+        self.admitted += 1
+        self._running[method] += 1
+
+    def _mean_hold_time(self) -> float:
+        if not self.admitted:
+            return 0.0
+        return sum(self._hold_time.get(method, 0.0) * running for method, running in self._running.items()) / self.admitted
+
+    def expected_wait(self, method: str, policy: MethodPolicy) -> float:
+        """Seconds until a slot for ``method`` would free up for an RPC joining the queue now, from average hold times."""
+        ahead = sum(1 for waiter in self._waiters if waiter.priority <= policy.priority)
+        wait = (ahead + 1) * self._mean_hold_time() / self.capacity
+        if policy.concurrency is not None:
+            same_method = sum(1 for waiter in self._waiters if waiter.method == method)
+            wait = max(wait, (same_method + 1) * self._hold_time.get(method, 0.0) / policy.concurrency)
+        return wait
+
+    def _shed_reason(self, method: str, policy: MethodPolicy, deadline: Optional[Deadline]) -> Optional[str]:
+        if sum(1 for waiter in self._waiters if waiter.priority <= policy.priority) >= self.max_queue:
+            return "queue"
+        if deadline is not None and deadline.time_remaining() < self.expected_wait(method, policy) + self._hold_time.get(method, 0.0):
+            return "deadline"
+        return None
+
+    async def _queue(self, method: str, policy: MethodPolicy, deadline: Optional[Deadline]) -> None:
+        reason = self._shed_reason(method, policy, deadline)
+        if reason is not None:
+            rpc_shed.inc(method=method, reason=reason)
+            raise GRPCError(Status.RESOURCE_EXHAUSTED, strings.error_server_overloaded)
+
+        waiter = _Waiter(policy.priority, next(self._sequence), method, policy, asyncio.get_running_loop().create_future())
+        insort(self._waiters, waiter, key=lambda w: (w.priority, w.sequence))
+        queued_at = time.monotonic()
+        try:
+            await waiter.future
+        except asyncio.CancelledError:
+            if waiter.future.done() and not waiter.future.cancelled():
+                # The slot was granted just as the RPC was cancelled, so it is handed on.
+                self._release(method)
+            else:
+                self._waiters.remove(waiter)
+            raise
+        admission_wait.observe(time.monotonic() - queued_at, method=method)
+
+    def _release(self, method: str) -> None:
+        self.admitted -= 1
+        self._running[method] -= 1
+
+        # Slots are counted as taken when granted, so every waiter left behind is one that cannot run yet.
+        for waiter in list(self._waiters):
+            if self.admitted >= self.capacity:
+                break
+            if self._has_room(waiter.method, waiter.policy):
+                self._waiters.remove(waiter)
+                self._take(waiter.method)
+                waiter.future.set_result(None)
+
+
+def admit_server(server: Server, controller: AdmissionController) -> None:
+    """Run every RPC ``server`` handles through ``controller`` before its handler reads the request."""
+
+    async def on_recv_request(event: RecvRequest) -> None:
+        method_func, method_name, deadline = event.method_func, event.method_name, event.deadline
+
+        async def admitted(stream) -> None:
+            async with controller.admit(method_name, deadline):
+                await method_func(stream)
+
+        event.method_func = admitted
+
+    listen(server, RecvRequest, on_recv_request)
+    admission_queued.set_function(lambda: {(priority.name,): count for priority, count in controller.queued().items()})
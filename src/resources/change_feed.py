@@ -0,0 +1,38 @@
+import asyncio
+from typing import Optional
+
+
+class ChangeFeed:
+    """
+    Wakes every change stream of a worker when a change event commits, so streams read the outbox only when it moved.
+
+    ``notify`` is subscribed to the change event channel. A stream takes a ``wakeup()`` before each read and then
+    waits on it, so a notification arriving during the read is not missed. Waits also end after ``poll_interval``,
+    which covers notifications lost while the listener reconnects or when no listener is running.
+    """
+
+    def __init__(self, poll_interval: float = 5.0):
+        self.poll_interval = poll_interval
+        self.closed = False
+        self._wakeup = asyncio.Event()
+
+    def wakeup(self) -> asyncio.Event:
+        return self._wakeup
+
+    def notify(self, _: Optional[str] = None) -> None:
+        wakeup, self._wakeup = self._wakeup, asyncio.Event()
+        wakeup.set()
+
+    async def wait(self, wakeup: asyncio.Event, timeout: Optional[float] = None) -> bool:
+        """Wait for ``wakeup`` for up to ``timeout`` seconds, the poll interval by default; False once the feed is closed."""
+        if not self.closed:
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout or self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+        return not self.closed
+
+    def close(self) -> None:
+        """End every stream at its next wait, for example when the server starts draining."""
+        self.closed = True
+        self.notify()
@@ -0,0 +1,95 @@
+from typing import Sequence
+
+from sqlalchemy import select, insert, exists, func, cast, literal, tuple_, bindparam, Row, BigInteger, SmallInteger, String
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import src.resources.database.models as models
+import src.generated.co.za.planet as proto
+
+# Change events are written by the same transaction as the change, one row per moved starship or manifest key. The
+# statements target the table rather than the mapped class, since the ORM would read a parameter dict as rows.
+
+change_event = models.ChangeEvent.__table__
+
+
+def _array(name: str):
+    return bindparam(name, type_=ARRAY(BigInteger))
+
+
+_moves = (
+    func.unnest(_array("starship_ids"), _array("from_planet_ids"), _array("to_planet_ids"))
+    .table_valued("starship_id", "from_planet_id", "to_planet_id", name="moves")
+    .render_derived()
+)
+record_moves_stmt = insert(change_event).from_select(
+    ["change_type", "starship_id", "from_planet_id", "planet_id"],
+    select(literal(proto.ChangeType.STARSHIP_MOVED.value, SmallInteger), _moves.c.starship_id, _moves.c.from_planet_id, _moves.c.to_planet_id),
+)
+
+_manifest_rows = (
+    func.unnest(_array("starship_ids"), _array("cargo_type_ids"), _array("quantities"))
+    .table_valued("starship_id", "cargo_type_id", "quantity", name="manifest_rows")
+    .render_derived()
+)
+record_manifest_changes_stmt = insert(change_event).from_select(
+    ["change_type", "starship_id", "cargo_type_id", "quantity"],
+    select(
+        literal(proto.ChangeType.MANIFEST_CHANGED.value, SmallInteger), _manifest_rows.c.starship_id, _manifest_rows.c.cargo_type_id, _manifest_rows.c.quantity
+    ),
+)
+
+# Every transaction below the snapshot's xmin has finished, so no event can still appear behind a cursor that only
+# advances through them.
+_horizon = cast(cast(func.pg_snapshot_xmin(func.pg_current_snapshot()), String), BigInteger)
+_after_cursor = tuple_(change_event.c.transaction_id, change_event.c.change_event_id) > tuple_(
+    bindparam("after_transaction_id", type_=BigInteger), bindparam("after_change_event_id", type_=BigInteger)
+)
+
+changes_after_stmt = (
+    select(change_event)
+    .where(_after_cursor, change_event.c.transaction_id < _horizon)
+    .order_by(change_event.c.transaction_id, change_event.c.change_event_id)
+    .limit(bindparam("page_size"))
+)
+
+held_back_changes_stmt = select(exists().where(_after_cursor, change_event.c.transaction_id >= _horizon))
+
+
+async def record_moves(session: AsyncSession, moves: Sequence[tuple[int, int, int]]) -> None:
+    """Record a change event for each ``(starship_id, from_planet_id, to_planet_id)`` move."""
+    if not moves:
+        return
+
+    starship_ids, from_planet_ids, to_planet_ids = zip(*moves)
+    await session.execute(
+        record_moves_stmt,
+        {"starship_ids": list(starship_ids), "from_planet_ids": list(from_planet_ids), "to_planet_ids": list(to_planet_ids)},
+    )
+
+
+async def record_manifest_changes(session: AsyncSession, rows: Sequence[tuple[int, int, int]]) -> None:
+    """Record a change event for each ``(starship_id, cargo_type_id, quantity)`` added to a manifest."""
+    if not rows:
+        return
+
+    starship_ids, cargo_type_ids, quantities = zip(*rows)
+    await session.execute(
+        record_manifest_changes_stmt,
+        {"starship_ids": list(starship_ids), "cargo_type_ids": list(cargo_type_ids), "quantities": list(quantities)},
+    )
+
+
+async def read_changes(session: AsyncSession, after_transaction_id: int, after_change_event_id: int, page_size: int) -> tuple[Sequence[Row], bool]:
+    """
+    Return up to ``page_size`` committed change events after the cursor, oldest first, and whether any more have committed
+    but are held back until older transactions still running finish.
+    """
+    parameters = {"after_transaction_id": after_transaction_id, "after_change_event_id": after_change_event_id}
+    events = (await session.execute(changes_after_stmt, {**parameters, "page_size": page_size})).all()
+    if len(events) == page_size:
+        return events, False
+
+    if events:
+        parameters = {"after_transaction_id": events[-1].transaction_id, "after_change_event_id": events[-1].change_event_id}
+    return events, bool(await session.scalar(held_back_changes_stmt, parameters))
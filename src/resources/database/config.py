@@ -1,9 +1,30 @@
 import json
-from asyncio import current_task
+import logging
+from asyncio import Task, current_task
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
 from decimal import Decimal
+from typing import AsyncIterator, Optional, Sequence
 
+from grpclib.events import RecvRequest, listen
+from grpclib.server import Server
+from psycopg import postgres
+from psycopg.types.array import ListDumper
+from psycopg.types.numeric import Int8BinaryDumper, Int8Dumper
+from sqlalchemy import event
 from sqlalchemy.engine import URL
-from sqlalchemy.ext.asyncio import async_sessionmaker, async_scoped_session, create_async_engine
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker, create_async_engine
+
+from src.resources.database.pool import InstrumentedPool, PoolMaintainer, instrument_pool
+from src.resources.database.replicas import ReplicaRouter
+from src.resources.instrumentation import instrument_engine
+from src.resources.metrics import Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+db_sessions_open = Gauge("planets_db_sessions_open", "Database sessions opened and not yet closed.")
+db_session_leaks = Counter("planets_db_session_leaks_total", "RPCs that returned with their session still in a transaction.", ("method",))
 
 
 def _default(val):
@@ -17,17 +38,211 @@ def dumps(d):
 
 
 session_maker = async_sessionmaker(expire_on_commit=False)
-Session = async_scoped_session(session_maker, scopefunc=current_task)
-
-
-def configure_database(connection_string: str | URL, database_pool_size: int = 10, database_overflow_size: int = 40):
-    session_maker.configure(
-        bind=create_async_engine(
-            url=connection_string,
-            pool_pre_ping=True,
-            json_serializer=dumps,
-            pool_recycle=600,
-            pool_size=database_pool_size,
-            max_overflow=database_overflow_size,
-        )
+pool_maintainer: Optional[PoolMaintainer] = None
+replica_router: Optional[ReplicaRouter] = None
+
+
+class _RequestScope:
+    __slots__ = ("owner", "method", "session")
+
+    def __init__(self, owner: Task, method: str):
+        self.owner = owner
+        self.method = method
+        self.session: Optional[AsyncSession] = None
+
+
+_request_scope: ContextVar[Optional[_RequestScope]] = ContextVar("request_scope", default=None)
+
+
+class BigintArray(list):
+    """A list of ints sent as ``bigint[]`` even when empty, which psycopg would otherwise send untyped."""
+
+
+class _BigintArrayDumper(ListDumper):
+    oid = postgres.types["int8"].array_oid
+    element_oid = postgres.types["int8"].oid
+
+
+def _dump_ints_as_bigint(dbapi_connection, connection_record) -> None:
+    # psycopg types each int parameter as int2, int4 or int8 by its value, and int arrays by their first element, and
+    # keys prepared statements by those types. Sent as bigint, every call of a statement, whatever its ids or batch size,
+    # shares one prepared statement, and the server infers the same types for it every time.
+    adapters = dbapi_connection.driver_connection.adapters
+    adapters.register_dumper(int, Int8Dumper)
+    adapters.register_dumper(int, Int8BinaryDumper)
+    adapters.register_dumper(BigintArray, _BigintArrayDumper)
+
+
+def create_database_engine(
+    connection_string: str | URL,
+    database_pool_size: int = 10,
+    database_overflow_size: int = 40,
+    prepare_threshold: Optional[int] = 0,
+) -> AsyncEngine:
+    """
+    Create an instrumented engine on ``InstrumentedPool``.
+
+    psycopg prepares a statement server-side once a connection has run it ``prepare_threshold`` times, so 0 prepares
+    on first use and ``None`` never prepares, e.g. behind a transaction-pooling PgBouncer.
+    """
+    # No pre-ping: idle connections are validated in the background by start_pool_maintenance instead.
+    engine = create_async_engine(
+        url=connection_string,
+        poolclass=InstrumentedPool,
+        json_serializer=dumps,
+        pool_recycle=600,
+        pool_size=database_pool_size,
+        max_overflow=database_overflow_size,
+        connect_args={"prepare_threshold": prepare_threshold},
     )
+    event.listen(engine.sync_engine, "connect", _dump_ints_as_bigint)
+    instrument_engine(engine.sync_engine)
+    return engine
+
+
+def configure_database(
+    connection_string: str | URL,
+    database_pool_size: int = 10,
+    database_overflow_size: int = 40,
+    prepare_threshold: Optional[int] = 0,
+    replica_urls: Sequence[str | URL] = (),
+    replica_check_interval: float = 5.0,
+):
+    """
+    Bind ``session_maker`` to the primary and route ``read_session`` to ``replica_urls``, each with a pool of the same size.
+    """
+    global replica_router
+    engine = create_database_engine(connection_string, database_pool_size, database_overflow_size, prepare_threshold)
+    instrument_pool(engine)
+    session_maker.configure(bind=engine)
+
+    replicas = [create_database_engine(url, database_pool_size, database_overflow_size, prepare_threshold) for url in replica_urls]
+    replica_router = ReplicaRouter(engine, replicas, check_interval=replica_check_interval)
+
+
+def start_pool_maintenance(validate_interval: float = 30.0, min_size: Optional[int] = None, max_size: Optional[int] = None) -> PoolMaintainer:
+    """
+    Validate the configured engine's idle connections in the background and, given both bounds, size its pool
+    between them. Replicas are health-checked from here on too. Stopped by ``dispose_database``.
+    """
+    global pool_maintainer
+    pool_maintainer = PoolMaintainer(session_maker.kw["bind"], validate_interval=validate_interval, min_size=min_size, max_size=max_size)
+    pool_maintainer.start()
+    if replica_router is not None:
+        replica_router.start()
+    return pool_maintainer
+
+
+@asynccontextmanager
+async def _open_session(**kwargs) -> AsyncIterator[AsyncSession]:
+    db_sessions_open.inc()
+    try:
+        async with session_maker(**kwargs) as session:
+            yield session
+    finally:
+        db_sessions_open.dec()
+
+
+@asynccontextmanager
+async def request_scope(method: str = "none") -> AsyncIterator[None]:
+    """
+    Share one session among the ``unit_of_work`` blocks the current task runs inside this block, closing it on exit.
+
+    Tasks started inside the block, such as single-flight calls and write-combiner flushes, open sessions of their
+    own, since a session must not be used concurrently. A session still in a transaction on exit belongs to a unit of
+    work that never finished, e.g. in a stream abandoned by its client: it is counted as a leak under ``method``,
+    logged and rolled back.
+    """
+    scope = _RequestScope(current_task(), method)
+    token = _request_scope.set(scope)
+    try:
+        yield
+    finally:
+        _request_scope.reset(token)
+        if scope.session is not None:
+            if scope.session.in_transaction():
+                db_session_leaks.inc(method=method)
+                logger.warning("%s returned with its database session still in a transaction; rolling it back", method)
+            await scope.session.close()
+            db_sessions_open.dec()
+
+
+def scope_sessions(server: Server) -> None:
+    """Run every RPC ``server`` handles in a ``request_scope`` named after its method."""
+
+    async def on_recv_request(event: RecvRequest) -> None:
+        method_func, method_name = event.method_func, event.method_name
+
+        async def scoped(stream) -> None:
+            async with request_scope(method_name):
+                await method_func(stream)
+
+        event.method_func = scoped
+
+    listen(server, RecvRequest, on_recv_request)
+
+
+@asynccontextmanager
+async def unit_of_work() -> AsyncIterator[AsyncSession]:
+    """
+    Run a block of query functions as one transaction: it commits once when the block exits cleanly, and is rolled
+    back when the block raises or the session closes without committing.
+
+    Query functions never commit, so the service decides how much work shares a transaction. Inside a
+    ``request_scope`` the request's session is reused, and its connection goes back to the pool as soon as the block
+    exits; elsewhere each block opens a session of its own.
+    """
+    scope = _request_scope.get()
+    if scope is None or scope.owner is not current_task():
+        async with _open_session() as session:
+            yield session
+            await session.commit()
+        return
+
+    if scope.session is None:
+        scope.session = session_maker()
+        db_sessions_open.inc()
+
+    # Closing rather than only committing detaches the block's objects, just as a session of its own would leave them.
+    try:
+        yield scope.session
+        await scope.session.commit()
+    finally:
+        await scope.session.close()
+
+
+@asynccontextmanager
+async def read_session() -> AsyncIterator[AsyncSession]:
+    """
+    A session for reads that need not see the caller's own writes, on a replica when one is healthy.
+
+    Replicas lag the primary, so anything that reads back what it just wrote stays on ``unit_of_work``. A read that
+    fails to reach its replica takes that replica out of rotation until a health check finds it up again.
+    """
+    engine = replica_router.choose() if replica_router is not None else session_maker.kw["bind"]
+    try:
+        async with _open_session(bind=engine) as session:
+            yield session
+            # Committing rather than rolling back keeps the connection's prepared statements.
+            await session.commit()
+    except DBAPIError as exc:
+        if replica_router is not None and engine is not replica_router.primary and (exc.connection_invalidated or isinstance(exc, OperationalError)):
+            replica_router.mark_down(engine)
+        raise
+
+
+async def dispose_database():
+    global pool_maintainer, replica_router
+    if pool_maintainer is not None:
+        await pool_maintainer.stop()
+        pool_maintainer = None
+
+    if replica_router is not None:
+        await replica_router.stop()
+        for replica in replica_router.replicas:
+            await replica.dispose()
+        replica_router = None
+
+    engine = session_maker.kw.get("bind")
+    if engine is not None:
+        await engine.dispose()
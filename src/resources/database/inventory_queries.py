@@ -0,0 +1,180 @@
+from typing import Sequence
+
+from sqlalchemy import select, func, delete, text, union_all, bindparam, any_, BigInteger
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import src.resources.database.models as models
+
+# Every change to the summary tables is a set of (planet_id, cargo_type_id, quantity) deltas, applied by one statement
+# that adds them to planet_inventory and, rolled up through each planet's sector, to sector_inventory. Rows are upserted
+# in key order, so concurrent writers lock summary rows in the same order. The statements target the tables rather
+# than the mapped classes, since the ORM would read a parameter dict as rows for a bulk INSERT.
+
+planet_inventory = models.PlanetInventory.__table__
+sector_inventory = models.SectorInventory.__table__
+
+
+def _array(name: str):
+    return bindparam(name, type_=ARRAY(BigInteger))
+
+
+def _apply_changes(changes):
+    """Build the statement that adds the ``planet_id, cargo_type_id, quantity`` deltas in ``changes`` to both tables."""
+    planet_total = func.sum(changes.c.quantity)
+    planet_changes = pg_insert(planet_inventory).from_select(
+        ["planet_id", "cargo_type_id", "quantity"],
+        select(changes.c.planet_id, changes.c.cargo_type_id, planet_total)
+        .group_by(changes.c.planet_id, changes.c.cargo_type_id)
+        .having(planet_total != 0)
+        .order_by(changes.c.planet_id, changes.c.cargo_type_id),
+    )
+    planet_changes = planet_changes.on_conflict_do_update(
+        index_elements=[planet_inventory.c.planet_id, planet_inventory.c.cargo_type_id],
+        set_={"quantity": planet_inventory.c.quantity + planet_changes.excluded.quantity},
+    ).cte("planet_changes")
+
+    sector_total = func.sum(changes.c.quantity)
+    sector_changes = pg_insert(sector_inventory).from_select(
+        ["sector_id", "cargo_type_id", "quantity"],
+        select(models.Planet.sector_id, changes.c.cargo_type_id, sector_total)
+        .join_from(changes, models.Planet, models.Planet.planet_id == changes.c.planet_id)
+        .group_by(models.Planet.sector_id, changes.c.cargo_type_id)
+        .having(sector_total != 0)
+        .order_by(models.Planet.sector_id, changes.c.cargo_type_id),
+    )
+    return sector_changes.on_conflict_do_update(
+        index_elements=[sector_inventory.c.sector_id, sector_inventory.c.cargo_type_id],
+        set_={"quantity": sector_inventory.c.quantity + sector_changes.excluded.quantity},
+    ).add_cte(planet_changes)
+
+
+# Manifest quantities count towards the planet their starship is on. The starships are share-locked in id order so a
+# concurrent move waits for this transaction, and then moves these quantities along with the rest of its cargo.
+_manifest_rows = (
+    func.unnest(_array("starship_ids"), _array("cargo_type_ids"), _array("quantities"))
+    .table_valued("starship_id", "cargo_type_id", "quantity", name="manifest_rows")
+    .render_derived()
+)
+_manifest_starships = (
+    select(models.StarShip.starship_id, models.StarShip.planet_id)
+    .where(models.StarShip.starship_id == any_(_array("starship_ids")))
+    .order_by(models.StarShip.starship_id)
+    .with_for_update(read=True)
+    .cte("manifest_starships")
+)
+add_manifest_inventory_stmt = _apply_changes(
+    select(_manifest_starships.c.planet_id, _manifest_rows.c.cargo_type_id, _manifest_rows.c.quantity)
+    .join_from(_manifest_rows, _manifest_starships, _manifest_starships.c.starship_id == _manifest_rows.c.starship_id)
+    .cte("changes")
+)
+
+# A moved starship takes all of its cargo from the planet it left to the one it arrived at.
+_moves = (
+    func.unnest(_array("starship_ids"), _array("from_planet_ids"), _array("to_planet_ids"))
+    .table_valued("starship_id", "from_planet_id", "to_planet_id", name="moves")
+    .render_derived()
+)
+_moved_cargo = (
+    select(_moves.c.from_planet_id, _moves.c.to_planet_id, models.Manifest.cargo_type_id, models.Manifest.quantity)
+    .join_from(_moves, models.Manifest, models.Manifest.starship_id == _moves.c.starship_id)
+    .cte("moved_cargo")
+)
+move_inventory_stmt = _apply_changes(
+    union_all(
+        select(_moved_cargo.c.from_planet_id.label("planet_id"), _moved_cargo.c.cargo_type_id, (-_moved_cargo.c.quantity).label("quantity")),
+        select(_moved_cargo.c.to_planet_id.label("planet_id"), _moved_cargo.c.cargo_type_id, _moved_cargo.c.quantity),
+    ).cte("changes")
+)
+
+_planet_totals = (
+    select(models.StarShip.planet_id, models.Manifest.cargo_type_id, func.sum(models.Manifest.quantity).label("quantity"))
+    .join_from(models.Manifest, models.StarShip, models.StarShip.starship_id == models.Manifest.starship_id)
+    .group_by(models.StarShip.planet_id, models.Manifest.cargo_type_id)
+    .having(func.sum(models.Manifest.quantity) != 0)
+    .cte("planet_totals")
+)
+_sector_totals = (
+    select(models.Planet.sector_id, _planet_totals.c.cargo_type_id, func.sum(_planet_totals.c.quantity).label("quantity"))
+    .join_from(_planet_totals, models.Planet, models.Planet.planet_id == _planet_totals.c.planet_id)
+    .group_by(models.Planet.sector_id, _planet_totals.c.cargo_type_id)
+    .having(func.sum(_planet_totals.c.quantity) != 0)
+    .cte("sector_totals")
+)
+
+# Writers hold ROW EXCLUSIVE on the summary tables while they update them, so EXCLUSIVE waits for them to commit and
+# then keeps new ones out until the rebuild commits. Reads carry on against the old rows meanwhile.
+lock_inventory_stmt = text("LOCK TABLE planet.planet_inventory, planet.sector_inventory IN EXCLUSIVE MODE")
+
+
+def _count_drift(table, key: str, totals):
+    """Delete every row of ``table``, counting those whose quantity differs from ``totals`` or that only one side has."""
+    removed = delete(table).returning(table.c[key], table.c.cargo_type_id, table.c.quantity).cte(f"removed_{table.name}")
+    matched = (removed.c[key] == totals.c[key]) & (removed.c.cargo_type_id == totals.c.cargo_type_id)
+    return (
+        select(func.count())
+        .select_from(removed.join(totals, matched, full=True))
+        .where(func.coalesce(removed.c.quantity, 0) != func.coalesce(totals.c.quantity, 0))
+        .scalar_subquery()
+    )
+
+
+clear_inventory_stmt = select(
+    _count_drift(planet_inventory, "planet_id", _planet_totals).label("planet_rows"),
+    _count_drift(sector_inventory, "sector_id", _sector_totals).label("sector_rows"),
+)
+
+fill_inventory_stmt = (
+    pg_insert(sector_inventory)
+    .from_select(
+        ["sector_id", "cargo_type_id", "quantity"],
+        select(_sector_totals.c.sector_id, _sector_totals.c.cargo_type_id, _sector_totals.c.quantity),
+    )
+    .add_cte(
+        pg_insert(planet_inventory)
+        .from_select(["planet_id", "cargo_type_id", "quantity"], select(_planet_totals.c.planet_id, _planet_totals.c.cargo_type_id, _planet_totals.c.quantity))
+        .cte("filled_planets")
+    )
+)
+
+
+async def add_manifest_inventory(session: AsyncSession, rows: Sequence[tuple[int, int, int]]) -> None:
+    """Add ``(starship_id, cargo_type_id, quantity)`` manifest rows to the inventory of each starship's planet."""
+    if not rows:
+        return
+
+    starship_ids, cargo_type_ids, quantities = zip(*rows)
+    await session.execute(
+        add_manifest_inventory_stmt,
+        {"starship_ids": list(starship_ids), "cargo_type_ids": list(cargo_type_ids), "quantities": list(quantities)},
+    )
+
+
+async def move_inventory(session: AsyncSession, moves: Sequence[tuple[int, int, int]]) -> None:
+    """
+    Carry the cargo of each ``(starship_id, from_planet_id, to_planet_id)`` move from one planet's inventory to the
+    other's.
+
+    Call it once the starships are locked, so the manifests it reads include any written by transactions the lock
+    waited for.
+    """
+    if not moves:
+        return
+
+    starship_ids, from_planet_ids, to_planet_ids = zip(*moves)
+    await session.execute(
+        move_inventory_stmt,
+        {"starship_ids": list(starship_ids), "from_planet_ids": list(from_planet_ids), "to_planet_ids": list(to_planet_ids)},
+    )
+
+
+async def rebuild_inventory(session: AsyncSession) -> tuple[int, int]:
+    """
+    Recompute both summary tables from ``manifest``, returning how many planet and sector rows were wrong.
+
+    Manifest writes and moves wait for the rebuild to commit, while inventory reads keep being served.
+    """
+    await session.execute(lock_inventory_stmt)
+    drift = (await session.execute(clear_inventory_stmt)).one()
+    await session.execute(fill_inventory_stmt)
+    return drift.planet_rows, drift.sector_rows
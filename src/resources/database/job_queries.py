@@ -0,0 +1,139 @@
+from datetime import timedelta
+from typing import Optional, Sequence
+
+from sqlalchemy import select, insert, update, func, and_, or_, literal_column, bindparam, Row, BigInteger, Interval, LargeBinary, SmallInteger
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import src.resources.database.models as models
+import src.generated.co.za.planet as proto
+
+# Job states are compared as literals rather than parameters, so the planner can match ix_job_pending's predicate.
+
+job = models.Job.__table__
+
+
+def _state(state: proto.JobState):
+    return literal_column(str(state.value), SmallInteger)
+
+
+_lease_expires = func.now() + bindparam("lease", type_=Interval)
+# Only the worker holding the latest claim may write to a job.
+_claimed = and_(job.c.job_id == bindparam("target_job_id"), job.c.attempts == bindparam("attempt"), job.c.state == _state(proto.JobState.RUNNING))
+
+submit_job_stmt = (
+    insert(job)
+    .values(
+        job_type=bindparam("job_type", type_=SmallInteger),
+        state=_state(proto.JobState.QUEUED),
+        payload=bindparam("payload", type_=LargeBinary),
+        total_items=bindparam("total_items", type_=BigInteger),
+    )
+    .returning(job.c.job_id)
+)
+
+# A running job whose lease has lapsed was left behind by a worker that died, and is claimed again.
+_next_job = (
+    select(job.c.job_id)
+    .where(
+        or_(
+            job.c.state == _state(proto.JobState.QUEUED),
+            and_(job.c.state == _state(proto.JobState.RUNNING), job.c.lease_expires < func.now()),
+        )
+    )
+    .order_by(job.c.job_id)
+    .limit(1)
+    .with_for_update(skip_locked=True)
+    .scalar_subquery()
+)
+claim_job_stmt = (
+    update(job)
+    .where(job.c.job_id == _next_job)
+    .values(
+        state=_state(proto.JobState.RUNNING),
+        attempts=job.c.attempts + 1,
+        lease_expires=_lease_expires,
+        date_started=func.coalesce(job.c.date_started, func.now()),
+    )
+    .returning(job)
+)
+
+advance_job_stmt = (
+    update(job)
+    .where(_claimed)
+    .values(
+        completed_items=job.c.completed_items + bindparam("item_count", type_=BigInteger),
+        result_ids=func.array_cat(job.c.result_ids, bindparam("ids", type_=ARRAY(BigInteger))),
+        lease_expires=_lease_expires,
+    )
+    .returning(job.c.job_id)
+)
+
+finish_job_stmt = (
+    update(job)
+    .where(_claimed)
+    .values(
+        state=bindparam("final_state", type_=SmallInteger),
+        outcome=bindparam("job_outcome", type_=LargeBinary),
+        payload=None,
+        lease_expires=None,
+        date_finished=func.now(),
+    )
+    .returning(job.c.job_id)
+)
+
+# A job handed back at shutdown does not count against its attempts.
+release_job_stmt = (
+    update(job).where(_claimed).values(state=_state(proto.JobState.QUEUED), attempts=job.c.attempts - 1, lease_expires=None).returning(job.c.job_id)
+)
+
+get_job_stmt = select(
+    job.c.job_id,
+    job.c.job_type,
+    job.c.state,
+    job.c.total_items,
+    job.c.completed_items,
+    job.c.result_ids,
+    job.c.outcome,
+).where(job.c.job_id == bindparam("job_id"))
+
+
+async def submit_job(session: AsyncSession, job_type: proto.JobType, payload: bytes, total_items: int) -> int:
+    """Queue a job of ``total_items`` items, returning its id."""
+    return await session.scalar(submit_job_stmt, {"job_type": job_type.value, "payload": payload, "total_items": total_items})
+
+
+async def claim_job(session: AsyncSession, lease: float) -> Optional[Row]:
+    """
+    Claim the oldest job that is queued or whose lease has lapsed, holding it for ``lease`` seconds, or return None.
+
+    Jobs another transaction is claiming are skipped rather than waited for, so concurrent workers each take a
+    different job.
+    """
+    return (await session.execute(claim_job_stmt, {"lease": timedelta(seconds=lease)})).one_or_none()
+
+
+async def advance_job(session: AsyncSession, job_id: int, attempt: int, item_count: int, ids: Sequence[int], lease: float) -> bool:
+    """
+    Count ``item_count`` more items done, append ``ids`` to the job's results and extend its lease.
+
+    Returns False when ``attempt`` is no longer the job's latest claim, in which case the caller must roll back the
+    work it did for these items.
+    """
+    parameters = {"target_job_id": job_id, "attempt": attempt, "item_count": item_count, "ids": list(ids), "lease": timedelta(seconds=lease)}
+    return await session.scalar(advance_job_stmt, parameters) is not None
+
+
+async def finish_job(session: AsyncSession, job_id: int, attempt: int, state: proto.JobState, outcome: proto.ResponseMessage) -> bool:
+    """Record a claimed job's final state and outcome, returning False when ``attempt`` is no longer its latest claim."""
+    parameters = {"target_job_id": job_id, "attempt": attempt, "final_state": state.value, "job_outcome": bytes(outcome)}
+    return await session.scalar(finish_job_stmt, parameters) is not None
+
+
+async def release_job(session: AsyncSession, job_id: int, attempt: int) -> bool:
+    """Put a claimed job back in the queue to be resumed from its completed items by any worker."""
+    return await session.scalar(release_job_stmt, {"target_job_id": job_id, "attempt": attempt}) is not None
+
+
+async def get_job_db(session: AsyncSession, job_id: int) -> Optional[Row]:
+    return (await session.execute(get_job_stmt, {"job_id": job_id})).one_or_none()
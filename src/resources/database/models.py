@@ -1,13 +1,19 @@
 from datetime import datetime
 from typing import Annotated
 
-from sqlalchemy import MetaData, func, BigInteger, String, ForeignKey, UniqueConstraint, CheckConstraint
+from sqlalchemy import DDL, MetaData, event, func, text, BigInteger, SmallInteger, String, LargeBinary, ForeignKey, Index, UniqueConstraint, CheckConstraint
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import DeclarativeBase, declarative_mixin, Mapped, mapped_column, relationship
 from sqlalchemy_mixins.repr import ReprMixin
 
 big_int_pk = Annotated[int, mapped_column(BigInteger, primary_key=True)]
 big_int = Annotated[int, mapped_column(BigInteger)]
 
+MANIFEST_PARTITIONS = 16
+CHANGE_EVENT_CHANNEL = "planet_change_event"
+JOB_CHANNEL = "planet_job_submitted"
+LOOKUP_INVALIDATION_CHANNEL = "planet_lookup_invalidation"
+
 base_metadata = MetaData(
     schema="planet",
     naming_convention={
@@ -49,11 +55,12 @@ class Planet(BaseModel):
 
     planet_id: Mapped[big_int_pk]
     name: Mapped[str] = mapped_column(String, nullable=False, unique=True)
-    sector_id: Mapped[big_int] = mapped_column(ForeignKey("sector.sector_id"), nullable=False)
+    sector_id: Mapped[big_int] = mapped_column(ForeignKey("sector.sector_id"), nullable=False, index=True)
 
     scarce_cargo_type_id: Mapped[big_int | None] = mapped_column(
         ForeignKey("cargo_type.cargo_type_id"),
         nullable=True,
+        index=True,
     )
 
     r_starships: Mapped[list["StarShip"]] = relationship(back_populates="r_planet")
@@ -73,6 +80,29 @@ class CargoType(BaseModel):
     )
 
 
+# Renaming or deleting a sector or cargo type tells every worker to drop the old name from its lookup cache.
+for table in (Sector.__table__, CargoType.__table__):
+    for ddl in (
+        f"""
+        CREATE OR REPLACE FUNCTION %(schema)s.notify_lookup_invalidation() RETURNS trigger AS $$
+        BEGIN
+            IF TG_OP = 'UPDATE' AND OLD.name = NEW.name THEN
+                RETURN NULL;
+            END IF;
+            PERFORM pg_notify(
+                '{LOOKUP_INVALIDATION_CHANNEL}',
+                json_build_object('table', TG_TABLE_NAME, 'name', OLD.name)::text
+            );
+            RETURN NULL;
+        END;
+        $$ LANGUAGE plpgsql
+        """,
+        "CREATE TRIGGER %(table)s_notify_lookup_invalidation AFTER UPDATE OF name OR DELETE ON %(fullname)s "
+        "FOR EACH ROW EXECUTE FUNCTION %(schema)s.notify_lookup_invalidation()",
+    ):
+        event.listen(table, "after_create", DDL(ddl))
+
+
 class StarShip(BaseModel):
     __tablename__ = "starship"
 
@@ -80,7 +110,7 @@ class StarShip(BaseModel):
     name: Mapped[str] = mapped_column(String, nullable=False)
     model: Mapped[str] = mapped_column(String, nullable=False)
 
-    planet_id: Mapped[big_int] = mapped_column(ForeignKey("planet.planet_id"), nullable=False)
+    planet_id: Mapped[big_int] = mapped_column(ForeignKey("planet.planet_id"), nullable=False, index=True)
 
     r_planet: Mapped["Planet"] = relationship(back_populates="r_starships")
     r_manifests: Mapped[list["Manifest"]] = relationship(
@@ -101,13 +131,133 @@ class Manifest(BaseModel):
             "quantity >= 0",
             name="ck_manifest_quantity_non_negative",
         ),
+        # Supplier searches walk one cargo type's stocked manifests from the largest quantity down and stop once they
+        # have enough ships, without visiting the empty rows.
+        Index(
+            "ix_manifest_cargo_supply",
+            "cargo_type_id",
+            text("quantity DESC"),
+            "starship_id",
+            postgresql_where=text("quantity > 0"),
+        ),
+        # Each partition holds its own slice of the unique index, so upserts and vacuum work on small trees.
+        {"postgresql_partition_by": "HASH (starship_id)"},
     )
 
-    manifest_id: Mapped[big_int_pk]
+    # A partitioned table's unique constraints must include the partition key.
+    manifest_id: Mapped[int] = mapped_column(BigInteger, primary_key=True, autoincrement=True)
     quantity: Mapped[big_int] = mapped_column(nullable=False, default=0)
 
-    starship_id: Mapped[big_int] = mapped_column(ForeignKey("starship.starship_id"), nullable=False)
-    cargo_type_id: Mapped[big_int] = mapped_column(ForeignKey("cargo_type.cargo_type_id"), nullable=False)
+    starship_id: Mapped[big_int] = mapped_column(ForeignKey("starship.starship_id"), primary_key=True)
+    cargo_type_id: Mapped[big_int] = mapped_column(ForeignKey("cargo_type.cargo_type_id"), nullable=False, index=True)
 
     r_starship: Mapped["StarShip"] = relationship(back_populates="r_manifests")
     r_cargo_type: Mapped["CargoType"] = relationship(back_populates="r_manifests")
+
+
+class PlanetInventory(BaseModel):
+    """Total quantity of each cargo type on a planet's starships, kept current by every manifest write and move."""
+
+    __tablename__ = "planet_inventory"
+
+    planet_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("planet.planet_id"), primary_key=True)
+    cargo_type_id: Mapped[big_int] = mapped_column(ForeignKey("cargo_type.cargo_type_id"), primary_key=True, index=True)
+    quantity: Mapped[big_int] = mapped_column(nullable=False, default=0)
+
+
+class SectorInventory(BaseModel):
+    """Total quantity of each cargo type across a sector's planets, kept current alongside ``PlanetInventory``."""
+
+    __tablename__ = "sector_inventory"
+
+    sector_id: Mapped[int] = mapped_column(BigInteger, ForeignKey("sector.sector_id"), primary_key=True)
+    cargo_type_id: Mapped[big_int] = mapped_column(ForeignKey("cargo_type.cargo_type_id"), primary_key=True, index=True)
+    quantity: Mapped[big_int] = mapped_column(nullable=False, default=0)
+
+
+class ChangeEvent(BaseModel):
+    """
+    An outbox row written in the same transaction as the starship move or manifest change it describes.
+
+    ``change_type`` holds a ``ChangeType`` value. A move sets ``from_planet_id`` and ``planet_id``, while a manifest change
+    sets ``cargo_type_id`` and the ``quantity`` added. Readers page on ``(transaction_id, change_event_id)`` and only read
+    transactions older than every one still running, so an event whose transaction commits late cannot be skipped.
+    """
+
+    __tablename__ = "change_event"
+    __table_args__ = (Index("ix_change_event_cursor", "transaction_id", "change_event_id"),)
+
+    change_event_id: Mapped[big_int_pk]
+    transaction_id: Mapped[big_int] = mapped_column(server_default=text("pg_current_xact_id()::text::bigint"), nullable=False)
+    change_type: Mapped[int] = mapped_column(SmallInteger, nullable=False)
+    starship_id: Mapped[big_int] = mapped_column(nullable=False)
+    planet_id: Mapped[big_int | None]
+    from_planet_id: Mapped[big_int | None]
+    cargo_type_id: Mapped[big_int | None]
+    quantity: Mapped[big_int | None]
+
+
+# One notification per writing statement wakes the change watchers; Postgres delivers it when the transaction commits.
+for ddl in (
+    f"""
+    CREATE OR REPLACE FUNCTION %(schema)s.notify_change_event() RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_notify('{CHANGE_EVENT_CHANNEL}', '');
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    "CREATE TRIGGER change_event_notify AFTER INSERT ON %(fullname)s FOR EACH STATEMENT EXECUTE FUNCTION %(schema)s.notify_change_event()",
+):
+    event.listen(ChangeEvent.__table__, "after_create", DDL(ddl))
+
+
+class Job(BaseModel):
+    """
+    A bulk write accepted by a submit RPC and worked through in the background, ``completed_items`` at a time.
+
+    ``job_type`` and ``state`` hold ``JobType`` and ``JobState`` values, and ``payload`` the submitted request, which is
+    dropped once the job finishes. A worker holds a running job until ``lease_expires``; each claim increments
+    ``attempts``, which also fences out a worker whose lease has lapsed. ``outcome`` is the finished job's
+    ``ResponseMessage``, and ``result_ids`` collects a cargo type job's ids in submission order.
+    """
+
+    __tablename__ = "job"
+    # Workers claim the oldest queued or running job, and finished jobs drop out of the index.
+    __table_args__ = (Index("ix_job_pending", "job_id", postgresql_where=text("state IN (1, 2)")),)
+
+    job_id: Mapped[big_int_pk]
+    job_type: Mapped[int] = mapped_column(SmallInteger, nullable=False)
+    state: Mapped[int] = mapped_column(SmallInteger, nullable=False)
+    payload: Mapped[bytes | None] = mapped_column(LargeBinary)
+    total_items: Mapped[big_int] = mapped_column(nullable=False)
+    completed_items: Mapped[big_int] = mapped_column(nullable=False, server_default=text("0"))
+    result_ids: Mapped[list[int]] = mapped_column(ARRAY(BigInteger), nullable=False, server_default=text("'{}'"))
+    outcome: Mapped[bytes | None] = mapped_column(LargeBinary)
+    attempts: Mapped[int] = mapped_column(SmallInteger, nullable=False, server_default=text("0"))
+    lease_expires: Mapped[datetime | None]
+    date_started: Mapped[datetime | None]
+    date_finished: Mapped[datetime | None]
+
+
+# Submitting a job wakes an idle worker in every process instead of leaving it to the next poll.
+for ddl in (
+    f"""
+    CREATE OR REPLACE FUNCTION %(schema)s.notify_job_submitted() RETURNS trigger AS $$
+    BEGIN
+        PERFORM pg_notify('{JOB_CHANNEL}', '');
+        RETURN NULL;
+    END;
+    $$ LANGUAGE plpgsql
+    """,
+    "CREATE TRIGGER job_submitted_notify AFTER INSERT ON %(fullname)s FOR EACH STATEMENT EXECUTE FUNCTION %(schema)s.notify_job_submitted()",
+):
+    event.listen(Job.__table__, "after_create", DDL(ddl))
+
+
+for remainder in range(MANIFEST_PARTITIONS):
+    event.listen(
+        Manifest.__table__,
+        "after_create",
+        DDL(f"CREATE TABLE %(fullname)s_p{remainder} PARTITION OF %(fullname)s FOR VALUES WITH (MODULUS {MANIFEST_PARTITIONS}, REMAINDER {remainder})"),
+    )
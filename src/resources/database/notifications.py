@@ -0,0 +1,71 @@
+import asyncio
+import logging
+from collections import defaultdict
+from typing import Awaitable, Callable, Optional
+
+import psycopg
+from sqlalchemy.engine import URL, make_url
+
+logger = logging.getLogger(__name__)
+
+NotificationCallback = Callable[[Optional[str]], Awaitable[None] | None]
+
+
+def libpq_url(connection_string: str | URL) -> str:
+    """Turn a SQLAlchemy ``postgresql+psycopg://`` URL into one psycopg can connect with directly."""
+    return make_url(connection_string).set(drivername="postgresql").render_as_string(hide_password=False)
+
+
+class NotificationListener:
+    """
+    Holds one dedicated connection per worker that LISTENs on Postgres channels and fans payloads out to callbacks.
+
+    The connection sits outside the engine's pool. Whenever it (re)connects, every callback is called with ``None``,
+    because notifications sent while disconnected are lost and subscribers must assume their state is stale.
+    """
+
+    def __init__(self, connection_string: str | URL, reconnect_delay: float = 1.0):
+        self._url = libpq_url(connection_string)
+        self._reconnect_delay = reconnect_delay
+        self._callbacks: dict[str, list[NotificationCallback]] = defaultdict(list)
+        self._task: Optional[asyncio.Task] = None
+        self.connected = asyncio.Event()
+
+    def subscribe(self, channel: str, callback: NotificationCallback) -> None:
+        self._callbacks[channel].append(callback)
+
+    def start(self) -> None:
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _dispatch(self, channel: str, payload: Optional[str]) -> None:
+        for callback in self._callbacks.get(channel, ()):
+            try:
+                result = callback(payload)
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception:
+                logger.exception("Notification callback for %s failed", channel)
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                async with await psycopg.AsyncConnection.connect(self._url, autocommit=True) as connection:
+                    for channel in self._callbacks:
+                        await connection.execute(f'LISTEN "{channel}"')
+                    for channel in self._callbacks:
+                        await self._dispatch(channel, None)
+                    self.connected.set()
+
+                    async for notification in connection.notifies():
+                        await self._dispatch(notification.channel, notification.payload)
+            except psycopg.OperationalError:
+                logger.warning("Notification listener lost its connection, reconnecting in %ss", self._reconnect_delay)
+            finally:
+                self.connected.clear()
+            await asyncio.sleep(self._reconnect_delay)
@@ -1,12 +1,169 @@
+from collections import defaultdict
 from typing import Optional, Sequence
 
-from sqlalchemy import select, insert, literal
-from sqlalchemy.dialects.postgresql import insert as pg_insert
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import select, insert, update, func, Table, MetaData, Column, BigInteger, String, bindparam, any_
+from sqlalchemy.dialects.postgresql import ARRAY, insert as pg_insert
+from sqlalchemy.schema import CreateTable
+from sqlalchemy.sql.elements import BindParameter
 from sqlalchemy.ext.asyncio import AsyncSession
 
 import src.resources.database.models as models
 import src.generated.co.za.planet as proto
+from src.resources.database.change_queries import record_manifest_changes
+from src.resources.database.inventory_queries import add_manifest_inventory
+
+manifest_staging = Table(
+    "manifest_staging",
+    MetaData(),
+    Column("starship_id", BigInteger, nullable=False),
+    Column("cargo_type_id", BigInteger, nullable=False),
+    Column("quantity", BigInteger, nullable=False),
+    prefixes=["TEMPORARY"],
+    postgresql_on_commit="DELETE ROWS",
+)
+
+# Statements are built once and take their rows as arrays through unnest(), so every batch size shares one compiled
+# form in SQLAlchemy's cache and one server-side prepared statement per connection. The ORM reads a parameter dict
+# passed with an insert() as rows for a bulk INSERT, so inserts returning entities are wrapped in from_statement().
+
+
+def _array(name: str, item_type) -> BindParameter:
+    return bindparam(name, type_=ARRAY(item_type))
+
+
+def _returning(entity, stmt):
+    return select(entity).from_statement(stmt.returning(entity))
+
+
+create_planet_stmt = _returning(
+    models.Planet,
+    insert(models.Planet).from_select(
+        ["name", "sector_id"],
+        select(bindparam("planet_name", type_=String), models.Sector.sector_id).where(models.Sector.sector_id == bindparam("sector_id")),
+    ),
+)
+
+set_scarce_cargo_type_stmt = (
+    update(models.Planet)
+    .where(models.Planet.planet_id == bindparam("target_planet_id"))
+    .values(scarce_cargo_type_id=bindparam("cargo_type_id", type_=BigInteger))
+    .returning(models.Planet.planet_id)
+)
+
+# FOR KEY SHARE only holds off deletes, so batches that reference the same sectors or planets do not queue on them.
+lock_sectors_stmt = (
+    select(models.Sector.sector_id).where(models.Sector.sector_id == any_(_array("sector_ids", BigInteger))).with_for_update(read=True, key_share=True)
+)
+
+_planet_rows = func.unnest(_array("names", String), _array("sector_ids", BigInteger)).table_valued("name", "sector_id").render_derived()
+bulk_create_planets_stmt = _returning(
+    models.Planet,
+    (
+        pg_insert(models.Planet)
+        .from_select(["name", "sector_id"], select(_planet_rows.c.name, _planet_rows.c.sector_id))
+        .on_conflict_do_nothing(index_elements=[models.Planet.name])
+    ),
+)
+
+select_sector_stmt = select(models.Sector).where(models.Sector.name == bindparam("sector_name"))
+
+insert_sector_stmt = _returning(
+    models.Sector,
+    (
+        pg_insert(models.Sector)
+        .values(name=bindparam("sector_name"))
+        .on_conflict_do_nothing(
+            index_elements=[models.Sector.name],
+        )
+    ),
+)
+
+_requested_cargo_types = select(func.unnest(_array("names", String)).table_valued("name", with_ordinality="position").render_derived()).cte("requested")
+# Inserting in name order means concurrent batches that share names take their index locks in the same order.
+_inserted_cargo_types = (
+    pg_insert(models.CargoType)
+    .from_select(["name"], select(_requested_cargo_types.c.name).order_by(_requested_cargo_types.c.name))
+    .on_conflict_do_nothing(index_elements=[models.CargoType.name])
+    .returning(models.CargoType.cargo_type_id, models.CargoType.name)
+    .cte("inserted")
+)
+resolve_cargo_types_stmt = (
+    select(func.coalesce(_inserted_cargo_types.c.cargo_type_id, models.CargoType.cargo_type_id))
+    .select_from(
+        _requested_cargo_types.outerjoin(_inserted_cargo_types, _inserted_cargo_types.c.name == _requested_cargo_types.c.name).outerjoin(
+            models.CargoType, models.CargoType.name == _requested_cargo_types.c.name
+        )
+    )
+    .order_by(_requested_cargo_types.c.position)
+)
+
+select_cargo_types_stmt = select(models.CargoType.name, models.CargoType.cargo_type_id).where(models.CargoType.name == any_(_array("names", String)))
+
+create_starship_stmt = _returning(
+    models.StarShip,
+    insert(models.StarShip).from_select(
+        ["name", "model", "planet_id"],
+        select(
+            bindparam("starship_name", type_=String),
+            bindparam("starship_model", type_=String),
+            models.Planet.planet_id,
+        ).where(models.Planet.planet_id == bindparam("planet_id")),
+    ),
+)
+
+# Held FOR KEY SHARE, like the sectors above.
+lock_planets_stmt = (
+    select(models.Planet.planet_id).where(models.Planet.planet_id == any_(_array("planet_ids", BigInteger))).with_for_update(read=True, key_share=True)
+)
+
+_starship_rows = (
+    func.unnest(_array("names", String), _array("models", String), _array("planet_ids", BigInteger))
+    .table_valued("name", "model", "planet_id", with_ordinality="ordinality")
+    .render_derived()
+)
+bulk_create_starships_stmt = _returning(
+    models.StarShip,
+    insert(models.StarShip).from_select(
+        ["name", "model", "planet_id"],
+        select(_starship_rows.c.name, _starship_rows.c.model, _starship_rows.c.planet_id).order_by(_starship_rows.c.ordinality),
+    ),
+)
+
+_manifest_rows = (
+    func.unnest(
+        _array("starship_ids", BigInteger),
+        _array("cargo_type_ids", BigInteger),
+        _array("quantities", BigInteger),
+    )
+    .table_valued("starship_id", "cargo_type_id", "quantity", with_ordinality="ordinality")
+    .render_derived()
+)
+_insert_manifests = pg_insert(models.Manifest).from_select(
+    ["starship_id", "cargo_type_id", "quantity"],
+    select(_manifest_rows.c.starship_id, _manifest_rows.c.cargo_type_id, _manifest_rows.c.quantity).order_by(_manifest_rows.c.ordinality),
+)
+_upsert_manifests = _insert_manifests.on_conflict_do_update(
+    constraint="uq_manifest_starship_cargo",
+    set_={"quantity": models.Manifest.quantity + _insert_manifests.excluded.quantity},
+)
+bulk_create_manifest_stmt = _returning(models.Manifest, _upsert_manifests)
+
+create_manifest_staging_stmt = CreateTable(manifest_staging, if_not_exists=True)
+
+_staged_manifests = (
+    select(
+        manifest_staging.c.starship_id,
+        manifest_staging.c.cargo_type_id,
+        func.sum(manifest_staging.c.quantity),
+    )
+    .group_by(manifest_staging.c.starship_id, manifest_staging.c.cargo_type_id)
+    .order_by(manifest_staging.c.starship_id, manifest_staging.c.cargo_type_id)
+)
+_merge_manifests = pg_insert(models.Manifest).from_select(["starship_id", "cargo_type_id", "quantity"], _staged_manifests)
+merge_manifest_staging_stmt = _merge_manifests.on_conflict_do_update(
+    constraint="uq_manifest_starship_cargo",
+    set_={"quantity": models.Manifest.quantity + _merge_manifests.excluded.quantity},
+).execution_options(preserve_rowcount=True)
 
 
 async def create_planet_db(
@@ -14,61 +171,78 @@ async def create_planet_db(
     planet_name: str,
     sector_id: int,
 ) -> Optional[models.Planet]:
+    return await session.scalar(create_planet_stmt, {"planet_name": planet_name, "sector_id": sector_id})
 
-    select_stmt = select(
-        literal(planet_name).label("name"),
-        models.Sector.sector_id.label("sector_id"),
-    ).where(models.Sector.sector_id == sector_id)
 
-    insert_stmt = (
-        insert(models.Planet)
-        .from_select(
-            ["name", "sector_id"],
-            select_stmt,
-        )
-        .returning(models.Planet)
-    )
+async def set_scarce_cargo_type_db(session: AsyncSession, planet_id: int, cargo_type_id: Optional[int]) -> Optional[int]:
+    """Set or, with ``None``, clear a planet's scarce cargo type, returning None when the planet does not exist."""
+    return await session.scalar(set_scarce_cargo_type_stmt, {"target_planet_id": planet_id, "cargo_type_id": cargo_type_id})
 
-    result = await session.scalar(insert_stmt)
-    await session.commit()
-    return result
+
+async def bulk_create_planets_db(
+    session: AsyncSession,
+    planets: list[tuple[str, int]],
+) -> list[Optional[models.Planet]]:
+    """
+    Insert ``(planet_name, sector_id)`` pairs in one statement, returning one planet per pair in order.
+
+    A pair comes back as ``None`` when its sector does not exist or its name is already taken, including by an earlier
+    pair in the same batch.
+    """
+    existing_sectors = set(await session.scalars(lock_sectors_stmt, {"sector_ids": list({sector_id for _, sector_id in planets})}))
+
+    rows = [(name, sector_id) for name, sector_id in planets if sector_id in existing_sectors]
+
+    created = {}
+    if rows:
+        names, sector_ids = zip(*rows)
+        created = {planet.name: planet for planet in await session.scalars(bulk_create_planets_stmt, {"names": list(names), "sector_ids": list(sector_ids)})}
+
+    return [created.pop(name, None) if sector_id in existing_sectors else None for name, sector_id in planets]
 
 
 async def get_or_create_sector_db(
     session: AsyncSession,
     sector_name: str,
 ) -> models.Sector:
+    """
+    Resolve a sector by name, creating it only if it does not exist yet.
 
-    insert_sector = (
-        pg_insert(models.Sector)
-        .values(name=sector_name)
-        .on_conflict_do_update(
-            index_elements=[models.Sector.name],
-            set_={"name": sector_name},
-        )
-        .returning(models.Sector)
-    )
+    Existing sectors are served by a plain indexed SELECT, so the common case writes nothing and takes no row locks.
+    When the INSERT loses a race with a concurrent create, ``DO NOTHING`` returns no row and the re-select picks up
+    the winner's committed row.
+    """
+    parameters = {"sector_name": sector_name}
+
+    sector = await session.scalar(select_sector_stmt, parameters)
+    if sector is None:
+        sector = await session.scalar(insert_sector_stmt, parameters)
+
+    if sector is None:
+        sector = await session.scalar(select_sector_stmt, parameters)
 
-    result = await session.execute(insert_sector)
-    await session.commit()
-    return result.scalar_one()
+    return sector
 
 
-async def bulk_create_cargo_type(
+async def bulk_get_or_create_cargo_types_db(
     session: AsyncSession,
     cargo_names: list[str],
-) -> Sequence[models.CargoType]:
-    names_to_insert = [{"name": name} for name in cargo_names]
+) -> list[int]:
+    """
+    Resolve cargo type names to ids in one statement, creating the ones that do not exist yet.
 
-    insert_stmt = pg_insert(models.CargoType).values(names_to_insert)
+    Returns one id per name, in order, whether the cargo type is new or not. Names are deduplicated before they are
+    sent as a single array, so the batch size is not bound by the parameter limit. A name committed by a concurrent
+    transaction while the statement runs is invisible to its snapshot, so it is re-selected afterwards.
+    """
+    names = list(dict.fromkeys(cargo_names))
+    cargo_type_ids = dict(zip(names, await session.scalars(resolve_cargo_types_stmt, {"names": names})))
 
-    upsert_stmt = insert_stmt.on_conflict_do_nothing(
-        index_elements=[models.CargoType.name],
-    ).returning(models.CargoType)
+    missing = [name for name, cargo_type_id in cargo_type_ids.items() if cargo_type_id is None]
+    if missing:
+        cargo_type_ids.update((await session.execute(select_cargo_types_stmt, {"names": missing})).all())
 
-    result = await session.execute(upsert_stmt)
-    await session.commit()
-    return result.scalars().all()
+    return [cargo_type_ids[name] for name in cargo_names]
 
 
 async def create_starship_db(
@@ -77,55 +251,100 @@ async def create_starship_db(
     starship_model: str,
     planet_id: int,
 ) -> Optional[models.StarShip]:
-    select_stmt = select(
-        literal(starship_name).label("name"),
-        literal(starship_model).label("model"),
-        models.Planet.planet_id.label("planet_id"),
-    ).where(models.Planet.planet_id == planet_id)
-
-    insert_stmt = (
-        insert(models.StarShip)
-        .from_select(
-            ["name", "model", "planet_id"],
-            select_stmt,
+    parameters = {"starship_name": starship_name, "starship_model": starship_model, "planet_id": planet_id}
+    return await session.scalar(create_starship_stmt, parameters)
+
+
+async def bulk_create_starships_db(
+    session: AsyncSession,
+    starships: list[tuple[str, str, int]],
+) -> list[Optional[models.StarShip]]:
+    """
+    Insert ``(starship_name, starship_model, planet_id)`` tuples in one statement, returning one starship per tuple in
+    order, or ``None`` where the planet does not exist.
+
+    Rows are inserted in input order, so their identity values ascend in that order too.
+    """
+    existing_planets = set(await session.scalars(lock_planets_stmt, {"planet_ids": list({planet_id for _, _, planet_id in starships})}))
+
+    rows = [starship for starship in starships if starship[2] in existing_planets]
+
+    created = iter(())
+    if rows:
+        names, starship_models, planet_ids = zip(*rows)
+        result = await session.scalars(
+            bulk_create_starships_stmt,
+            {"names": list(names), "models": list(starship_models), "planet_ids": list(planet_ids)},
         )
-        .returning(models.StarShip)
-    )
+        created = iter(sorted(result.all(), key=lambda starship: starship.starship_id))
+
+    return [next(created) if planet_id in existing_planets else None for _, _, planet_id in starships]
 
-    result = await session.execute(insert_stmt)
-    await session.commit()
-    return result.scalar_one_or_none()
+
+def _aggregate_manifests(manifests: list[proto.ManifestObject]) -> list[tuple[int, int, int]]:
+    """
+    Sum the quantities of manifests that share a ``(starship_id, cargo_type_id)`` key, returning one
+    ``(starship_id, cargo_type_id, quantity)`` row per distinct key, sorted by key.
+
+    Producers send batches unaggregated, so a batch often repeats a handful of keys many times over; only the distinct
+    keys are sent on to Postgres.
+    """
+    quantities = defaultdict(int)
+    for m in manifests:
+        quantities[m.starship_id, m.cargo_type_id] += m.quantity
+    return [(starship_id, cargo_type_id, quantity) for (starship_id, cargo_type_id), quantity in sorted(quantities.items())]
 
 
 async def bulk_create_manifest(
     session: AsyncSession,
     manifests: list[proto.ManifestObject],
 ) -> Sequence[models.Manifest]:
+    """
+    Add each manifest's quantity to its ``(starship_id, cargo_type_id)`` row, creating the rows that do not exist yet.
 
-    values = [
-        {
-            "starship_id": m.starship_id,
-            "cargo_type_id": m.cargo_type_id,
-            "quantity": m.quantity,
-        }
-        for m in manifests
-    ]
-
-    if not values:
+    Quantities for the same key are summed first, since one upsert cannot touch a row twice, and the keys are written
+    in sorted order. Every caller therefore locks rows in the same order, and overlapping batches wait on each other
+    instead of deadlocking. Returns one manifest per distinct key, in that order.
+    """
+    if not manifests:
         return []
 
-    insert_stmt = pg_insert(models.Manifest).values(values)
+    rows = _aggregate_manifests(manifests)
+    starship_ids, cargo_type_ids, quantities = zip(*rows)
+    parameters = {"starship_ids": list(starship_ids), "cargo_type_ids": list(cargo_type_ids), "quantities": list(quantities)}
 
-    upsert_stmt = insert_stmt.on_conflict_do_update(
-        constraint="uq_manifest_starship_cargo",
-        set_={"quantity": models.Manifest.quantity + insert_stmt.excluded.quantity},
-    ).returning(models.Manifest)
+    result = (await session.scalars(bulk_create_manifest_stmt, parameters)).all()
+    await add_manifest_inventory(session, rows)
+    await record_manifest_changes(session, rows)
+    return result
 
-    try:
-        result = await session.execute(upsert_stmt)
-        await session.commit()
-    except IntegrityError:
-        await session.rollback()
-        return []
 
-    return result.scalars().all()
+async def copy_manifest_chunk(
+    session: AsyncSession,
+    manifests: list[proto.ManifestObject],
+) -> int:
+    """
+    COPY a chunk of manifests into a per-connection staging table and merge it into ``manifest``.
+
+    Duplicate keys within the chunk are summed before they are copied, so quantities accumulate exactly as they do in
+    ``bulk_create_manifest``. Returns the number of manifest rows written; an unknown starship or cargo type raises
+    ``IntegrityError``. The staging table empties itself when the transaction commits.
+    """
+    if not manifests:
+        return 0
+
+    rows = _aggregate_manifests(manifests)
+    await session.execute(create_manifest_staging_stmt)
+
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    async with raw_connection.driver_connection.cursor() as cursor:
+        async with cursor.copy("COPY manifest_staging (starship_id, cargo_type_id, quantity) FROM STDIN (FORMAT BINARY)") as copy:
+            copy.set_types(["int8", "int8", "int8"])
+            for row in rows:
+                await copy.write_row(row)
+
+    result = await session.execute(merge_manifest_staging_stmt)
+    await add_manifest_inventory(session, rows)
+    await record_manifest_changes(session, rows)
+    return result.rowcount
@@ -1,22 +1,288 @@
+from itertools import islice
+from typing import AsyncIterator, Optional, Sequence
+
+from sqlalchemy import select, update, union_all, literal_column, true, false, Row, func, bindparam, any_, exists, BigInteger
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.orm.sync import update
+from sqlalchemy.orm import aliased
 
 import src.resources.database.models as models
+import src.generated.co.za.planet as proto
+from src.resources.database.change_queries import record_moves
+from src.resources.database.inventory_queries import move_inventory
 
+MOVE_CHUNK_SIZE = 5000
 
-async def move_starship_to_planet(session: AsyncSession, starship_id: int, planet_id: int) -> models.StarShip:
-    stmt = (
-        update(models.StarShip)
+# Built once and fed arrays, so every chunk size shares one compiled form and one prepared statement.
+move_starship_stmt = (
+    update(models.StarShip)
+    .where(
+        models.StarShip.starship_id == bindparam("moved_starship_id"),
+        models.StarShip.planet_id != bindparam("destination_planet_id"),
+    )
+    .values(planet_id=bindparam("destination_planet_id"))
+    .returning(models.StarShip)
+)
+
+# FOR KEY SHARE only holds off deletes, so moves to the same planet neither queue nor deadlock on its row.
+lock_planets_stmt = (
+    select(models.Planet.planet_id)
+    .where(models.Planet.planet_id == any_(bindparam("planet_ids", type_=ARRAY(BigInteger))))
+    .with_for_update(read=True, key_share=True)
+)
+
+_moves = (
+    func.unnest(bindparam("starship_ids", type_=ARRAY(BigInteger)), bindparam("planet_ids", type_=ARRAY(BigInteger)))
+    .table_valued("starship_id", "planet_id", name="moves")
+    .render_derived()
+)
+bulk_move_starships_stmt = (
+    update(models.StarShip)
+    .where(
+        models.StarShip.starship_id == _moves.c.starship_id,
+        models.StarShip.planet_id != _moves.c.planet_id,
+    )
+    .values(planet_id=_moves.c.planet_id)
+    .returning(models.StarShip.starship_id)
+    .execution_options(synchronize_session=False)
+)
+
+# Moving ships are locked in id order before they are updated, which also reads the planets they are leaving.
+lock_starships_stmt = (
+    select(models.StarShip.starship_id, models.StarShip.planet_id)
+    .where(models.StarShip.starship_id == any_(bindparam("starship_ids", type_=ARRAY(BigInteger))))
+    .order_by(models.StarShip.starship_id)
+    .with_for_update(key_share=True)
+)
+
+# An empty list stream checks whether what it listed exists, so it can answer NOT_FOUND instead of an empty page.
+sector_exists_stmt = select(exists().where(models.Sector.sector_id == bindparam("sector_id")))
+planet_exists_stmt = select(exists().where(models.Planet.planet_id == bindparam("planet_id")))
+
+planet_inventory_stmt = (
+    select(models.PlanetInventory.cargo_type_id, models.PlanetInventory.quantity)
+    .where(models.PlanetInventory.planet_id == bindparam("planet_id"), models.PlanetInventory.quantity != 0)
+    .order_by(models.PlanetInventory.cargo_type_id)
+)
+
+sector_inventory_stmt = (
+    select(models.SectorInventory.cargo_type_id, models.SectorInventory.quantity)
+    .where(models.SectorInventory.sector_id == bindparam("sector_id"), models.SectorInventory.quantity != 0)
+    .order_by(models.SectorInventory.cargo_type_id)
+)
+
+# Suppliers of a planet's scarce cargo are ships elsewhere whose manifests hold it. The best of those in the planet's own
+# sector and the best of the rest are each read from ix_manifest_cargo_supply in quantity order, so neither search goes
+# further than the limit, and then merged with same-sector ships first.
+_target = aliased(models.Planet, name="target")
+
+
+def _suppliers(same_sector: bool):
+    docked_at = aliased(models.Planet, name="docked_at")
+    sector_match = docked_at.sector_id == _target.sector_id if same_sector else docked_at.sector_id != _target.sector_id
+    return (
+        select(
+            models.Manifest.starship_id,
+            models.StarShip.planet_id.label("supplier_planet_id"),
+            models.Manifest.quantity,
+            (true() if same_sector else false()).label("same_sector"),
+        )
+        .join_from(models.Manifest, models.StarShip, models.StarShip.starship_id == models.Manifest.starship_id)
+        .join(docked_at, docked_at.planet_id == models.StarShip.planet_id)
         .where(
-            models.StarShip.starship_id == starship_id,
-            models.StarShip.planet_id != planet_id,
+            models.Manifest.cargo_type_id == _target.scarce_cargo_type_id,
+            # A literal rather than a bind, so a generic plan can still tell the partial index applies.
+            models.Manifest.quantity > literal_column("0"),
+            models.StarShip.planet_id != _target.planet_id,
+            sector_match,
         )
-        .values(planet_id=planet_id)
-        .returning(models.StarShip)
+        .order_by(models.Manifest.quantity.desc(), models.Manifest.starship_id)
+        .limit(bindparam("supplier_limit"))
+        .correlate(_target)
     )
 
-    result = await session.execute(stmt)
+
+_candidates = union_all(_suppliers(True), _suppliers(False)).subquery("candidates")
+_supplier_rank = (_candidates.c.same_sector.desc(), _candidates.c.quantity.desc(), _candidates.c.starship_id)
+_ranked_suppliers = select(_candidates).order_by(*_supplier_rank).limit(bindparam("supplier_limit")).lateral("suppliers")
+
+# A planet without suppliers still returns one row, with the supplier columns null.
+_planet_suppliers = select(
+    _target.planet_id,
+    _target.scarce_cargo_type_id,
+    _ranked_suppliers.c.starship_id,
+    _ranked_suppliers.c.supplier_planet_id,
+    _ranked_suppliers.c.quantity,
+    _ranked_suppliers.c.same_sector,
+).outerjoin_from(_target, _ranked_suppliers, true())
+_supplier_order = (_ranked_suppliers.c.same_sector.desc(), _ranked_suppliers.c.quantity.desc(), _ranked_suppliers.c.starship_id)
+
+find_suppliers_stmt = _planet_suppliers.where(_target.planet_id == bindparam("planet_id")).order_by(*_supplier_order)
+
+scarce_planet_suppliers_stmt = _planet_suppliers.where(
+    _target.scarce_cargo_type_id.is_not(None),
+    _target.planet_id > bindparam("after_planet_id"),
+).order_by(_target.planet_id, *_supplier_order)
+
+
+async def move_starship_to_planet(session: AsyncSession, starship_id: int, planet_id: int) -> models.StarShip:
+    origins = dict((await session.execute(lock_starships_stmt, {"starship_ids": [starship_id]})).all())
+
+    result = await session.execute(move_starship_stmt, {"moved_starship_id": starship_id, "destination_planet_id": planet_id})
     starship = result.scalar_one_or_none()
-    if starship:
-        await session.commit()
+
+    if starship is not None:
+        moves = [(starship_id, origins[starship_id], planet_id)]
+        await move_inventory(session, moves)
+        await record_moves(session, moves)
     return starship
+
+
+async def bulk_move_starships(session: AsyncSession, moves: dict[int, int]) -> dict[int, proto.MoveOutcome]:
+    """
+    Move many starships, keyed ``starship_id -> planet_id``, with one UPDATE per chunk.
+
+    Destination planets are validated and locked against deletion in bulk first, then the ships are locked in id order,
+    which also reads which of them exist and where they are leaving from. Ships that were not moved are classified from
+    those two lookups, so the cost does not grow with round trips per ship. The moved ones carry their cargo across the
+    planet and sector inventories in one statement per chunk.
+    """
+    outcomes: dict[int, proto.MoveOutcome] = {}
+    items = iter(moves.items())
+
+    while chunk := dict(islice(items, MOVE_CHUNK_SIZE)):
+        existing_planets = set(await session.scalars(lock_planets_stmt, {"planet_ids": list(set(chunk.values()))}))
+        origins = dict((await session.execute(lock_starships_stmt, {"starship_ids": list(chunk)})).all())
+        valid_moves = [(starship_id, planet_id) for starship_id, planet_id in chunk.items() if planet_id in existing_planets]
+
+        moved = set()
+        if valid_moves:
+            starship_ids, planet_ids = zip(*valid_moves)
+            moved = set(await session.scalars(bulk_move_starships_stmt, {"starship_ids": list(starship_ids), "planet_ids": list(planet_ids)}))
+            moved_from = [(starship_id, origins[starship_id], chunk[starship_id]) for starship_id in sorted(moved)]
+            await move_inventory(session, moved_from)
+            await record_moves(session, moved_from)
+
+        for starship_id, planet_id in chunk.items():
+            if starship_id in moved:
+                outcomes[starship_id] = proto.MoveOutcome.MOVED
+            elif starship_id not in origins:
+                outcomes[starship_id] = proto.MoveOutcome.STARSHIP_NOT_FOUND
+            elif planet_id not in existing_planets:
+                outcomes[starship_id] = proto.MoveOutcome.PLANET_NOT_FOUND
+            else:
+                outcomes[starship_id] = proto.MoveOutcome.ALREADY_THERE
+
+    return outcomes
+
+
+async def stream_planets(
+    session: AsyncSession,
+    sector_id: int,
+    after_planet_id: int,
+    page_size: int,
+) -> AsyncIterator[Sequence[Row]]:
+    """
+    Yield the planets of a sector in ``planet_id`` order, one page at a time.
+
+    Pages are read from a server-side cursor, so only one page is held in memory. ``after_planet_id`` is the
+    keyset cursor a client resumes from.
+    """
+    stmt = (
+        select(
+            models.Planet.planet_id,
+            models.Planet.name,
+            models.Planet.sector_id,
+            models.Planet.scarce_cargo_type_id,
+        )
+        .where(
+            models.Planet.sector_id == sector_id,
+            models.Planet.planet_id > after_planet_id,
+        )
+        .order_by(models.Planet.planet_id)
+        .execution_options(yield_per=page_size)
+    )
+
+    result = await session.stream(stmt)
+    async for page in result.partitions():
+        yield page
+
+
+async def stream_starships(
+    session: AsyncSession,
+    after_starship_id: int,
+    page_size: int,
+    planet_id: Optional[int] = None,
+    sector_id: Optional[int] = None,
+) -> AsyncIterator[Sequence[Row]]:
+    """Yield the starships on a planet, or on any planet of a sector, in ``starship_id`` order."""
+    stmt = select(
+        models.StarShip.starship_id,
+        models.StarShip.name,
+        models.StarShip.model,
+        models.StarShip.planet_id,
+    ).where(models.StarShip.starship_id > after_starship_id)
+
+    if planet_id:
+        stmt = stmt.where(models.StarShip.planet_id == planet_id)
+    if sector_id:
+        stmt = stmt.join(models.Planet, models.Planet.planet_id == models.StarShip.planet_id).where(models.Planet.sector_id == sector_id)
+
+    stmt = stmt.order_by(models.StarShip.starship_id).execution_options(yield_per=page_size)
+
+    result = await session.stream(stmt)
+    async for page in result.partitions():
+        yield page
+
+
+async def sector_exists_db(session: AsyncSession, sector_id: int) -> bool:
+    return (await session.execute(sector_exists_stmt, {"sector_id": sector_id})).scalar_one()
+
+
+async def planet_exists_db(session: AsyncSession, planet_id: int) -> bool:
+    return (await session.execute(planet_exists_stmt, {"planet_id": planet_id})).scalar_one()
+
+
+async def get_planet_inventory_db(session: AsyncSession, planet_id: int) -> Sequence[Row]:
+    return (await session.execute(planet_inventory_stmt, {"planet_id": planet_id})).all()
+
+
+async def get_sector_inventory_db(session: AsyncSession, sector_id: int) -> Sequence[Row]:
+    return (await session.execute(sector_inventory_stmt, {"sector_id": sector_id})).all()
+
+
+async def find_suppliers_db(session: AsyncSession, planet_id: int, supplier_limit: int) -> Sequence[Row]:
+    """
+    Rank the ships that could supply a planet's scarce cargo: those in its sector first, then by quantity held.
+
+    Returns no rows when the planet does not exist, and one row with null supplier columns when nothing supplies it.
+    """
+    return (await session.execute(find_suppliers_stmt, {"planet_id": planet_id, "supplier_limit": supplier_limit})).all()
+
+
+async def stream_supplier_matches(
+    session: AsyncSession,
+    after_planet_id: int,
+    supplier_limit: int,
+    page_size: int,
+) -> AsyncIterator[list[list[Row]]]:
+    """
+    Yield the ranked suppliers of every planet with a scarce cargo type, in ``planet_id`` order.
+
+    One statement matches every planet, read from a server-side cursor. Each page holds ``page_size`` planets, and
+    each planet's rows are shaped as ``find_suppliers_db`` returns them.
+    """
+    stmt = scarce_planet_suppliers_stmt.execution_options(yield_per=page_size)
+    result = await session.stream(stmt, {"after_planet_id": after_planet_id, "supplier_limit": supplier_limit})
+
+    page: list[list[Row]] = []
+    async for row in result:
+        if not page or page[-1][0].planet_id != row.planet_id:
+            if len(page) == page_size:
+                yield page
+                page = []
+            page.append([])
+        page[-1].append(row)
+
+    if page:
+        yield page
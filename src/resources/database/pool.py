@@ -0,0 +1,206 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+
+from sqlalchemy import event
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from sqlalchemy.util import greenlet_spawn
+from sqlalchemy.util.queue import Empty
+
+from src.resources.instrumentation import current_rpc
+from src.resources.metrics import Gauge, Histogram
+
+logger = logging.getLogger(__name__)
+
+pool_checkout_wait = Histogram("planets_db_pool_checkout_wait_seconds", "Time to check a connection out of the pool, including opening a new one.")
+pool_size = Gauge("planets_db_pool_size", "Connections the pool keeps open when idle.")
+pool_checked_out = Gauge("planets_db_pool_checked_out", "Connections currently checked out of the pool.")
+pool_idle = Gauge("planets_db_pool_idle", "Open connections waiting in the pool.")
+pool_overflow = Gauge("planets_db_pool_overflow", "Checked-out connections beyond the pool size.")
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    An ``AsyncAdaptedQueuePool`` that times every checkout and can be resized while in use.
+
+    Checkout waits are recorded per process, per RPC and in a window that ``PoolMaintainer`` drains to size the pool.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.window_checkouts = 0
+        self.window_wait = 0.0
+        self.window_peak = 0
+        # Idle validation skips connections returned more recently than its interval.
+        event.listen(self, "checkin", _mark_checked_in)
+
+    def connect(self):
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            waited = time.perf_counter() - started
+            pool_checkout_wait.observe(waited)
+            self.window_checkouts += 1
+            self.window_wait += waited
+            self.window_peak = max(self.window_peak, self.checkedout())
+
+            rpc = current_rpc.get()
+            if rpc is not None:
+                rpc.pool_wait += waited
+
+    def take_window(self) -> tuple[int, float, int]:
+        """Return and reset the checkouts, total checkout wait and peak checked-out count since the last call."""
+        window = (self.window_checkouts, self.window_wait, max(self.window_peak, self.checkedout()))
+        self.window_checkouts, self.window_wait, self.window_peak = 0, 0.0, 0
+        return window
+
+    def resize(self, size: int) -> None:
+        """
+        Change how many connections the pool keeps, closing idle ones above the new size.
+
+        Must run in a greenlet, since closing a connection awaits the driver. ``max_overflow`` still applies on top.
+
+        QueuePool has no public way to resize, so this adjusts its private state. requirements.txt pins SQLAlchemy, and
+        tests/test_pool.py fails if these attributes change, so check both when upgrading.
+        """
+        with self._overflow_lock:
+            # _overflow counts open connections beyond the pool size, so it moves opposite to the size.
+            self._overflow -= size - self._pool.maxsize
+            self._pool.maxsize = size
+            # The asyncio.Queue behind the pool enforces its own bound.
+            self._pool._queue._maxsize = size
+
+        while self._pool.qsize() > size:
+            try:
+                record = self._pool.get(False)
+            except Empty:
+                break
+            try:
+                record.close()
+            finally:
+                self._dec_overflow()
+
+
+def _mark_checked_in(dbapi_connection, connection_record) -> None:
+    if connection_record is not None:
+        connection_record.info["checked_in_at"] = time.monotonic()
+
+
+def instrument_pool(engine: AsyncEngine) -> None:
+    """Report the engine's pool occupancy, following the pool that replaces it on dispose."""
+    sync_engine = engine.sync_engine
+    pool_size.set_function(lambda: {(): sync_engine.pool.size()})
+    pool_checked_out.set_function(lambda: {(): sync_engine.pool.checkedout()})
+    pool_idle.set_function(lambda: {(): sync_engine.pool.checkedin()})
+    pool_overflow.set_function(lambda: {(): max(sync_engine.pool.overflow(), 0)})
+
+
+class PoolMaintainer:
+    """
+    Background upkeep for an engine built on ``InstrumentedPool``.
+
+    Idle connections are pinged every ``validate_interval`` seconds instead of on every checkout, so a checkout costs no
+    extra round trip. A connection that dies between pings fails one statement, which invalidates the pool as usual.
+
+    Given ``min_size`` and ``max_size``, the pool is also resized every ``resize_interval`` seconds: it grows by
+    ``resize_step`` while the mean checkout wait exceeds ``target_wait``, and shrinks by ``resize_step`` once its peak
+    use has stayed below its size for ``shrink_after`` consecutive intervals.
+    """
+
+    def __init__(
+        self,
+        engine: AsyncEngine,
+        validate_interval: float = 30.0,
+        min_size: Optional[int] = None,
+        max_size: Optional[int] = None,
+        target_wait: float = 0.005,
+        resize_interval: float = 1.0,
+        resize_step: int = 2,
+        shrink_after: int = 30,
+    ):
+        self.engine = engine
+        self.validate_interval = validate_interval
+        self.min_size = min_size
+        self.max_size = max_size
+        self.target_wait = target_wait
+        self.resize_interval = resize_interval
+        self.resize_step = resize_step
+        self.shrink_after = shrink_after
+        self._quiet_intervals = 0
+        self._tasks: list[asyncio.Task] = []
+
+    @property
+    def pool(self) -> InstrumentedPool:
+        return self.engine.sync_engine.pool
+
+    def start(self) -> None:
+        if self.validate_interval:
+            self._tasks.append(asyncio.create_task(self._every(self.validate_interval, self.validate_idle)))
+        if self.min_size and self.max_size:
+            self._tasks.append(asyncio.create_task(self._every(self.resize_interval, self.adjust_size)))
+
+    async def stop(self) -> None:
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def _every(self, interval: float, job) -> None:
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await job()
+            except Exception:
+                logger.exception("Pool maintenance failed")
+
+    async def validate_idle(self) -> int:
+        """
+        Ping each idle connection not returned within the last interval; returns how many were pinged.
+
+        It stops once no idle connection is left, rather than opening or waiting for one, and while requests hold
+        connections it leaves one idle connection for them. A connection a request took in the meantime is checked by
+        that request's own statements.
+        """
+        pool = self.pool
+        pinged = 0
+        for _ in range(pool.checkedin()):
+            if pool.checkedin() <= (1 if pool.checkedout() else 0):
+                break
+            async with self.engine.connect() as connection:
+                if time.monotonic() - connection.info.get("checked_in_at", 0.0) < self.validate_interval:
+                    continue
+                pinged += 1
+                try:
+                    await connection.exec_driver_sql("SELECT 1")
+                except DBAPIError as exc:
+                    if not exc.connection_invalidated:
+                        raise
+                    logger.warning("Discarded a dead pooled connection: %s", exc.orig)
+        return pinged
+
+    async def adjust_size(self) -> int:
+        """Grow or shrink the pool by one step from the last window's waits; returns the resulting size."""
+        pool = self.pool
+        checkouts, waited, peak = pool.take_window()
+        size = pool.size()
+        target = size
+
+        if checkouts and waited / checkouts > self.target_wait:
+            self._quiet_intervals = 0
+            target = min(self.max_size, size + self.resize_step)
+        elif peak <= size - self.resize_step:
+            self._quiet_intervals += 1
+            if self._quiet_intervals >= self.shrink_after:
+                self._quiet_intervals = 0
+                target = max(self.min_size, size - self.resize_step)
+        else:
+            self._quiet_intervals = 0
+
+        if target != size:
+            logger.info("Resizing the connection pool from %s to %s", size, target)
+            await greenlet_spawn(pool.resize, target)
+        return target
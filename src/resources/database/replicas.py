@@ -0,0 +1,85 @@
+import asyncio
+import itertools
+import logging
+from typing import Sequence
+
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from src.resources.metrics import Gauge
+
+logger = logging.getLogger(__name__)
+
+replica_healthy = Gauge("planets_db_replica_healthy", "Whether a read replica is receiving reads (1) or skipped (0).", ("replica",))
+
+
+class ReplicaRouter:
+    """
+    Picks the engine read-only work runs on: the healthy replicas in turn, or the primary when none is healthy.
+
+    A replica is skipped once a read on it fails with a connection error, and every ``check_interval`` seconds each
+    replica is pinged to decide whether it receives reads again.
+    """
+
+    def __init__(self, primary: AsyncEngine, replicas: Sequence[AsyncEngine], check_interval: float = 5.0):
+        self.primary = primary
+        self.replicas = list(replicas)
+        self.check_interval = check_interval
+        self._healthy = {replica: True for replica in self.replicas}
+        self._turn = itertools.count()
+        self._task = None
+
+        replica_healthy.set_function(lambda: {(_label(replica),): float(healthy) for replica, healthy in self._healthy.items()})
+
+    def choose(self) -> AsyncEngine:
+        healthy = [replica for replica in self.replicas if self._healthy[replica]]
+        if not healthy:
+            return self.primary
+        return healthy[next(self._turn) % len(healthy)]
+
+    def mark_down(self, replica: AsyncEngine) -> None:
+        if self._healthy.get(replica):
+            logger.warning("Routing reads away from replica %s", _label(replica))
+            self._healthy[replica] = False
+
+    async def check(self) -> int:
+        """Ping every replica, updating which ones receive reads; returns how many are healthy."""
+        results = await asyncio.gather(*(self._ping(replica) for replica in self.replicas))
+        for replica, healthy in zip(self.replicas, results):
+            if healthy and not self._healthy[replica]:
+                logger.info("Routing reads to replica %s again", _label(replica))
+            elif not healthy:
+                self.mark_down(replica)
+            self._healthy[replica] = healthy
+        return sum(results)
+
+    async def _ping(self, replica: AsyncEngine) -> bool:
+        try:
+            async with asyncio.timeout(self.check_interval or None):
+                async with replica.connect() as connection:
+                    await connection.exec_driver_sql("SELECT 1")
+            return True
+        except (DBAPIError, OSError, TimeoutError):
+            return False
+
+    def start(self) -> None:
+        if self.replicas and self.check_interval:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            try:
+                await self.check()
+            except Exception:
+                logger.exception("Replica health check failed")
+
+
+def _label(engine: AsyncEngine) -> str:
+    return engine.url.render_as_string(hide_password=True)
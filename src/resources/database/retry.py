@@ -0,0 +1,53 @@
+import asyncio
+import random
+from typing import Awaitable, Callable, Optional, TypeVar
+
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.resources.database.config import unit_of_work
+from src.resources.metrics import Counter
+
+T = TypeVar("T")
+
+SERIALIZATION_FAILURE = "40001"
+DEADLOCK_DETECTED = "40P01"
+FOREIGN_KEY_VIOLATION = "23503"
+UNIQUE_VIOLATION = "23505"
+CHECK_VIOLATION = "23514"
+NUMERIC_VALUE_OUT_OF_RANGE = "22003"
+
+# Postgres rolls back the whole transaction for these, and running it again from the start usually succeeds.
+RETRYABLE_SQLSTATES = frozenset({SERIALIZATION_FAILURE, DEADLOCK_DETECTED})
+
+transaction_retries = Counter("planets_db_transaction_retries_total", "Transactions run again after a serialization failure or deadlock.", ("sqlstate",))
+
+
+def sqlstate(exc: BaseException) -> Optional[str]:
+    """The SQLSTATE Postgres reported for ``exc``, or None when it did not come from the server."""
+    return getattr(getattr(exc, "orig", None), "sqlstate", None)
+
+
+async def run_transaction(
+    work: Callable[[AsyncSession], Awaitable[T]],
+    attempts: int = 5,
+    base_delay: float = 0.005,
+    max_delay: float = 0.25,
+) -> T:
+    """
+    Run ``work`` in a ``unit_of_work``, starting over in a new transaction when it fails with a serialization failure
+    or deadlock.
+
+    Before each retry it sleeps a random time up to an exponentially growing cap, so transactions that collided do
+    not collide again in lockstep. Any other error, or the last attempt's, is raised.
+    """
+    for attempt in range(1, attempts + 1):
+        try:
+            async with unit_of_work() as session:
+                return await work(session)
+        except DBAPIError as exc:
+            state = sqlstate(exc)
+            if state not in RETRYABLE_SQLSTATES or attempt == attempts:
+                raise
+            transaction_retries.inc(sqlstate=state)
+            await asyncio.sleep(random.uniform(0, min(max_delay, base_delay * 2**attempt)))
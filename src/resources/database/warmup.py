@@ -0,0 +1,90 @@
+import asyncio
+import logging
+from contextlib import AsyncExitStack
+from datetime import timedelta
+from typing import Optional
+
+from sqlalchemy import BigInteger, event
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncEngine, AsyncSession
+
+import src.resources.database.change_queries as change_queries
+import src.resources.database.inventory_queries as inventory_queries
+import src.resources.database.job_queries as job_queries
+import src.resources.database.planets_admin_queries as admin_queries
+import src.resources.database.planets_user_queries as user_queries
+from src.resources.database.config import BigintArray
+
+logger = logging.getLogger(__name__)
+
+# Each prebuilt statement with parameters that match no rows, so warming writes nothing. insert_sector_stmt,
+# submit_job_stmt and claim_job_stmt have no such parameters and are left to compile on first use.
+WARMUP_STATEMENTS = (
+    (admin_queries.create_planet_stmt, {"planet_name": "", "sector_id": 0}),
+    (admin_queries.set_scarce_cargo_type_stmt, {"target_planet_id": 0, "cargo_type_id": None}),
+    (admin_queries.lock_sectors_stmt, {"sector_ids": []}),
+    (admin_queries.bulk_create_planets_stmt, {"names": [], "sector_ids": []}),
+    (admin_queries.select_sector_stmt, {"sector_name": ""}),
+    (admin_queries.resolve_cargo_types_stmt, {"names": []}),
+    (admin_queries.select_cargo_types_stmt, {"names": []}),
+    (admin_queries.create_starship_stmt, {"starship_name": "", "starship_model": "", "planet_id": 0}),
+    (admin_queries.lock_planets_stmt, {"planet_ids": []}),
+    (admin_queries.bulk_create_starships_stmt, {"names": [], "models": [], "planet_ids": []}),
+    (admin_queries.bulk_create_manifest_stmt, {"starship_ids": [], "cargo_type_ids": [], "quantities": []}),
+    (user_queries.move_starship_stmt, {"moved_starship_id": 0, "destination_planet_id": 0}),
+    (user_queries.lock_planets_stmt, {"planet_ids": []}),
+    (user_queries.bulk_move_starships_stmt, {"starship_ids": [], "planet_ids": []}),
+    (user_queries.lock_starships_stmt, {"starship_ids": []}),
+    (user_queries.planet_inventory_stmt, {"planet_id": 0}),
+    (user_queries.sector_inventory_stmt, {"sector_id": 0}),
+    (user_queries.find_suppliers_stmt, {"planet_id": 0, "supplier_limit": 0}),
+    (inventory_queries.add_manifest_inventory_stmt, {"starship_ids": [], "cargo_type_ids": [], "quantities": []}),
+    (inventory_queries.move_inventory_stmt, {"starship_ids": [], "from_planet_ids": [], "to_planet_ids": []}),
+    (change_queries.record_moves_stmt, {"starship_ids": [], "from_planet_ids": [], "to_planet_ids": []}),
+    (change_queries.record_manifest_changes_stmt, {"starship_ids": [], "cargo_type_ids": [], "quantities": []}),
+    (change_queries.changes_after_stmt, {"after_transaction_id": 0, "after_change_event_id": 0, "page_size": 0}),
+    (change_queries.held_back_changes_stmt, {"after_transaction_id": 0, "after_change_event_id": 0}),
+    (job_queries.advance_job_stmt, {"target_job_id": 0, "attempt": 0, "item_count": 0, "ids": [], "lease": timedelta()}),
+    (job_queries.finish_job_stmt, {"target_job_id": 0, "attempt": 0, "final_state": 0, "job_outcome": b""}),
+    (job_queries.release_job_stmt, {"target_job_id": 0, "attempt": 0}),
+    (job_queries.get_job_stmt, {"job_id": 0}),
+)
+
+
+def _type_empty_id_lists(conn, cursor, statement, parameters, context, executemany):
+    # psycopg sends an empty list untyped, while real calls send their ids as bigint[], and it prepares one statement per
+    # parameter type. The warm-up's empty id lists are typed so they prepare the statement real calls will use.
+    binds = context.compiled.binds
+    typed = {
+        name: BigintArray() if value == [] and isinstance(getattr(binds[name].type, "item_type", None), BigInteger) else value
+        for name, value in parameters.items()
+    }
+    return statement, typed
+
+
+async def _warm_connection(connection: AsyncConnection) -> None:
+    event.listen(connection.sync_connection, "before_cursor_execute", _type_empty_id_lists, retval=True)
+    try:
+        async with AsyncSession(bind=connection) as session:
+            for stmt, parameters in WARMUP_STATEMENTS:
+                await session.execute(stmt, parameters)
+            # psycopg forgets a connection's prepared statements when a transaction rolls back, so the no-op is committed.
+            await session.commit()
+    finally:
+        event.remove(connection.sync_connection, "before_cursor_execute", _type_empty_id_lists)
+
+
+async def warm_database(engine: AsyncEngine, connections: Optional[int] = None) -> int:
+    """
+    Compile every prebuilt statement and prepare it on ``connections`` pooled connections, the pool size by default.
+
+    The connections are checked out together so each one is opened and warmed, then returned to the pool. Returns
+    the number of connections warmed.
+    """
+    connections = connections or engine.sync_engine.pool.size()
+
+    async with AsyncExitStack() as stack:
+        opened = [await stack.enter_async_context(engine.connect()) for _ in range(connections)]
+        await asyncio.gather(*(_warm_connection(connection) for connection in opened))
+
+    logger.info("Warmed %s statements on %s connections", len(WARMUP_STATEMENTS), connections)
+    return connections
@@ -0,0 +1,132 @@
+import asyncio
+import time
+from contextvars import ContextVar
+from typing import Optional
+
+from grpclib.events import RecvRequest, SendTrailingMetadata, listen
+from grpclib.metadata import Deadline
+from grpclib.server import Server
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from src.resources.metrics import Counter, Gauge, Histogram
+
+STATEMENT_BUCKETS = (1, 2, 3, 5, 10, 20, 50, 100, 250, 500, 1000)
+
+rpc_duration = Histogram("planets_rpc_duration_seconds", "Wall-clock time from receiving an RPC to sending its trailers.", ("method",))
+rpc_db_duration = Histogram("planets_rpc_db_duration_seconds", "Time an RPC spent executing database statements.", ("method",))
+rpc_pool_wait = Histogram("planets_rpc_pool_wait_seconds", "Time an RPC spent waiting to check connections out of the pool.", ("method",))
+rpc_db_statements = Histogram("planets_rpc_db_statements", "Database statements executed per RPC.", ("method",), buckets=STATEMENT_BUCKETS)
+rpc_in_flight = Gauge("planets_rpc_in_flight", "RPCs received and not yet finished.", ("method",))
+rpc_total = Counter("planets_rpc_total", "Finished RPCs by gRPC status.", ("method", "status"))
+db_statement_duration = Histogram(
+    "planets_db_statement_duration_seconds",
+    "Time to execute one database statement, by the RPC that issued it, or 'none' outside an RPC.",
+    ("method",),
+)
+lookup_cache_hits = Counter("planets_lookup_cache_hits_total", "Name lookups served from the in-process cache.", ("cache",))
+lookup_cache_misses = Counter("planets_lookup_cache_misses_total", "Name lookups that missed the in-process cache.", ("cache",))
+lookup_cache_entries = Gauge("planets_lookup_cache_entries", "Names held in the in-process cache.", ("cache",))
+single_flight_joined = Counter("planets_single_flight_joined_total", "Calls that joined an identical call already in flight.", ("flight",))
+single_flight_in_flight = Gauge("planets_single_flight_in_flight", "Distinct coalesced calls currently in flight.", ("flight",))
+write_combiner_flushes = Counter("planets_write_combiner_flushes_total", "Batched writes flushed by a write combiner.", ("combiner",))
+
+
+class RpcContext:
+    """Per-RPC timings, carried in ``current_rpc`` from the request event through the handler and its queries."""
+
+    __slots__ = ("method", "deadline", "started", "db_time", "pool_wait", "statements", "finished")
+
+    def __init__(self, method: str, deadline: Optional[Deadline]):
+        self.method = method
+        self.deadline = deadline
+        self.started = time.perf_counter()
+        self.db_time = 0.0
+        self.pool_wait = 0.0
+        self.statements = 0
+        self.finished = False
+
+    def finish(self, status: str) -> None:
+        if self.finished:
+            return
+        self.finished = True
+
+        rpc_duration.observe(time.perf_counter() - self.started, method=self.method)
+        rpc_db_duration.observe(self.db_time, method=self.method)
+        rpc_pool_wait.observe(self.pool_wait, method=self.method)
+        rpc_db_statements.observe(self.statements, method=self.method)
+        rpc_in_flight.dec(method=self.method)
+        rpc_total.inc(method=self.method, status=status)
+
+
+current_rpc: ContextVar[Optional[RpcContext]] = ContextVar("current_rpc", default=None)
+
+
+async def _on_recv_request(event: RecvRequest) -> None:
+    # grpclib awaits listeners in the handler's task, so the context var stays set for the rest of the RPC.
+    rpc = RpcContext(event.method_name, event.deadline)
+    current_rpc.set(rpc)
+    rpc_in_flight.inc(method=rpc.method)
+
+    # Handlers cancelled by a client disconnect or server close never send trailers.
+    asyncio.current_task().add_done_callback(lambda _: rpc.finish("CANCELLED"))
+
+
+async def _on_send_trailing_metadata(event: SendTrailingMetadata) -> None:
+    rpc = current_rpc.get()
+    if rpc is not None:
+        rpc.finish(event.status.name)
+
+
+def instrument_server(server: Server) -> None:
+    """Record latency, in-flight and status metrics for every RPC ``server`` handles."""
+    listen(server, RecvRequest, _on_recv_request)
+    listen(server, SendTrailingMetadata, _on_send_trailing_metadata)
+
+
+def instrument_admin_service(service) -> None:
+    """Export the admin service's lookup cache, single-flight and write combiner counters, read at scrape time."""
+    caches = {"sector": service.sector_cache, "cargo_type": service.cargo_type_cache}
+    flights = {"sector": service.sector_flights, "cargo_type": service.cargo_type_flights}
+    combiners = {"planet": service.planet_writes, "starship": service.starship_writes}
+
+    lookup_cache_hits.set_function(lambda: {(name,): cache.hits for name, cache in caches.items()})
+    lookup_cache_misses.set_function(lambda: {(name,): cache.misses for name, cache in caches.items()})
+    lookup_cache_entries.set_function(lambda: {(name,): len(cache) for name, cache in caches.items()})
+    single_flight_joined.set_function(lambda: {(name,): flight.joined for name, flight in flights.items()})
+    single_flight_in_flight.set_function(lambda: {(name,): len(flight) for name, flight in flights.items()})
+    write_combiner_flushes.set_function(lambda: {(name,): combiner.flushes for name, combiner in combiners.items() if combiner is not None})
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("statement_started", []).append(time.perf_counter())
+
+
+def _statement_finished(conn) -> None:
+    started = conn.info.get("statement_started")
+    if not started:
+        return
+    elapsed = time.perf_counter() - started.pop()
+
+    # SQLAlchemy's async greenlets run in the calling task's context, so this is the RPC that issued the statement.
+    rpc = current_rpc.get()
+    if rpc is not None:
+        rpc.db_time += elapsed
+        rpc.statements += 1
+    db_statement_duration.observe(elapsed, method=rpc.method if rpc is not None else "none")
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    _statement_finished(conn)
+
+
+def _handle_error(exception_context):
+    if exception_context.connection is not None:
+        _statement_finished(exception_context.connection)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Attribute the time and count of every statement ``engine`` executes to the RPC that issued it."""
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+    event.listen(engine, "handle_error", _handle_error)
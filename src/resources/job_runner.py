@@ -0,0 +1,160 @@
+import asyncio
+import logging
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Optional, Sequence
+
+from sqlalchemy import Row
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.generated.co.za.planet import JobState, JobType, ResponseMessage, StatusCode
+from src.resources.database.config import unit_of_work
+from src.resources.database.job_queries import advance_job, claim_job, finish_job, release_job
+from src.resources.database.retry import run_transaction
+from src.resources.metrics import Counter
+from src.strings import en_za as strings
+
+logger = logging.getLogger(__name__)
+
+jobs_finished = Counter("planets_jobs_finished_total", "Background jobs finished, by job type and final state.", ("job_type", "state"))
+
+
+class JobLost(Exception):
+    """The job was claimed again by another worker after this worker's lease lapsed."""
+
+
+@dataclass(frozen=True)
+class JobHandler:
+    """
+    How the runner works through one job type.
+
+    ``items`` decodes a payload into the items counted by ``total_items``. ``run_chunk`` writes a slice of them in the
+    caller's transaction and returns the ids to append to the job's results. ``error_message`` turns a database error
+    into the job's failed outcome, or returns None when the error is not down to the request.
+    """
+
+    items: Callable[[bytes], Sequence]
+    run_chunk: Callable[[AsyncSession, Sequence], Awaitable[Sequence[int]]]
+    error_message: Callable[[DBAPIError], Optional[ResponseMessage]] = lambda _: None
+
+
+class JobRunner:
+    """
+    Runs queued jobs on ``workers`` tasks, each working through one job at a time.
+
+    A job is written ``chunk_size`` items per transaction, and each transaction also advances the job's progress, so a
+    job resumed by another worker picks up after the last committed chunk. Workers claim jobs with ``SKIP LOCKED``, so
+    every worker of every process can share one queue. Idle workers wait for ``notify``, or at most ``poll_interval``
+    seconds. A job whose worker stops renewing its lease for ``lease`` seconds is claimed again, and one claimed
+    more than ``max_attempts`` times fails.
+    """
+
+    def __init__(
+        self,
+        handlers: dict[JobType, JobHandler],
+        workers: int = 2,
+        chunk_size: int = 5000,
+        poll_interval: float = 5.0,
+        lease: float = 60.0,
+        max_attempts: int = 3,
+    ):
+        self.handlers = handlers
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.poll_interval = poll_interval
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.closed = False
+        self._wakeup = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+
+    def start(self) -> None:
+        self._tasks = [asyncio.create_task(self._work()) for _ in range(self.workers)]
+
+    def notify(self, _: Optional[str] = None) -> None:
+        wakeup, self._wakeup = self._wakeup, asyncio.Event()
+        wakeup.set()
+
+    async def stop(self, timeout: float) -> None:
+        """
+        Stop claiming jobs and hand running ones back to the queue after their current chunk, cancelling workers still
+        busy after ``timeout`` seconds. A cancelled worker's job is claimed again once its lease lapses.
+        """
+        self.closed = True
+        self.notify()
+        if self._tasks:
+            _, pending = await asyncio.wait(self._tasks, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def _work(self) -> None:
+        while not self.closed:
+            # Taken before claiming, so a job submitted while this worker looks is not missed.
+            wakeup = self._wakeup
+            try:
+                ran = await self.run_next()
+            except Exception:
+                logger.exception("Background job failed")
+                ran = False
+
+            if not ran:
+                try:
+                    await asyncio.wait_for(wakeup.wait(), self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+
+    async def run_next(self) -> bool:
+        """Claim the oldest runnable job and work through it, returning False when there was none."""
+        async with unit_of_work() as session:
+            job = await claim_job(session, self.lease)
+
+        if job is None:
+            return False
+
+        await self._run(job)
+        return True
+
+    async def _run(self, job: Row) -> None:
+        handler = self.handlers.get(job.job_type)
+        if handler is None or job.attempts > self.max_attempts:
+            await self._finish(job, JobState.FAILED, ResponseMessage(status_code=StatusCode.INTERNAL_ERROR, status_message=strings.error_job_abandoned))
+            return
+
+        items = handler.items(job.payload)
+        done = job.completed_items
+        try:
+            while done < len(items):
+                if self.closed:
+                    async with unit_of_work() as session:
+                        await release_job(session, job.job_id, job.attempts)
+                    return
+
+                chunk = items[done : done + self.chunk_size]
+                await run_transaction(lambda session: self._run_chunk(session, job, handler, chunk))
+                done += len(chunk)
+        except JobLost:
+            logger.warning("Job %s was claimed by another worker", job.job_id)
+            return
+        except DBAPIError as exc:
+            message = handler.error_message(exc)
+            if message is None:
+                raise
+            await self._finish(job, JobState.FAILED, message)
+            return
+
+        await self._finish(job, JobState.SUCCEEDED, ResponseMessage(status_code=StatusCode.SUCCESS))
+
+    async def _run_chunk(self, session: AsyncSession, job: Row, handler: JobHandler, chunk: Sequence) -> None:
+        ids = await handler.run_chunk(session, chunk)
+        # Raising rolls the chunk back, so a worker that lost the job leaves nothing behind.
+        if not await advance_job(session, job.job_id, job.attempts, len(chunk), ids, self.lease):
+            raise JobLost(job.job_id)
+
+    async def _finish(self, job: Row, state: JobState, outcome: ResponseMessage) -> None:
+        async with unit_of_work() as session:
+            finished = await finish_job(session, job.job_id, job.attempts, state, outcome)
+
+        if finished:
+            jobs_finished.inc(job_type=JobType(job.job_type).name, state=state.name)
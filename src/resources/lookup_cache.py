@@ -0,0 +1,49 @@
+import time
+from collections import OrderedDict
+from typing import Optional
+
+
+class LookupCache:
+    """
+    Bounded LRU cache of name -> id lookups with a time-to-live per entry.
+
+    Only ids the database has handed back are cached, so a miss always falls through to the database. The TTL bounds
+    how stale an entry can get when no invalidation channel is listening.
+    """
+
+    def __init__(self, maxsize: int = 10_000, ttl: float = 300.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, tuple[int, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, name: str) -> Optional[int]:
+        entry = self._entries.get(name)
+        if entry is None or entry[1] < time.monotonic():
+            if entry is not None:
+                del self._entries[name]
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(name)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, name: str, value: int) -> None:
+        self._entries[name] = (value, time.monotonic() + self.ttl)
+        self._entries.move_to_end(name)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, name: str) -> None:
+        self._entries.pop(name, None)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._entries)}
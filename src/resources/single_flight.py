@@ -0,0 +1,63 @@
+import asyncio
+from typing import Awaitable, Callable, Hashable, Sequence, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """
+    Collapses concurrent calls that share a key into one in-flight call whose result, or exception, every caller gets.
+
+    The call runs in its own task, so a caller being cancelled does not cancel the work the other callers wait on.
+    """
+
+    def __init__(self):
+        self.joined = 0
+        self._flights: dict[Hashable, asyncio.Task] = {}
+
+    def __len__(self) -> int:
+        return len(self._flights)
+
+    async def do(self, key: Hashable, call: Callable[[], Awaitable[T]]) -> T:
+        flight = self._flights.get(key)
+
+        if flight is None:
+            flight = asyncio.ensure_future(call())
+            self._flights[key] = flight
+            flight.add_done_callback(lambda done: self._land(key, done))
+        else:
+            self.joined += 1
+
+        return await asyncio.shield(flight)
+
+    async def do_many(self, keys: Sequence[Hashable], call: Callable[[list], Awaitable[Sequence[T]]]) -> list[T]:
+        """
+        Like ``do`` for each of ``keys``, in one call: keys already in flight are joined, and the rest are passed to
+        ``call``, which returns their results in the same order. Each of those keys lands separately, so later batches
+        that share only some keys still join them.
+        """
+        flights = {key: self._flights.get(key) for key in dict.fromkeys(keys)}
+        missing = [key for key, flight in flights.items() if flight is None]
+        self.joined += len(flights) - len(missing)
+
+        if missing:
+            batch = asyncio.ensure_future(call(missing))
+            for index, key in enumerate(missing):
+                flight = asyncio.ensure_future(self._pick(batch, index))
+                self._flights[key] = flights[key] = flight
+                flight.add_done_callback(lambda done, key=key: self._land(key, done))
+
+        results = await asyncio.gather(*(asyncio.shield(flight) for flight in flights.values()))
+        by_key = dict(zip(flights, results))
+        return [by_key[key] for key in keys]
+
+    @staticmethod
+    async def _pick(batch: asyncio.Future, index: int):
+        return (await batch)[index]
+
+    def _land(self, key: Hashable, flight: asyncio.Task) -> None:
+        if self._flights.get(key) is flight:
+            del self._flights[key]
+        if not flight.cancelled():
+            # Mark the exception as retrieved even if every caller was cancelled before it landed.
+            flight.exception()
@@ -0,0 +1,68 @@
+import asyncio
+from typing import Awaitable, Callable, Generic, Optional, TypeVar
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+
+class WriteCombiner(Generic[T, R]):
+    """
+    Collects concurrent submissions for up to ``max_delay`` seconds or ``max_batch`` items and flushes them together.
+
+    ``flush`` receives the batch in submission order and returns one result per item. A result that is an exception
+    is raised to that item's caller only, while an exception raised by ``flush`` itself fails the whole batch, and a
+    cancelled flush cancels every caller waiting on it.
+    """
+
+    def __init__(self, flush: Callable[[list[T]], Awaitable[list[R | BaseException]]], max_delay: float = 0.002, max_batch: int = 500):
+        self.max_delay = max_delay
+        self.max_batch = max_batch
+        self.flushes = 0
+        self._flush = flush
+        self._pending: list[tuple[T, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._flushing: set[asyncio.Task] = set()
+
+    async def submit(self, item: T) -> R:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((item, future))
+
+        if len(self._pending) >= self.max_batch:
+            self._start_flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.max_delay, self._start_flush)
+
+        return await future
+
+    def _start_flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.create_task(self._run(batch))
+            self._flushing.add(task)
+            task.add_done_callback(self._flushing.discard)
+
+    async def _run(self, batch: list[tuple[T, asyncio.Future]]) -> None:
+        self.flushes += 1
+        try:
+            results = await self._flush([item for item, _ in batch])
+        except Exception as exc:
+            results = [exc] * len(batch)
+        except BaseException:
+            # A flush cancelled at shutdown will never land, so its callers are cancelled rather than left to hang.
+            for _, future in batch:
+                future.cancel()
+            raise
+
+        for (_, future), result in zip(batch, results):
+            # A caller that was cancelled has already gone; its row is written regardless.
+            if future.done():
+                continue
+            if isinstance(result, BaseException):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
@@ -0,0 +1,422 @@
+import argparse
+import asyncio
+import logging
+import multiprocessing
+import os
+import signal
+import sys
+from dataclasses import dataclass
+from multiprocessing.connection import wait
+
+from grpclib.const import Status
+from grpclib.events import RecvRequest, listen
+from grpclib.exceptions import GRPCError
+from grpclib.server import Server
+
+from src.resources.admission import AdmissionController, MethodPolicy, Priority, admit_server
+from src.resources.database.config import configure_database, dispose_database, scope_sessions, session_maker, start_pool_maintenance
+from src.resources.database.models import CHANGE_EVENT_CHANNEL, JOB_CHANNEL, LOOKUP_INVALIDATION_CHANNEL
+from src.resources.database.notifications import NotificationListener
+from src.resources.database.warmup import warm_database
+from src.resources.instrumentation import instrument_admin_service, instrument_server
+from src.resources.job_runner import JobRunner
+from src.resources.lookup_cache import LookupCache
+from src.resources.metrics import start_metrics_server
+from src.services.planets_admin_service import JOB_HANDLERS, PlanetsService
+from src.services.planets_user_service import PlanetsUserService
+from src.strings import en_za as strings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class ServerSettings:
+    database_url: str
+    host: str = "0.0.0.0"
+    port: int = 50051
+    workers: int = 1
+    drain_timeout: float = 30.0
+    database_pool_size: int = 10
+    database_overflow_size: int = 40
+    database_pool_min_size: int = 0
+    database_pool_max_size: int = 0
+    database_pool_validate_interval: float = 30.0
+    database_prepare_threshold: int = 0
+    database_replica_urls: tuple[str, ...] = ()
+    database_replica_check_interval: float = 5.0
+    lookup_cache_size: int = 10_000
+    lookup_cache_ttl: float = 300.0
+    lookup_notify: bool = False
+    write_combine_window_ms: float = 0.0
+    write_combine_max_rows: int = 500
+    job_workers: int = 2
+    job_chunk_size: int = 5000
+    admission_capacity: int = 0
+    admission_bulk_concurrency: int = 4
+    admission_max_queue: int = 1000
+    metrics_host: str = "127.0.0.1"
+    metrics_port: int = 9464
+
+
+def method_policies(bulk_concurrency: int) -> dict[str, MethodPolicy]:
+    """
+    Admission policies by gRPC method path; methods not listed are interactive.
+
+    Bulk writes hold a connection for a long transaction, so only ``bulk_concurrency`` of each run at once and they
+    yield freed slots to everything else. WatchChanges streams stay open indefinitely but only check out a connection
+    to read a page, so they take no slot.
+    """
+    bulk = MethodPolicy(Priority.BULK, concurrency=bulk_concurrency)
+    batch = MethodPolicy(Priority.BATCH)
+    policies = {
+        "PlanetAdmin/BulkCreateManifest": bulk,
+        "PlanetAdmin/StreamManifests": bulk,
+        "PlanetAdmin/OnboardFleet": bulk,
+        "PlanetAdmin/BulkCreateCargoType": batch,
+        "PlanetUser/BulkMoveStarships": batch,
+        "PlanetUser/ListPlanets": batch,
+        "PlanetUser/ListStarships": batch,
+        "PlanetUser/FindAllSuppliers": batch,
+        "PlanetUser/WatchChanges": MethodPolicy(exempt=True),
+    }
+    return {f"/co.za.planet.{method}": policy for method, policy in policies.items()}
+
+
+class InFlightTracker:
+    """
+    Keeps a handle on the task serving every RPC so shutdown can wait for them.
+
+    grpclib's ``Server.close`` cancels running handlers, so draining has to happen before it is called. Closing the
+    listening socket leaves open connections accepting new streams, so once draining starts new RPCs are refused with
+    UNAVAILABLE, which clients retry elsewhere.
+    """
+
+    def __init__(self):
+        self._tasks: set[asyncio.Task] = set()
+        self.draining = False
+
+    def __len__(self) -> int:
+        return len(self._tasks)
+
+    async def on_recv_request(self, _: RecvRequest) -> None:
+        if self.draining:
+            raise GRPCError(Status.UNAVAILABLE, strings.error_server_draining)
+        task = asyncio.current_task()
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def drain(self, timeout: float) -> int:
+        """
+        Refuse new RPCs and wait for in-flight ones to finish, returning how many were still running after ``timeout``.
+        """
+        self.draining = True
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + timeout
+        # An RPC that was already past the check when draining started can join after a wait begins, so wait again.
+        while self._tasks and (remaining := deadline - loop.time()) > 0:
+            await asyncio.wait(set(self._tasks), timeout=remaining)
+        return len(self._tasks)
+
+
+def _stop_listening(server: Server) -> None:
+    """Close ``server``'s listening sockets, leaving the RPCs on its open connections running."""
+    # grpclib 0.4.9 has no public way to do this, since Server.close also cancels every handler, so this reaches into
+    # the private asyncio server it wraps. Check it still exists when upgrading grpclib.
+    server._server.close()
+
+
+def _adaptive_pool(settings: ServerSettings) -> bool:
+    return settings.database_pool_min_size > 0 and settings.database_pool_max_size > 0
+
+
+def _pool_size(settings: ServerSettings) -> int:
+    if _adaptive_pool(settings):
+        return min(max(settings.database_pool_size, settings.database_pool_min_size), settings.database_pool_max_size)
+    return settings.database_pool_size
+
+
+def build_server(settings: ServerSettings, admin_service: PlanetsService, user_service: PlanetsUserService) -> tuple[Server, InFlightTracker]:
+    """
+    The gRPC server for the two services with every hook a worker installs: in-flight tracking for the drain, metrics,
+    request-scoped sessions and admission control.
+    """
+    server = Server([admin_service, user_service])
+    tracker = InFlightTracker()
+    listen(server, RecvRequest, tracker.on_recv_request)
+    instrument_server(server)
+    # Registered before admission so that each RPC's session scope sits inside its admission slot.
+    scope_sessions(server)
+    # By default RPCs are admitted up to the number of connections the pool can hand out.
+    pool_limit = settings.database_pool_max_size if _adaptive_pool(settings) else _pool_size(settings)
+    admission_capacity = settings.admission_capacity or pool_limit + settings.database_overflow_size
+    admit_server(
+        server,
+        AdmissionController(admission_capacity, method_policies(settings.admission_bulk_concurrency), max_queue=settings.admission_max_queue),
+    )
+    instrument_admin_service(admin_service)
+    return server, tracker
+
+
+async def serve(
+    settings: ServerSettings,
+    stop: asyncio.Event | None = None,
+    worker_index: int = 0,
+    ready: asyncio.Event | None = None,
+) -> None:
+    """
+    Run one worker until ``stop`` is set or SIGTERM/SIGINT is received.
+
+    Each worker serves its own ``/metrics`` on ``metrics_port + worker_index``, since workers share no state. The pool's
+    connections are opened and the query layer's statements compiled and prepared before the port is bound, after
+    which ``ready`` is set.
+
+    Shutdown stops accepting connections, drains in-flight RPCs for up to ``drain_timeout`` seconds,
+    then closes the server, hands running jobs back to the queue and disposes of the database engine.
+    """
+    adaptive_pool = _adaptive_pool(settings)
+    pool_size = _pool_size(settings)
+
+    configure_database(
+        settings.database_url,
+        database_pool_size=pool_size,
+        database_overflow_size=settings.database_overflow_size,
+        prepare_threshold=settings.database_prepare_threshold if settings.database_prepare_threshold >= 0 else None,
+        replica_urls=settings.database_replica_urls,
+        replica_check_interval=settings.database_replica_check_interval,
+    )
+    start_pool_maintenance(
+        validate_interval=settings.database_pool_validate_interval,
+        min_size=settings.database_pool_min_size if adaptive_pool else None,
+        max_size=settings.database_pool_max_size if adaptive_pool else None,
+    )
+
+    admin_service = PlanetsService(
+        sector_cache=LookupCache(settings.lookup_cache_size, settings.lookup_cache_ttl),
+        cargo_type_cache=LookupCache(settings.lookup_cache_size, settings.lookup_cache_ttl),
+        write_combine_window=settings.write_combine_window_ms / 1000,
+        write_combine_max_rows=settings.write_combine_max_rows,
+    )
+    user_service = PlanetsUserService()
+    job_runner = JobRunner(JOB_HANDLERS, workers=settings.job_workers, chunk_size=settings.job_chunk_size)
+    server, tracker = build_server(settings, admin_service, user_service)
+
+    stop = stop or asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    # Change streams and idle job workers are woken by commits; lookup caches optionally listen on the same connection.
+    listener = NotificationListener(settings.database_url)
+    listener.subscribe(CHANGE_EVENT_CHANNEL, user_service.change_feed.notify)
+    listener.subscribe(JOB_CHANNEL, job_runner.notify)
+    if settings.lookup_notify:
+        listener.subscribe(LOOKUP_INVALIDATION_CHANNEL, admin_service.on_lookup_invalidation)
+    listener.start()
+
+    metrics_server = None
+    try:
+        if settings.metrics_port:
+            metrics_server = await start_metrics_server(settings.metrics_host, settings.metrics_port + worker_index)
+
+        await warm_database(session_maker.kw["bind"])
+        job_runner.start()
+
+        await server.start(settings.host, settings.port, reuse_port=settings.workers > 1)
+        logger.info("Worker %s serving on %s:%s", os.getpid(), settings.host, settings.port)
+        if ready is not None:
+            ready.set()
+
+        await stop.wait()
+
+        _stop_listening(server)
+        # Change streams never finish by themselves, so they are ended rather than left to hold up the drain.
+        user_service.change_feed.close()
+        logger.info("Worker %s draining %s in-flight RPCs", os.getpid(), len(tracker))
+        pending = await tracker.drain(settings.drain_timeout)
+        if pending:
+            logger.warning("Worker %s cancelling %s RPCs still running after %ss", os.getpid(), pending, settings.drain_timeout)
+
+        server.close()
+        await server.wait_closed()
+    finally:
+        for sig in (signal.SIGTERM, signal.SIGINT):
+            loop.remove_signal_handler(sig)
+        await job_runner.stop(settings.drain_timeout)
+        await listener.stop()
+        if metrics_server is not None:
+            metrics_server.close()
+            await metrics_server.wait_closed()
+        await dispose_database()
+
+
+def _run_worker(settings: ServerSettings, worker_index: int = 0) -> None:
+    asyncio.run(serve(settings, worker_index=worker_index))
+
+
+def run(settings: ServerSettings) -> None:
+    """
+    Serve in this process, or fork ``settings.workers`` processes sharing the port through SO_REUSEPORT.
+
+    When a worker dies before it is told to stop, the others are drained too and the process exits non-zero, so a
+    supervisor can restart the whole server.
+    """
+    if settings.workers <= 1:
+        _run_worker(settings)
+        return
+
+    # Workers are forked before any engine or event loop exists in the parent.
+    context = multiprocessing.get_context("fork")
+    workers = [context.Process(target=_run_worker, args=(settings, i), name=f"planets-worker-{i}") for i in range(settings.workers)]
+    for worker in workers:
+        worker.start()
+
+    stopping = False
+
+    def forward(signum, _):
+        nonlocal stopping
+        stopping = True
+        for w in workers:
+            if w.is_alive():
+                os.kill(w.pid, signum)
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+
+    failed = False
+    running = {worker.sentinel: worker for worker in workers}
+    while running:
+        for sentinel in wait(list(running)):
+            worker = running.pop(sentinel)
+            worker.join()
+            if worker.exitcode == 0 and stopping:
+                continue
+            failed = True
+            if not stopping:
+                logger.error("Worker %s exited with code %s; stopping the other workers", worker.pid, worker.exitcode)
+                forward(signal.SIGTERM, None)
+
+    if failed:
+        sys.exit(1)
+
+
+def parse_settings(argv: list[str] | None = None) -> ServerSettings:
+    parser = argparse.ArgumentParser(description="Planets gRPC server")
+    parser.add_argument("--host", default=os.getenv("HOST", ServerSettings.host))
+    parser.add_argument("--port", type=int, default=int(os.getenv("PORT", ServerSettings.port)))
+    parser.add_argument("--workers", type=int, default=int(os.getenv("WORKERS", os.cpu_count() or 1)))
+    parser.add_argument("--drain-timeout", type=float, default=float(os.getenv("DRAIN_TIMEOUT", ServerSettings.drain_timeout)))
+    parser.add_argument("--database-pool-size", type=int, default=int(os.getenv("DATABASE_POOL_SIZE", ServerSettings.database_pool_size)))
+    parser.add_argument("--database-overflow-size", type=int, default=int(os.getenv("DATABASE_OVERFLOW_SIZE", ServerSettings.database_overflow_size)))
+    parser.add_argument(
+        "--database-pool-min-size",
+        type=int,
+        default=int(os.getenv("DATABASE_POOL_MIN_SIZE", ServerSettings.database_pool_min_size)),
+        help="With --database-pool-max-size, size the pool between these bounds from observed checkout waits",
+    )
+    parser.add_argument("--database-pool-max-size", type=int, default=int(os.getenv("DATABASE_POOL_MAX_SIZE", ServerSettings.database_pool_max_size)))
+    parser.add_argument(
+        "--database-pool-validate-interval",
+        type=float,
+        default=float(os.getenv("DATABASE_POOL_VALIDATE_INTERVAL", ServerSettings.database_pool_validate_interval)),
+        help="Seconds between background pings of idle pooled connections; 0 disables them",
+    )
+    parser.add_argument(
+        "--database-prepare-threshold",
+        type=int,
+        default=int(os.getenv("DATABASE_PREPARE_THRESHOLD", ServerSettings.database_prepare_threshold)),
+        help="Executions before psycopg prepares a statement server-side; -1 disables prepared statements, e.g. behind PgBouncer",
+    )
+    parser.add_argument(
+        "--database-replica-check-interval",
+        type=float,
+        default=float(os.getenv("DATABASE_REPLICA_CHECK_INTERVAL", ServerSettings.database_replica_check_interval)),
+        help="Seconds between health checks of the read replicas in DATABASE_REPLICA_URLS; 0 disables them",
+    )
+    parser.add_argument("--lookup-cache-size", type=int, default=int(os.getenv("LOOKUP_CACHE_SIZE", ServerSettings.lookup_cache_size)))
+    parser.add_argument("--lookup-cache-ttl", type=float, default=float(os.getenv("LOOKUP_CACHE_TTL", ServerSettings.lookup_cache_ttl)))
+    parser.add_argument(
+        "--lookup-notify",
+        action="store_true",
+        default=os.getenv("LOOKUP_NOTIFY", "").lower() in ("1", "true"),
+        help="LISTEN for sector and cargo type changes so every worker's lookup cache stays consistent",
+    )
+    parser.add_argument(
+        "--write-combine-window-ms",
+        type=float,
+        default=float(os.getenv("WRITE_COMBINE_WINDOW_MS", ServerSettings.write_combine_window_ms)),
+        help="Batch CreatePlanet and CreateStarship calls arriving within this many milliseconds; 0 disables batching",
+    )
+    parser.add_argument(
+        "--write-combine-max-rows",
+        type=int,
+        default=int(os.getenv("WRITE_COMBINE_MAX_ROWS", ServerSettings.write_combine_max_rows)),
+    )
+    parser.add_argument(
+        "--job-workers",
+        type=int,
+        default=int(os.getenv("JOB_WORKERS", ServerSettings.job_workers)),
+        help="Background jobs each worker process runs at once; 0 leaves submitted jobs to other processes",
+    )
+    parser.add_argument(
+        "--job-chunk-size",
+        type=int,
+        default=int(os.getenv("JOB_CHUNK_SIZE", ServerSettings.job_chunk_size)),
+        help="Items a background job writes per transaction",
+    )
+    parser.add_argument(
+        "--admission-capacity",
+        type=int,
+        default=int(os.getenv("ADMISSION_CAPACITY", ServerSettings.admission_capacity)),
+        help="RPCs each worker runs at once before queueing the rest by priority; 0 sizes it to the connection pool",
+    )
+    parser.add_argument(
+        "--admission-bulk-concurrency",
+        type=int,
+        default=int(os.getenv("ADMISSION_BULK_CONCURRENCY", ServerSettings.admission_bulk_concurrency)),
+        help="RPCs of each bulk write method each worker runs at once",
+    )
+    parser.add_argument(
+        "--admission-max-queue",
+        type=int,
+        default=int(os.getenv("ADMISSION_MAX_QUEUE", ServerSettings.admission_max_queue)),
+        help="Queued RPCs of the same or higher priority beyond which new RPCs are rejected with RESOURCE_EXHAUSTED",
+    )
+    parser.add_argument("--metrics-host", default=os.getenv("METRICS_HOST", ServerSettings.metrics_host))
+    parser.add_argument(
+        "--metrics-port",
+        type=int,
+        default=int(os.getenv("METRICS_PORT", ServerSettings.metrics_port)),
+        help="Base port for each worker's Prometheus /metrics endpoint; worker N listens on this port + N, and 0 disables it",
+    )
+    args = parser.parse_args(argv)
+    database_url = os.getenv("DATABASE_URL")
+    if not database_url:
+        parser.error("the DATABASE_URL environment variable is required")
+
+    return ServerSettings(
+        database_url=database_url,
+        database_replica_urls=tuple(url for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url),
+        database_replica_check_interval=args.database_replica_check_interval,
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        drain_timeout=args.drain_timeout,
+        database_pool_size=args.database_pool_size,
+        database_overflow_size=args.database_overflow_size,
+        database_pool_min_size=args.database_pool_min_size,
+        database_pool_max_size=args.database_pool_max_size,
+        database_pool_validate_interval=args.database_pool_validate_interval,
+        database_prepare_threshold=args.database_prepare_threshold,
+        lookup_cache_size=args.lookup_cache_size,
+        lookup_cache_ttl=args.lookup_cache_ttl,
+        lookup_notify=args.lookup_notify,
+        write_combine_window_ms=args.write_combine_window_ms,
+        write_combine_max_rows=args.write_combine_max_rows,
+        job_workers=args.job_workers,
+        job_chunk_size=args.job_chunk_size,
+        admission_capacity=args.admission_capacity,
+        admission_bulk_concurrency=args.admission_bulk_concurrency,
+        admission_max_queue=args.admission_max_queue,
+        metrics_host=args.metrics_host,
+        metrics_port=args.metrics_port,
+    )
@@ -1,3 +1,8 @@
+import json
+from typing import AsyncIterator, Optional
+
+from sqlalchemy.exc import DBAPIError, IntegrityError
+
 from src.generated.co.za.planet import (
     PlanetAdminBase,
     ResponseMessage,
@@ -12,160 +17,504 @@ from src.generated.co.za.planet import (
     BulkCreateCargoTypeRequest,
     BulkCreateManifestResponse,
     BulkCreateManifestRequest,
+    StreamManifestsResponse,
+    OnboardFleetRequest,
+    OnboardFleetResponse,
+    ManifestObject,
+    SetScarceCargoTypeRequest,
+    SetScarceCargoTypeResponse,
+    SubmitJobResponse,
+    GetJobStatusRequest,
+    GetJobStatusResponse,
+    JobType,
+    JobState,
+)
+from src.resources.database.config import unit_of_work
+from src.resources.database.job_queries import get_job_db, submit_job
+from src.resources.database.retry import (
+    CHECK_VIOLATION,
+    FOREIGN_KEY_VIOLATION,
+    NUMERIC_VALUE_OUT_OF_RANGE,
+    RETRYABLE_SQLSTATES,
+    UNIQUE_VIOLATION,
+    run_transaction,
+    sqlstate,
 )
-from src.resources.database.config import Session
 from src.resources.database.planets_admin_queries import (
     create_planet_db,
     create_starship_db,
     bulk_create_manifest,
-    bulk_create_cargo_type,
+    bulk_get_or_create_cargo_types_db,
     get_or_create_sector_db,
+    copy_manifest_chunk,
+    bulk_create_planets_db,
+    bulk_create_starships_db,
+    set_scarce_cargo_type_db,
 )
+from src.resources.job_runner import JobHandler
+from src.resources.lookup_cache import LookupCache
+from src.resources.single_flight import SingleFlight
+from src.resources.write_combiner import WriteCombiner
 from src.strings import en_za as strings
 
 
+def _normalise_name(name: str) -> str:
+    """Names are stored, cached and coalesced without surrounding whitespace."""
+    return name.strip()
+
+
+def _manifest_write_error(exc: DBAPIError) -> Optional[ResponseMessage]:
+    """The response for a manifest write Postgres rejected, or None when the failure is not down to the request."""
+    state = sqlstate(exc)
+    if state == FOREIGN_KEY_VIOLATION:
+        return ResponseMessage(status_code=StatusCode.NOT_FOUND, status_message=strings.validation_error_invalid_starship_or_cargo_type)
+    if state in (CHECK_VIOLATION, NUMERIC_VALUE_OUT_OF_RANGE):
+        return ResponseMessage(
+            status_code=StatusCode.VALIDATION_ERROR,
+            error_fields={"manifests": strings.validation_error_manifest_quantity_out_of_range},
+        )
+    if state in RETRYABLE_SQLSTATES:
+        return ResponseMessage(status_code=StatusCode.INTERNAL_ERROR, status_message=strings.error_manifest_write_contention)
+    return None
+
+
+def _fleet_write_error(exc: DBAPIError) -> Optional[ResponseMessage]:
+    """The response for an onboarding write Postgres rejected, or None when the failure is not down to the request."""
+    state = sqlstate(exc)
+    if state == FOREIGN_KEY_VIOLATION:
+        return ResponseMessage(status_code=StatusCode.NOT_FOUND, status_message=strings.validation_error_cargo_type_id_does_not_exist)
+    if state == UNIQUE_VIOLATION:
+        return ResponseMessage(status_code=StatusCode.ALREADY_EXISTS, status_message=strings.validation_error_planet_name_exists)
+    if state in (CHECK_VIOLATION, NUMERIC_VALUE_OUT_OF_RANGE):
+        return ResponseMessage(
+            status_code=StatusCode.VALIDATION_ERROR,
+            error_fields={"planets": strings.validation_error_manifest_quantity_out_of_range},
+        )
+    if state in RETRYABLE_SQLSTATES:
+        return ResponseMessage(status_code=StatusCode.INTERNAL_ERROR, status_message=strings.error_manifest_write_contention)
+    return None
+
+
+class _FleetRejected(Exception):
+    """Raised inside an onboarding transaction to roll it back and answer with ``message``."""
+
+    def __init__(self, message: ResponseMessage):
+        super().__init__(message.status_message)
+        self.message = message
+
+
+async def _run_manifest_job_chunk(session, manifests: list[ManifestObject]) -> list[int]:
+    await bulk_create_manifest(session=session, manifests=manifests)
+    return []
+
+
+# Submitted jobs are written chunk by chunk, so unlike the synchronous RPCs a failing job keeps its earlier chunks.
+JOB_HANDLERS = {
+    JobType.BULK_CREATE_MANIFEST: JobHandler(
+        items=lambda payload: BulkCreateManifestRequest().parse(payload).manifests,
+        run_chunk=_run_manifest_job_chunk,
+        error_message=_manifest_write_error,
+    ),
+    JobType.BULK_CREATE_CARGO_TYPE: JobHandler(
+        items=lambda payload: BulkCreateCargoTypeRequest().parse(payload).cargo_names,
+        run_chunk=lambda session, cargo_names: bulk_get_or_create_cargo_types_db(session=session, cargo_names=list(cargo_names)),
+    ),
+}
+
+
 class PlanetsService(PlanetAdminBase):
 
-    async def get_or_create_sector(self, create_sector_request: GetOrCreateSectorRequest) -> GetOrCreateSectorResponse:
-        async with Session() as session:
-            if not create_sector_request.sector_name:
-                return GetOrCreateSectorResponse(
-                    message=ResponseMessage(
-                        status_code=StatusCode.VALIDATION_ERROR,
-                        error_fields={"sector_name": strings.validation_error_required_field},
-                    ),
-                )
+    def __init__(
+        self,
+        sector_cache: Optional[LookupCache] = None,
+        cargo_type_cache: Optional[LookupCache] = None,
+        write_combine_window: Optional[float] = None,
+        write_combine_max_rows: int = 500,
+    ):
+        self.sector_cache = sector_cache if sector_cache is not None else LookupCache()
+        self.cargo_type_cache = cargo_type_cache if cargo_type_cache is not None else LookupCache()
+        # Concurrent creates of the same names share one database call instead of each taking a pooled connection.
+        self.sector_flights = SingleFlight()
+        self.cargo_type_flights = SingleFlight()
+        # With a window set, single planet and starship creates arriving within it are written in one statement.
+        self.planet_writes = None
+        self.starship_writes = None
+        if write_combine_window:
+            self.planet_writes = WriteCombiner(self._flush_planets, write_combine_window, write_combine_max_rows)
+            self.starship_writes = WriteCombiner(self._flush_starships, write_combine_window, write_combine_max_rows)
 
-            sector = await get_or_create_sector_db(
-                session=session,
-                sector_name=create_sector_request.sector_name,
-            )
+    def on_lookup_invalidation(self, payload: Optional[str]) -> None:
+        """Drop cached ids named by a ``planet_lookup_invalidation`` notification, or everything when ``payload`` is None."""
+        if payload is None:
+            self.sector_cache.clear()
+            self.cargo_type_cache.clear()
+            return
+
+        change = json.loads(payload)
+        cache = {"sector": self.sector_cache, "cargo_type": self.cargo_type_cache}.get(change["table"])
+        if cache is not None:
+            cache.invalidate(change["name"])
+
+    async def get_or_create_sector(self, create_sector_request: GetOrCreateSectorRequest) -> GetOrCreateSectorResponse:
+        sector_name = _normalise_name(create_sector_request.sector_name)
 
+        if not sector_name:
             return GetOrCreateSectorResponse(
-                message=ResponseMessage(status_code=StatusCode.SUCCESS),
-                sector_id=sector.sector_id,
+                message=ResponseMessage(
+                    status_code=StatusCode.VALIDATION_ERROR,
+                    error_fields={"sector_name": strings.validation_error_required_field},
+                ),
             )
 
-    async def create_planet(self, create_planet_request: "CreatePlanetRequest") -> "CreatePlanetResponse":
-        async with Session() as session:
-            errors = {}
-
-            if not create_planet_request.planet_name:
-                errors["planet_name"] = strings.validation_error_required_field
-            if not create_planet_request.sector_id:
-                errors["sector_id"] = strings.validation_error_required_field
-
-            if errors:
-                return CreatePlanetResponse(
-                    message=ResponseMessage(
-                        status_code=StatusCode.VALIDATION_ERROR,
-                        error_fields=errors,
-                    ),
-                )
+        sector_id = self.sector_cache.get(sector_name)
+
+        if sector_id is None:
+            sector_id = await self.sector_flights.do(sector_name, lambda: self._resolve_sector(sector_name))
+
+        return GetOrCreateSectorResponse(
+            message=ResponseMessage(status_code=StatusCode.SUCCESS),
+            sector_id=sector_id,
+        )
 
-            planet = await create_planet_db(
+    async def _resolve_sector(self, sector_name: str) -> int:
+        async with unit_of_work() as session:
+            sector = await get_or_create_sector_db(
                 session=session,
-                planet_name=create_planet_request.planet_name,
-                sector_id=create_planet_request.sector_id,
+                sector_name=sector_name,
             )
 
-            if not planet:
-                return CreatePlanetResponse(message=ResponseMessage(status_code=StatusCode.INTERNAL_ERROR))
+        self.sector_cache.put(sector_name, sector.sector_id)
+        return sector.sector_id
 
+    async def create_planet(self, create_planet_request: "CreatePlanetRequest") -> "CreatePlanetResponse":
+        errors = {}
+
+        if not create_planet_request.planet_name:
+            errors["planet_name"] = strings.validation_error_required_field
+        if not create_planet_request.sector_id:
+            errors["sector_id"] = strings.validation_error_required_field
+
+        if errors:
             return CreatePlanetResponse(
-                message=ResponseMessage(status_code=StatusCode.SUCCESS),
-                planet_id=planet.planet_id,
+                message=ResponseMessage(
+                    status_code=StatusCode.VALIDATION_ERROR,
+                    error_fields=errors,
+                ),
             )
 
-    async def bulk_create_cargo_type(self, bulk_create_cargo_type_request: "BulkCreateCargoTypeRequest") -> "BulkCreateCargoTypeResponse":
-        async with Session() as session:
-            if not bulk_create_cargo_type_request.cargo_names:
-                return BulkCreateCargoTypeResponse(
-                    message=ResponseMessage(
-                        status_code=StatusCode.VALIDATION_ERROR,
-                        error_fields={"cargo_names": strings.validation_error_required_field},
-                    ),
-                )
+        if self.planet_writes is not None:
+            planet = await self.planet_writes.submit(create_planet_request)
+        else:
+            planet = await self._create_planet(create_planet_request)
+
+        if not planet:
+            return CreatePlanetResponse(message=ResponseMessage(status_code=StatusCode.INTERNAL_ERROR))
 
-            cargos = await bulk_create_cargo_type(
+        return CreatePlanetResponse(
+            message=ResponseMessage(status_code=StatusCode.SUCCESS),
+            planet_id=planet.planet_id,
+        )
+
+    @staticmethod
+    async def _create_planet(create_planet_request: "CreatePlanetRequest"):
+        async with unit_of_work() as session:
+            return await create_planet_db(
                 session=session,
-                cargo_names=bulk_create_cargo_type_request.cargo_names,
+                planet_name=create_planet_request.planet_name,
+                sector_id=create_planet_request.sector_id,
             )
 
-            if not cargos:
-                return BulkCreateCargoTypeResponse(message=ResponseMessage(status_code=StatusCode.ALREADY_EXISTS))
+    async def _flush_planets(self, requests: list["CreatePlanetRequest"]) -> list:
+        async with unit_of_work() as session:
+            planets = await bulk_create_planets_db(session, [(r.planet_name, r.sector_id) for r in requests])
+
+        results = []
+        for request, planet in zip(requests, planets):
+            if planet is None:
+                # Rows the batch rejected are replayed alone, so each caller sees what an uncombined create reports.
+                try:
+                    planet = await self._create_planet(request)
+                except Exception as exc:
+                    planet = exc
+            results.append(planet)
+        return results
+
+    async def bulk_create_cargo_type(self, bulk_create_cargo_type_request: "BulkCreateCargoTypeRequest") -> "BulkCreateCargoTypeResponse":
+        cargo_names = [_normalise_name(name) for name in bulk_create_cargo_type_request.cargo_names]
 
+        if not cargo_names or not all(cargo_names):
             return BulkCreateCargoTypeResponse(
                 message=ResponseMessage(
-                    status_code=StatusCode.SUCCESS,
+                    status_code=StatusCode.VALIDATION_ERROR,
+                    error_fields={"cargo_names": strings.validation_error_required_field},
                 ),
-                cargo_type_ids=[c.cargo_type_id for c in cargos],
             )
 
-    async def create_starship(self, create_starship_request: "CreateStarshipRequest") -> "CreateStarshipResponse":
-        async with Session() as session:
-            errors = {}
-
-            if not create_starship_request.starship_name:
-                errors["starship_name"] = strings.validation_error_required_field
-            if not create_starship_request.starship_model:
-                errors["starship_model"] = strings.validation_error_required_field
-            if not create_starship_request.planet_id:
-                errors["planet_id"] = strings.validation_error_required_field
-
-            if errors:
-                return CreateStarshipResponse(
-                    message=ResponseMessage(status_code=StatusCode.VALIDATION_ERROR, error_fields=errors),
-                )
+        cargo_type_ids = {name: self.cargo_type_cache.get(name) for name in dict.fromkeys(cargo_names)}
+
+        uncached_names = [name for name, cargo_type_id in cargo_type_ids.items() if cargo_type_id is None]
+        if uncached_names:
+            # Names another batch is already resolving are joined, and the rest are resolved together in one statement.
+            resolved = await self.cargo_type_flights.do_many(uncached_names, self._get_or_create_cargo_types)
+            cargo_type_ids.update(zip(uncached_names, resolved))
 
-            starship = await create_starship_db(
+        return BulkCreateCargoTypeResponse(
+            message=ResponseMessage(
+                status_code=StatusCode.SUCCESS,
+            ),
+            cargo_type_ids=[cargo_type_ids[name] for name in cargo_names],
+        )
+
+    async def _get_or_create_cargo_types(self, cargo_names: list[str]) -> list[int]:
+        async with unit_of_work() as session:
+            cargo_type_ids = await bulk_get_or_create_cargo_types_db(
                 session=session,
-                starship_name=create_starship_request.starship_name,
-                starship_model=create_starship_request.starship_model,
-                planet_id=create_starship_request.planet_id,
+                cargo_names=cargo_names,
             )
 
-            if not starship:
-                return CreateStarshipResponse(
-                    message=ResponseMessage(
-                        status_code=StatusCode.NOT_FOUND,
-                        status_message=strings.validation_error_planet_id_does_not_exist,
-                    ),
+        for name, cargo_type_id in zip(cargo_names, cargo_type_ids):
+            self.cargo_type_cache.put(name, cargo_type_id)
+        return cargo_type_ids
+
+    async def create_starship(self, create_starship_request: "CreateStarshipRequest") -> "CreateStarshipResponse":
+        errors = {}
+
+        if not create_starship_request.starship_name:
+            errors["starship_name"] = strings.validation_error_required_field
+        if not create_starship_request.starship_model:
+            errors["starship_model"] = strings.validation_error_required_field
+        if not create_starship_request.planet_id:
+            errors["planet_id"] = strings.validation_error_required_field
+
+        if errors:
+            return CreateStarshipResponse(
+                message=ResponseMessage(status_code=StatusCode.VALIDATION_ERROR, error_fields=errors),
+            )
+
+        if self.starship_writes is not None:
+            starship = await self.starship_writes.submit(create_starship_request)
+        else:
+            async with unit_of_work() as session:
+                starship = await create_starship_db(
+                    session=session,
+                    starship_name=create_starship_request.starship_name,
+                    starship_model=create_starship_request.starship_model,
+                    planet_id=create_starship_request.planet_id,
                 )
 
+        if not starship:
             return CreateStarshipResponse(
-                message=ResponseMessage(status_code=StatusCode.SUCCESS),
-                starship_id=starship.starship_id,
+                message=ResponseMessage(
+                    status_code=StatusCode.NOT_FOUND,
+                    status_message=strings.validation_error_planet_id_does_not_exist,
+                ),
             )
 
+        return CreateStarshipResponse(
+            message=ResponseMessage(status_code=StatusCode.SUCCESS),
+            starship_id=starship.starship_id,
+        )
+
+    @staticmethod
+    async def _flush_starships(requests: list["CreateStarshipRequest"]) -> list:
+        async with unit_of_work() as session:
+            return await bulk_create_starships_db(session, [(r.starship_name, r.starship_model, r.planet_id) for r in requests])
+
     async def bulk_create_manifest(self, bulk_create_manifest_request: "BulkCreateManifestRequest") -> "BulkCreateManifestResponse":
-        async with Session() as session:
-            errors = {}
-            if not bulk_create_manifest_request.manifests:
-                errors["manifests"] = strings.validation_error_required_field
-
-            if errors:
-                return BulkCreateManifestResponse(
-                    message=ResponseMessage(
-                        status_code=StatusCode.VALIDATION_ERROR,
-                        error_fields=errors,
+        errors = {}
+        if not bulk_create_manifest_request.manifests:
+            errors["manifests"] = strings.validation_error_required_field
+
+        if errors:
+            return BulkCreateManifestResponse(
+                message=ResponseMessage(
+                    status_code=StatusCode.VALIDATION_ERROR,
+                    error_fields=errors,
+                ),
+            )
+
+        try:
+            manifest = await run_transaction(lambda session: bulk_create_manifest(session=session, manifests=bulk_create_manifest_request.manifests))
+        except DBAPIError as exc:
+            message = _manifest_write_error(exc)
+            if message is None:
+                raise
+            return BulkCreateManifestResponse(message=message)
+
+        # The rows come back one per distinct key in key order, while clients match ids to their manifests by position.
+        manifest_ids = {(m.starship_id, m.cargo_type_id): m.manifest_id for m in manifest}
+        return BulkCreateManifestResponse(
+            message=ResponseMessage(status_code=StatusCode.SUCCESS),
+            manifest_id=[manifest_ids[m.starship_id, m.cargo_type_id] for m in bulk_create_manifest_request.manifests],
+        )
+
+    async def stream_manifests(self, bulk_create_manifest_request_iterator: AsyncIterator["BulkCreateManifestRequest"]) -> "StreamManifestsResponse":
+        chunk_row_counts = []
+
+        async for chunk in bulk_create_manifest_request_iterator:
+            # Each chunk is its own transaction, so chunks before a bad one stay written.
+            try:
+                row_count = await run_transaction(lambda session: copy_manifest_chunk(session=session, manifests=chunk.manifests))
+            except DBAPIError as exc:
+                message = _manifest_write_error(exc)
+                if message is None:
+                    raise
+                return StreamManifestsResponse(
+                    message=message,
+                    chunk_row_counts=chunk_row_counts,
+                    total_row_count=sum(chunk_row_counts),
+                )
+
+            chunk_row_counts.append(row_count)
+
+        if not any(chunk_row_counts):
+            return StreamManifestsResponse(
+                message=ResponseMessage(
+                    status_code=StatusCode.VALIDATION_ERROR,
+                    error_fields={"manifests": strings.validation_error_required_field},
+                ),
+                chunk_row_counts=chunk_row_counts,
+            )
+
+        return StreamManifestsResponse(
+            message=ResponseMessage(status_code=StatusCode.SUCCESS),
+            chunk_row_counts=chunk_row_counts,
+            total_row_count=sum(chunk_row_counts),
+        )
+
+    async def onboard_fleet(self, onboard_fleet_request: "OnboardFleetRequest") -> "OnboardFleetResponse":
+        """Create a sector's planets, their starships and the starships' cargo in one transaction, or nothing at all."""
+        sector_name = _normalise_name(onboard_fleet_request.sector_name)
+        fleet = onboard_fleet_request.planets
+        errors = {}
+
+        if not sector_name:
+            errors["sector_name"] = strings.validation_error_required_field
+        if not fleet:
+            errors["planets"] = strings.validation_error_required_field
+        elif not all(p.planet_name and all(s.starship_name and s.starship_model for s in p.starships) for p in fleet):
+            errors["planets"] = strings.validation_error_fleet_names_required
+
+        if errors:
+            return OnboardFleetResponse(message=ResponseMessage(status_code=StatusCode.VALIDATION_ERROR, error_fields=errors))
+
+        async def write(session):
+            sector = await get_or_create_sector_db(session=session, sector_name=sector_name)
+
+            planets = await bulk_create_planets_db(session, [(p.planet_name, sector.sector_id) for p in fleet])
+            if None in planets:
+                # Leaving the unit of work by raising rolls back the sector and the planets already inserted.
+                raise _FleetRejected(
+                    ResponseMessage(
+                        status_code=StatusCode.ALREADY_EXISTS,
+                        status_message=strings.validation_error_planet_name_exists,
                     ),
                 )
 
-            manifest = await bulk_create_manifest(
+            fleet_starships = [(planet, s) for planet, p in zip(planets, fleet) for s in p.starships]
+            starships = await bulk_create_starships_db(session, [(s.starship_name, s.starship_model, planet.planet_id) for planet, s in fleet_starships])
+
+            await bulk_create_manifest(
                 session=session,
-                manifests=bulk_create_manifest_request.manifests,
+                manifests=[
+                    ManifestObject(starship_id=starship.starship_id, cargo_type_id=cargo.cargo_type_id, quantity=cargo.quantity)
+                    for starship, (_, s) in zip(starships, fleet_starships)
+                    for cargo in s.cargo
+                ],
             )
+            return sector, planets, starships
 
-            if not manifest:
-                return BulkCreateManifestResponse(
-                    message=ResponseMessage(
-                        status_code=StatusCode.NOT_FOUND,
-                        status_message=strings.validation_error_invalid_starship_or_cargo_type,
-                    ),
+        try:
+            # The manifests upsert the same rows as BulkCreateManifest, so a deadlock with a concurrent write starts over.
+            sector, planets, starships = await run_transaction(write)
+        except _FleetRejected as rejected:
+            return OnboardFleetResponse(message=rejected.message)
+        except DBAPIError as exc:
+            message = _fleet_write_error(exc)
+            if message is None:
+                raise
+            return OnboardFleetResponse(message=message)
+
+        self.sector_cache.put(sector_name, sector.sector_id)
+
+        return OnboardFleetResponse(
+            message=ResponseMessage(status_code=StatusCode.SUCCESS),
+            sector_id=sector.sector_id,
+            planet_ids=[p.planet_id for p in planets],
+            starship_ids=[s.starship_id for s in starships],
+        )
+
+    async def set_scarce_cargo_type(self, set_scarce_cargo_type_request: "SetScarceCargoTypeRequest") -> "SetScarceCargoTypeResponse":
+        if not set_scarce_cargo_type_request.planet_id:
+            return SetScarceCargoTypeResponse(
+                message=ResponseMessage(status_code=StatusCode.VALIDATION_ERROR, error_fields={"planet_id": strings.validation_error_required_field}),
+            )
+
+        try:
+            async with unit_of_work() as session:
+                planet_id = await set_scarce_cargo_type_db(
+                    session=session,
+                    planet_id=set_scarce_cargo_type_request.planet_id,
+                    cargo_type_id=set_scarce_cargo_type_request.cargo_type_id or None,
                 )
+        except IntegrityError:
+            return SetScarceCargoTypeResponse(
+                message=ResponseMessage(status_code=StatusCode.NOT_FOUND, status_message=strings.validation_error_cargo_type_id_does_not_exist),
+            )
 
-            return BulkCreateManifestResponse(
-                message=ResponseMessage(status_code=StatusCode.SUCCESS),
-                manifest_id=[m.manifest_id for m in manifest],
+        if planet_id is None:
+            return SetScarceCargoTypeResponse(
+                message=ResponseMessage(status_code=StatusCode.NOT_FOUND, status_message=strings.validation_error_planet_id_does_not_exist),
+            )
+
+        return SetScarceCargoTypeResponse(message=ResponseMessage(status_code=StatusCode.SUCCESS))
+
+    async def submit_bulk_create_manifest(self, bulk_create_manifest_request: "BulkCreateManifestRequest") -> "SubmitJobResponse":
+        if not bulk_create_manifest_request.manifests:
+            return SubmitJobResponse(
+                message=ResponseMessage(status_code=StatusCode.VALIDATION_ERROR, error_fields={"manifests": strings.validation_error_required_field}),
+            )
+
+        return await self._submit_job(JobType.BULK_CREATE_MANIFEST, bulk_create_manifest_request, len(bulk_create_manifest_request.manifests))
+
+    async def submit_bulk_create_cargo_type(self, bulk_create_cargo_type_request: "BulkCreateCargoTypeRequest") -> "SubmitJobResponse":
+        cargo_names = [_normalise_name(name) for name in bulk_create_cargo_type_request.cargo_names]
+
+        if not cargo_names or not all(cargo_names):
+            return SubmitJobResponse(
+                message=ResponseMessage(status_code=StatusCode.VALIDATION_ERROR, error_fields={"cargo_names": strings.validation_error_required_field}),
+            )
+
+        return await self._submit_job(JobType.BULK_CREATE_CARGO_TYPE, BulkCreateCargoTypeRequest(cargo_names=cargo_names), len(cargo_names))
+
+    @staticmethod
+    async def _submit_job(job_type: JobType, request, total_items: int) -> "SubmitJobResponse":
+        async with unit_of_work() as session:
+            job_id = await submit_job(session=session, job_type=job_type, payload=bytes(request), total_items=total_items)
+
+        return SubmitJobResponse(message=ResponseMessage(status_code=StatusCode.SUCCESS), job_id=job_id)
+
+    async def get_job_status(self, get_job_status_request: "GetJobStatusRequest") -> "GetJobStatusResponse":
+        if not get_job_status_request.job_id:
+            return GetJobStatusResponse(
+                message=ResponseMessage(status_code=StatusCode.VALIDATION_ERROR, error_fields={"job_id": strings.validation_error_required_field}),
             )
+
+        # Read from the primary, since clients poll a job straight after submitting it.
+        async with unit_of_work() as session:
+            job = await get_job_db(session=session, job_id=get_job_status_request.job_id)
+
+        if job is None:
+            return GetJobStatusResponse(
+                message=ResponseMessage(status_code=StatusCode.NOT_FOUND, status_message=strings.validation_error_job_id_does_not_exist),
+            )
+
+        return GetJobStatusResponse(
+            message=ResponseMessage(status_code=StatusCode.SUCCESS),
+            job_type=JobType(job.job_type),
+            state=JobState(job.state),
+            total_items=job.total_items,
+            completed_items=job.completed_items,
+            outcome=ResponseMessage().parse(job.outcome) if job.outcome is not None else None,
+            cargo_type_ids=job.result_ids,
+        )
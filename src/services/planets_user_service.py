@@ -1,11 +1,77 @@
-from src.generated.co.za.planet import PlanetUserBase, MoveStarshipResponse, MoveStarshipRequest, ResponseMessage, StatusCode
-from src.resources.database.config import Session
-from src.resources.database.planets_user_queries import move_starship_to_planet
+from typing import AsyncIterator, Optional
+
+from src.generated.co.za.planet import (
+    PlanetUserBase,
+    MoveStarshipResponse,
+    MoveStarshipRequest,
+    ResponseMessage,
+    StatusCode,
+    ListPlanetsRequest,
+    ListPlanetsResponse,
+    ListStarshipsRequest,
+    ListStarshipsResponse,
+    PlanetObject,
+    StarshipObject,
+    BulkMoveStarshipsRequest,
+    BulkMoveStarshipsResponse,
+    StarshipMoveResult,
+    GetPlanetInventoryRequest,
+    GetPlanetInventoryResponse,
+    GetSectorInventoryRequest,
+    GetSectorInventoryResponse,
+    InventoryObject,
+    FindSuppliersRequest,
+    FindSuppliersResponse,
+    FindAllSuppliersRequest,
+    FindAllSuppliersResponse,
+    PlanetSuppliers,
+    SupplierObject,
+    WatchChangesRequest,
+    WatchChangesResponse,
+    ChangeCursor,
+    ChangeEventObject,
+    ChangeType,
+)
+from src.resources.change_feed import ChangeFeed
+from src.resources.database.change_queries import read_changes
+from src.resources.database.config import read_session, unit_of_work
+from src.resources.database.retry import run_transaction
+from src.resources.database.planets_user_queries import (
+    move_starship_to_planet,
+    bulk_move_starships,
+    stream_planets,
+    stream_starships,
+    sector_exists_db,
+    planet_exists_db,
+    get_planet_inventory_db,
+    get_sector_inventory_db,
+    find_suppliers_db,
+    stream_supplier_matches,
+)
 
 from src.strings import en_za as strings
 
+DEFAULT_PAGE_SIZE = 500
+MAX_PAGE_SIZE = 5000
+DEFAULT_SUPPLIER_LIMIT = 10
+MAX_SUPPLIER_LIMIT = 100
+# How soon a change stream looks again when committed events wait behind a transaction that is still running.
+HELD_BACK_RETRY_DELAY = 0.1
+
+
+def _suppliers(rows) -> list[SupplierObject]:
+    """Supplier objects for one planet's rows, skipping the placeholder row of a planet nothing supplies."""
+    return [
+        SupplierObject(starship_id=r.starship_id, planet_id=r.supplier_planet_id, quantity=r.quantity, same_sector=r.same_sector)
+        for r in rows
+        if r.starship_id is not None
+    ]
+
 
 class PlanetsUserService(PlanetUserBase):
+    def __init__(self, change_feed: Optional[ChangeFeed] = None):
+        self.change_feed = change_feed if change_feed is not None else ChangeFeed()
+
     async def move_starship(self, move_starship_request: "MoveStarshipRequest") -> "MoveStarshipResponse":
         errors = {}
 
@@ -17,14 +83,268 @@ class PlanetsUserService(PlanetUserBase):
         if errors:
             return MoveStarshipResponse(message=ResponseMessage(status_code=StatusCode.VALIDATION_ERROR))
 
-        async with Session() as session:
-            starship = await move_starship_to_planet(
+        starship = await run_transaction(
+            lambda session: move_starship_to_planet(
                 session=session,
                 starship_id=move_starship_request.starship_id,
                 planet_id=move_starship_request.planet_id,
             )
+        )
+
+        if not starship:
+            return MoveStarshipResponse(message=ResponseMessage(status_code=StatusCode.NOT_FOUND))
+
+        return MoveStarshipResponse(message=ResponseMessage(status_code=StatusCode.SUCCESS))
+
+    async def bulk_move_starships(self, bulk_move_starships_request: "BulkMoveStarshipsRequest") -> "BulkMoveStarshipsResponse":
+        errors = {}
+
+        if not bulk_move_starships_request.moves:
+            errors["moves"] = strings.validation_error_required_field
+        elif not all(m.starship_id and m.planet_id for m in bulk_move_starships_request.moves):
+            errors["moves"] = strings.validation_error_move_ids_required
+
+        if errors:
+            return BulkMoveStarshipsResponse(message=ResponseMessage(status_code=StatusCode.VALIDATION_ERROR, error_fields=errors))
+
+        # A ship listed more than once is moved to its last destination.
+        moves = {m.starship_id: m.planet_id for m in bulk_move_starships_request.moves}
+
+        # Moves update the same inventory rows as manifest writes, so a deadlock between them is retried.
+        outcomes = await run_transaction(lambda session: bulk_move_starships(session=session, moves=moves))
+
+        return BulkMoveStarshipsResponse(
+            message=ResponseMessage(status_code=StatusCode.SUCCESS),
+            results=[
+                StarshipMoveResult(starship_id=starship_id, planet_id=planet_id, outcome=outcomes[starship_id]) for starship_id, planet_id in moves.items()
+            ],
+        )
+
+    async def list_planets(self, list_planets_request: "ListPlanetsRequest") -> AsyncIterator["ListPlanetsResponse"]:
+        errors = {}
+
+        if not list_planets_request.sector_id:
+            errors["sector_id"] = strings.validation_error_required_field
+        if not 0 <= list_planets_request.page_size <= MAX_PAGE_SIZE:
+            errors["page_size"] = strings.validation_error_page_size_out_of_range
+
+        if errors:
+            yield ListPlanetsResponse(message=ResponseMessage(status_code=StatusCode.VALIDATION_ERROR, error_fields=errors))
+            return
+
+        streamed = False
+        last_planet_id = list_planets_request.after_planet_id
+        async with read_session() as session:
+            async for page in stream_planets(
+                session=session,
+                sector_id=list_planets_request.sector_id,
+                after_planet_id=list_planets_request.after_planet_id,
+                page_size=list_planets_request.page_size or DEFAULT_PAGE_SIZE,
+            ):
+                yield ListPlanetsResponse(
+                    message=ResponseMessage(status_code=StatusCode.SUCCESS),
+                    planets=[
+                        PlanetObject(
+                            planet_id=p.planet_id,
+                            name=p.name,
+                            sector_id=p.sector_id,
+                            scarce_cargo_type_id=p.scarce_cargo_type_id or 0,
+                        )
+                        for p in page
+                    ],
+                    last_planet_id=page[-1].planet_id,
+                )
+                streamed = True
+                last_planet_id = page[-1].planet_id
+
+            found = streamed or await sector_exists_db(session=session, sector_id=list_planets_request.sector_id)
+
+        # The stream always ends with a message carrying its status and no planets, so a client can tell an empty or
+        # unknown sector apart from a stream that failed before it finished.
+        if not found:
+            yield ListPlanetsResponse(
+                message=ResponseMessage(status_code=StatusCode.NOT_FOUND, status_message=strings.validation_error_sector_id_does_not_exist),
+                last_planet_id=last_planet_id,
+            )
+            return
+        yield ListPlanetsResponse(message=ResponseMessage(status_code=StatusCode.SUCCESS), last_planet_id=last_planet_id)
+
+    async def list_starships(self, list_starships_request: "ListStarshipsRequest") -> AsyncIterator["ListStarshipsResponse"]:
+        errors = {}
+
+        if not list_starships_request.sector_id and not list_starships_request.planet_id:
+            errors["sector_id"] = strings.validation_error_sector_or_planet_required
+            errors["planet_id"] = strings.validation_error_sector_or_planet_required
+        if not 0 <= list_starships_request.page_size <= MAX_PAGE_SIZE:
+            errors["page_size"] = strings.validation_error_page_size_out_of_range
+
+        if errors:
+            yield ListStarshipsResponse(message=ResponseMessage(status_code=StatusCode.VALIDATION_ERROR, error_fields=errors))
+            return
+
+        streamed = False
+        last_starship_id = list_starships_request.after_starship_id
+        async with read_session() as session:
+            async for page in stream_starships(
+                session=session,
+                after_starship_id=list_starships_request.after_starship_id,
+                page_size=list_starships_request.page_size or DEFAULT_PAGE_SIZE,
+                planet_id=list_starships_request.planet_id,
+                sector_id=list_starships_request.sector_id,
+            ):
+                yield ListStarshipsResponse(
+                    message=ResponseMessage(status_code=StatusCode.SUCCESS),
+                    starships=[
+                        StarshipObject(
+                            starship_id=s.starship_id,
+                            name=s.name,
+                            model=s.model,
+                            planet_id=s.planet_id,
+                        )
+                        for s in page
+                    ],
+                    last_starship_id=page[-1].starship_id,
+                )
+                streamed = True
+                last_starship_id = page[-1].starship_id
+
+            missing = None
+            if not streamed:
+                if list_starships_request.planet_id and not await planet_exists_db(session=session, planet_id=list_starships_request.planet_id):
+                    missing = strings.validation_error_planet_id_does_not_exist
+                elif list_starships_request.sector_id and not await sector_exists_db(session=session, sector_id=list_starships_request.sector_id):
+                    missing = strings.validation_error_sector_id_does_not_exist
+
+        # As with ListPlanets, the last message carries the stream's status and no starships.
+        if missing:
+            yield ListStarshipsResponse(
+                message=ResponseMessage(status_code=StatusCode.NOT_FOUND, status_message=missing),
+                last_starship_id=last_starship_id,
+            )
+            return
+        yield ListStarshipsResponse(message=ResponseMessage(status_code=StatusCode.SUCCESS), last_starship_id=last_starship_id)
+
+    async def get_planet_inventory(self, get_planet_inventory_request: "GetPlanetInventoryRequest") -> "GetPlanetInventoryResponse":
+        if not get_planet_inventory_request.planet_id:
+            return GetPlanetInventoryResponse(
+                message=ResponseMessage(status_code=StatusCode.VALIDATION_ERROR, error_fields={"planet_id": strings.validation_error_required_field}),
+            )
+
+        async with read_session() as session:
+            inventory = await get_planet_inventory_db(session=session, planet_id=get_planet_inventory_request.planet_id)
+
+        return GetPlanetInventoryResponse(
+            message=ResponseMessage(status_code=StatusCode.SUCCESS),
+            inventory=[InventoryObject(cargo_type_id=i.cargo_type_id, quantity=i.quantity) for i in inventory],
+        )
+
+    async def get_sector_inventory(self, get_sector_inventory_request: "GetSectorInventoryRequest") -> "GetSectorInventoryResponse":
+        if not get_sector_inventory_request.sector_id:
+            return GetSectorInventoryResponse(
+                message=ResponseMessage(status_code=StatusCode.VALIDATION_ERROR, error_fields={"sector_id": strings.validation_error_required_field}),
+            )
+
+        async with read_session() as session:
+            inventory = await get_sector_inventory_db(session=session, sector_id=get_sector_inventory_request.sector_id)
+
+        return GetSectorInventoryResponse(
+            message=ResponseMessage(status_code=StatusCode.SUCCESS),
+            inventory=[InventoryObject(cargo_type_id=i.cargo_type_id, quantity=i.quantity) for i in inventory],
+        )
+
+    async def find_suppliers(self, find_suppliers_request: "FindSuppliersRequest") -> "FindSuppliersResponse":
+        errors = {}
+
+        if not find_suppliers_request.planet_id:
+            errors["planet_id"] = strings.validation_error_required_field
+        if not 0 <= find_suppliers_request.limit <= MAX_SUPPLIER_LIMIT:
+            errors["limit"] = strings.validation_error_supplier_limit_out_of_range
+
+        if errors:
+            return FindSuppliersResponse(message=ResponseMessage(status_code=StatusCode.VALIDATION_ERROR, error_fields=errors))
+
+        async with read_session() as session:
+            rows = await find_suppliers_db(
+                session=session,
+                planet_id=find_suppliers_request.planet_id,
+                supplier_limit=find_suppliers_request.limit or DEFAULT_SUPPLIER_LIMIT,
+            )
+
+        if not rows:
+            return FindSuppliersResponse(
+                message=ResponseMessage(status_code=StatusCode.NOT_FOUND, status_message=strings.validation_error_planet_id_does_not_exist),
+            )
+
+        return FindSuppliersResponse(
+            message=ResponseMessage(status_code=StatusCode.SUCCESS),
+            scarce_cargo_type_id=rows[0].scarce_cargo_type_id or 0,
+            suppliers=_suppliers(rows),
+        )
+
+    async def find_all_suppliers(self, find_all_suppliers_request: "FindAllSuppliersRequest") -> AsyncIterator["FindAllSuppliersResponse"]:
+        errors = {}
+
+        if not 0 <= find_all_suppliers_request.limit <= MAX_SUPPLIER_LIMIT:
+            errors["limit"] = strings.validation_error_supplier_limit_out_of_range
+        if not 0 <= find_all_suppliers_request.page_size <= MAX_PAGE_SIZE:
+            errors["page_size"] = strings.validation_error_page_size_out_of_range
+
+        if errors:
+            yield FindAllSuppliersResponse(message=ResponseMessage(status_code=StatusCode.VALIDATION_ERROR, error_fields=errors))
+            return
+
+        async with read_session() as session:
+            async for page in stream_supplier_matches(
+                session=session,
+                after_planet_id=find_all_suppliers_request.after_planet_id,
+                supplier_limit=find_all_suppliers_request.limit or DEFAULT_SUPPLIER_LIMIT,
+                page_size=find_all_suppliers_request.page_size or DEFAULT_PAGE_SIZE,
+            ):
+                yield FindAllSuppliersResponse(
+                    message=ResponseMessage(status_code=StatusCode.SUCCESS),
+                    planets=[
+                        PlanetSuppliers(planet_id=rows[0].planet_id, scarce_cargo_type_id=rows[0].scarce_cargo_type_id, suppliers=_suppliers(rows))
+                        for rows in page
+                    ],
+                    last_planet_id=page[-1][0].planet_id,
+                )
+
+    async def watch_changes(self, watch_changes_request: "WatchChangesRequest") -> AsyncIterator["WatchChangesResponse"]:
+        if not 0 <= watch_changes_request.page_size <= MAX_PAGE_SIZE:
+            yield WatchChangesResponse(
+                message=ResponseMessage(status_code=StatusCode.VALIDATION_ERROR, error_fields={"page_size": strings.validation_error_page_size_out_of_range}),
+            )
+            return
+
+        page_size = watch_changes_request.page_size or DEFAULT_PAGE_SIZE
+        cursor = watch_changes_request.after or ChangeCursor()
+
+        while True:
+            wakeup = self.change_feed.wakeup()
+            # The outbox is read on the primary, whose notifications woke the stream; a lagging replica could miss them.
+            async with unit_of_work() as session:
+                events, held_back = await read_changes(session, cursor.transaction_id, cursor.change_event_id, page_size)
 
-            if not starship:
-                return MoveStarshipResponse(message=ResponseMessage(status_code=StatusCode.NOT_FOUND))
+            if events:
+                cursor = ChangeCursor(transaction_id=events[-1].transaction_id, change_event_id=events[-1].change_event_id)
+                yield WatchChangesResponse(
+                    message=ResponseMessage(status_code=StatusCode.SUCCESS),
+                    events=[
+                        ChangeEventObject(
+                            change_event_id=e.change_event_id,
+                            change_type=ChangeType(e.change_type),
+                            starship_id=e.starship_id,
+                            planet_id=e.planet_id or 0,
+                            from_planet_id=e.from_planet_id or 0,
+                            cargo_type_id=e.cargo_type_id or 0,
+                            quantity=e.quantity or 0,
+                        )
+                        for e in events
+                    ],
+                    cursor=cursor,
+                )
+                if len(events) == page_size and not self.change_feed.closed:
+                    continue
 
-            return MoveStarshipResponse(message=ResponseMessage(status_code=StatusCode.SUCCESS))
+            if not await self.change_feed.wait(wakeup, HELD_BACK_RETRY_DELAY if held_back else None):
+                return
@@ -3,4 +3,18 @@ from typing import Final
 validation_error_required_field: Final[str] = "Field is required."
 validation_error_invalid_starship_or_cargo_type: Final[str] = "The starship id or cargo type id provided is invalid."
 validation_error_planet_id_does_not_exist: Final[str] = "The planet id does not exist."
+validation_error_sector_id_does_not_exist: Final[str] = "The sector id does not exist."
 validation_error_cargo_type_exists: Final[str] = "The cargo type name already exists."
+validation_error_sector_or_planet_required: Final[str] = "Either a sector id or a planet id is required."
+validation_error_page_size_out_of_range: Final[str] = "Page size must be between 1 and 5000, or 0 for the default."
+validation_error_supplier_limit_out_of_range: Final[str] = "Limit must be between 1 and 100, or 0 for the default."
+validation_error_move_ids_required: Final[str] = "Every move requires a starship id and a planet id."
+validation_error_fleet_names_required: Final[str] = "Every planet requires a name, and every starship a name and a model."
+validation_error_planet_name_exists: Final[str] = "A planet with this name already exists."
+validation_error_job_id_does_not_exist: Final[str] = "The job id does not exist."
+validation_error_cargo_type_id_does_not_exist: Final[str] = "A cargo type id provided does not exist."
+validation_error_manifest_quantity_out_of_range: Final[str] = "A manifest quantity would fall below zero or exceed the largest storable quantity."
+error_manifest_write_contention: Final[str] = "The manifests conflicted with concurrent writes too many times; try again."
+error_job_abandoned: Final[str] = "The job was interrupted too many times and has been abandoned."
+error_server_overloaded: Final[str] = "The server is too busy to finish this request before its deadline; try again later."
+error_server_draining: Final[str] = "The server is shutting down; try again."
@@ -8,7 +8,7 @@ from sqlalchemy import text
 from testing.postgresql import Postgresql
 
 from src.migrate import migrate as run_migrations
-from src.resources.database.config import Session, configure_database
+from src.resources.database.config import configure_database, dispose_database
 from src.resources.database.models import base_metadata
 
 
@@ -54,7 +54,9 @@ async def db_setup(event_loop_policy):
 
         yield test_db_url
     finally:
+        # Tests may reconfigure the database, so dispose of whichever engine is bound now as well as the original.
         await engine.dispose()
+        await dispose_database()
         if pg_database is not None:
             pg_database.stop(signal.SIGTERM)
 
@@ -67,3 +69,10 @@ async def planets_service(db_setup):
     from src.services.planets_admin_service import PlanetsService
 
     return PlanetsService()
+
+
+@pytest_asyncio.fixture(scope="session")
+async def planets_user_service(db_setup):
+    from src.services.planets_user_service import PlanetsUserService
+
+    return PlanetsUserService()
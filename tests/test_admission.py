@@ -0,0 +1,129 @@
+import asyncio
+import socket
+
+import pytest
+from grpclib.client import Channel
+from grpclib.const import Status
+from grpclib.exceptions import GRPCError
+from grpclib.metadata import Deadline
+from grpclib.server import Server
+
+from src.generated.co.za.planet import GetOrCreateSectorRequest, PlanetAdminStub, StatusCode
+from src.resources.admission import AdmissionController, MethodPolicy, Priority, admit_server, rpc_shed
+from src.server import method_policies
+
+
+async def _hold(controller: AdmissionController, method: str, started: list, release: asyncio.Event, deadline=None):
+    async with controller.admit(method, deadline):
+        started.append(method)
+        await release.wait()
+
+
+@pytest.mark.asyncio
+async def test_freed_slots_go_to_the_highest_priority_rpc_its_method_limit_allows():
+    controller = AdmissionController(2, {"bulk": MethodPolicy(Priority.BULK, concurrency=1), "batch": MethodPolicy(Priority.BATCH)})
+    started, releases = [], {name: asyncio.Event() for name in ("bulk", "move", "second bulk", "batch", "second move")}
+
+    running = [asyncio.create_task(_hold(controller, method, started, releases[name])) for name, method in (("bulk", "bulk"), ("move", "move"))]
+    await asyncio.sleep(0.01)
+    queued = [
+        asyncio.create_task(_hold(controller, method, started, releases[name]))
+        for name, method in (("second bulk", "bulk"), ("batch", "batch"), ("second move", "move"))
+    ]
+    await asyncio.sleep(0.01)
+    assert started == ["bulk", "move"]
+    assert controller.queued() == {Priority.INTERACTIVE: 1, Priority.BATCH: 1, Priority.BULK: 1}
+
+    # The interactive RPC queued last goes first.
+    releases["move"].set()
+    await asyncio.sleep(0.01)
+    assert started[2:] == ["move"]
+
+    # The second bulk RPC is older than the batch RPC, but may only run once the first has finished.
+    releases["second move"].set()
+    await asyncio.sleep(0.01)
+    assert started[3:] == ["batch"]
+
+    releases["bulk"].set()
+    await asyncio.sleep(0.01)
+    assert started[4:] == ["bulk"]
+
+    for release in releases.values():
+        release.set()
+    await asyncio.gather(*running, *queued)
+    assert controller.admitted == 0
+
+
+@pytest.mark.asyncio
+async def test_rpcs_that_cannot_meet_their_deadline_are_shed_before_queueing():
+    controller = AdmissionController(1, {}, max_queue=1)
+
+    # Teach the controller that the method holds its slot for about 50 ms.
+    async with controller.admit("slow"):
+        await asyncio.sleep(0.05)
+
+    started, release = [], asyncio.Event()
+    holder = asyncio.create_task(_hold(controller, "slow", started, release))
+    await asyncio.sleep(0.01)
+
+    shed = rpc_shed.value(method="slow", reason="deadline")
+    with pytest.raises(GRPCError) as exc:
+        async with controller.admit("slow", Deadline.from_timeout(0.02)):
+            pass
+    assert exc.value.status == Status.RESOURCE_EXHAUSTED
+    assert rpc_shed.value(method="slow", reason="deadline") == shed + 1
+
+    waiting = asyncio.create_task(_hold(controller, "slow", started, release, Deadline.from_timeout(5)))
+    await asyncio.sleep(0.01)
+    shed = rpc_shed.value(method="slow", reason="queue")
+    with pytest.raises(GRPCError):
+        async with controller.admit("slow"):
+            pass
+    assert rpc_shed.value(method="slow", reason="queue") == shed + 1
+
+    # A queued RPC that is cancelled gives up its place.
+    full = AdmissionController(0, {})
+    cancelled = asyncio.create_task(_hold(full, "slow", started, release))
+    await asyncio.sleep(0.01)
+    assert full.queued()[Priority.INTERACTIVE] == 1
+    cancelled.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await cancelled
+    assert full.queued()[Priority.INTERACTIVE] == 0
+
+    release.set()
+    await asyncio.gather(holder, waiting)
+    assert started == ["slow", "slow"]
+
+
+@pytest.mark.asyncio
+async def test_server_rejects_rpcs_with_resource_exhausted_when_shed(planets_service):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    method = "/co.za.planet.PlanetAdmin/GetOrCreateSector"
+    controller = AdmissionController(1, method_policies(bulk_concurrency=4), max_queue=0)
+    server = Server([planets_service])
+    admit_server(server, controller)
+    await server.start("127.0.0.1", port)
+
+    channel = Channel("127.0.0.1", port)
+    try:
+        admin = PlanetAdminStub(channel)
+        release = asyncio.Event()
+        holder = asyncio.create_task(_hold(controller, method, [], release))
+        await asyncio.sleep(0.01)
+
+        with pytest.raises(GRPCError) as exc:
+            await admin.get_or_create_sector(GetOrCreateSectorRequest(sector_name="Admission Sector"))
+        assert exc.value.status == Status.RESOURCE_EXHAUSTED
+
+        release.set()
+        await holder
+        response = await admin.get_or_create_sector(GetOrCreateSectorRequest(sector_name="Admission Sector"))
+        assert response.message.status_code == StatusCode.SUCCESS
+    finally:
+        channel.close()
+        server.close()
+        await server.wait_closed()
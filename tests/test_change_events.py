@@ -0,0 +1,134 @@
+import asyncio
+
+import pytest
+from grpclib.testing import ChannelFor
+
+from src.generated.co.za.planet import (
+    BulkCreateCargoTypeRequest,
+    BulkCreateManifestRequest,
+    BulkMoveStarshipsRequest,
+    ChangeCursor,
+    ChangeType,
+    CreatePlanetRequest,
+    CreateStarshipRequest,
+    GetOrCreateSectorRequest,
+    ManifestObject,
+    MoveStarshipRequest,
+    PlanetAdminStub,
+    PlanetUserStub,
+    StatusCode,
+    WatchChangesRequest,
+)
+from src.resources.change_feed import ChangeFeed
+from src.resources.database.change_queries import read_changes, record_moves
+from src.resources.database.config import session_maker, unit_of_work
+from src.resources.database.models import CHANGE_EVENT_CHANNEL
+from src.resources.database.notifications import NotificationListener
+from src.services.planets_user_service import PlanetsUserService
+from src.strings import en_za as strings
+
+
+async def _latest_cursor() -> ChangeCursor:
+    cursor = ChangeCursor()
+    while True:
+        async with unit_of_work() as session:
+            events, _ = await read_changes(session, cursor.transaction_id, cursor.change_event_id, 1000)
+        if not events:
+            return cursor
+        cursor = ChangeCursor(transaction_id=events[-1].transaction_id, change_event_id=events[-1].change_event_id)
+
+
+@pytest.mark.asyncio
+async def test_watch_changes_streams_moves_and_manifest_changes(db_setup, planets_service):
+    # Polling is slower than the test's timeout, so only a notification can deliver the events in time.
+    user_service = PlanetsUserService(ChangeFeed(poll_interval=60))
+    listener = NotificationListener(db_setup)
+    listener.subscribe(CHANGE_EVENT_CHANNEL, user_service.change_feed.notify)
+    listener.start()
+
+    try:
+        await asyncio.wait_for(listener.connected.wait(), timeout=5)
+
+        async with ChannelFor([planets_service, user_service]) as channel:
+            admin, user = PlanetAdminStub(channel), PlanetUserStub(channel)
+
+            sector_id = (await admin.get_or_create_sector(GetOrCreateSectorRequest(sector_name="Change Sector"))).sector_id
+            origin, destination = [
+                (await admin.create_planet(CreatePlanetRequest(planet_name=f"Change Planet {i}", sector_id=sector_id))).planet_id for i in range(2)
+            ]
+            ship = (await admin.create_starship(CreateStarshipRequest(starship_name="Change Ship", starship_model="Courier", planet_id=origin))).starship_id
+            (fuel,) = (await admin.bulk_create_cargo_type(BulkCreateCargoTypeRequest(cargo_names=["Change Fuel"]))).cargo_type_ids
+
+            invalid = [r async for r in user.watch_changes(WatchChangesRequest(page_size=-1))]
+            assert invalid[0].message.error_fields == {"page_size": strings.validation_error_page_size_out_of_range}
+
+            start = await _latest_cursor()
+            responses = []
+
+            async def watch():
+                async for response in user.watch_changes(WatchChangesRequest(after=start, page_size=2)):
+                    responses.append(response)
+                    if sum(len(r.events) for r in responses) == 3:
+                        return
+
+            watcher = asyncio.create_task(watch())
+            await asyncio.sleep(0.1)
+
+            manifests = [ManifestObject(starship_id=ship, cargo_type_id=fuel, quantity=q) for q in (2, 3)]
+            await admin.bulk_create_manifest(BulkCreateManifestRequest(manifests=manifests))
+            await user.move_starship(MoveStarshipRequest(starship_id=ship, planet_id=destination))
+            await user.bulk_move_starships(BulkMoveStarshipsRequest(moves=[MoveStarshipRequest(starship_id=ship, planet_id=origin)]))
+
+            await asyncio.wait_for(watcher, timeout=5)
+
+            assert all(r.message.status_code == StatusCode.SUCCESS for r in responses)
+            events = [e for r in responses for e in r.events]
+            assert [(e.change_type, e.starship_id, e.from_planet_id, e.planet_id, e.cargo_type_id, e.quantity) for e in events] == [
+                (ChangeType.MANIFEST_CHANGED, ship, 0, 0, fuel, 5),
+                (ChangeType.STARSHIP_MOVED, ship, origin, destination, 0, 0),
+                (ChangeType.STARSHIP_MOVED, ship, destination, origin, 0, 0),
+            ]
+
+            # Resuming from a response's cursor picks up after its last event.
+            resumed = user.watch_changes(WatchChangesRequest(after=responses[0].cursor)).__aiter__()
+            first = await asyncio.wait_for(resumed.__anext__(), timeout=5)
+            assert [e.change_event_id for e in first.events] == [e.change_event_id for e in events[len(responses[0].events) :]]
+
+            # Closing the feed ends open streams.
+            user_service.change_feed.close()
+            with pytest.raises(StopAsyncIteration):
+                await asyncio.wait_for(resumed.__anext__(), timeout=5)
+    finally:
+        await listener.stop()
+
+
+@pytest.mark.asyncio
+async def test_events_behind_a_running_transaction_are_held_back(db_setup, planets_service):
+    async with ChannelFor([planets_service]) as channel:
+        admin = PlanetAdminStub(channel)
+        sector_id = (await admin.get_or_create_sector(GetOrCreateSectorRequest(sector_name="Held Back Sector"))).sector_id
+        planet = (await admin.create_planet(CreatePlanetRequest(planet_name="Held Back Planet", sector_id=sector_id))).planet_id
+        ships = [
+            (await admin.create_starship(CreateStarshipRequest(starship_name=f"Held Back Ship {i}", starship_model="Courier", planet_id=planet))).starship_id
+            for i in range(2)
+        ]
+
+    start = await _latest_cursor()
+
+    # Held open across the unit of work below, which commits on a session of its own.
+    async with session_maker() as slow:
+        await record_moves(slow, [(ships[0], planet, planet)])
+
+        async with unit_of_work() as fast:
+            await record_moves(fast, [(ships[1], planet, planet)])
+
+        # The committed event waits behind the older transaction, which could still add events before it.
+        async with unit_of_work() as session:
+            assert await read_changes(session, start.transaction_id, start.change_event_id, 10) == ([], True)
+
+        await slow.commit()
+
+    async with unit_of_work() as session:
+        events, held_back = await read_changes(session, start.transaction_id, start.change_event_id, 10)
+    assert [e.starship_id for e in events] == ships
+    assert not held_back
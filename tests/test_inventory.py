@@ -0,0 +1,99 @@
+import pytest
+from grpclib.testing import ChannelFor
+from sqlalchemy import delete, update
+
+from src.generated.co.za.planet import (
+    BulkCreateCargoTypeRequest,
+    BulkCreateManifestRequest,
+    BulkMoveStarshipsRequest,
+    CreatePlanetRequest,
+    CreateStarshipRequest,
+    GetOrCreateSectorRequest,
+    GetPlanetInventoryRequest,
+    GetSectorInventoryRequest,
+    ManifestObject,
+    MoveStarshipRequest,
+    PlanetAdminStub,
+    PlanetUserStub,
+    StatusCode,
+)
+from src.resources.database.config import unit_of_work
+from src.resources.database.inventory_queries import rebuild_inventory
+from src.resources.database.models import PlanetInventory, SectorInventory
+from src.strings import en_za as strings
+
+
+async def _planet_inventory(user: PlanetUserStub, planet_id: int) -> dict[int, int]:
+    response = await user.get_planet_inventory(GetPlanetInventoryRequest(planet_id=planet_id))
+    assert response.message.status_code == StatusCode.SUCCESS
+    return {i.cargo_type_id: i.quantity for i in response.inventory}
+
+
+async def _sector_inventory(user: PlanetUserStub, sector_id: int) -> dict[int, int]:
+    response = await user.get_sector_inventory(GetSectorInventoryRequest(sector_id=sector_id))
+    assert response.message.status_code == StatusCode.SUCCESS
+    return {i.cargo_type_id: i.quantity for i in response.inventory}
+
+
+@pytest.mark.asyncio
+async def test_inventory_follows_manifest_writes_and_moves(planets_service, planets_user_service):
+    async with ChannelFor([planets_service, planets_user_service]) as channel:
+        admin, user = PlanetAdminStub(channel), PlanetUserStub(channel)
+
+        north = (await admin.get_or_create_sector(GetOrCreateSectorRequest(sector_name="Inventory North"))).sector_id
+        south = (await admin.get_or_create_sector(GetOrCreateSectorRequest(sector_name="Inventory South"))).sector_id
+        north_1, north_2, south_1 = [
+            (await admin.create_planet(CreatePlanetRequest(planet_name=name, sector_id=sector_id))).planet_id
+            for name, sector_id in (("Inventory North 1", north), ("Inventory North 2", north), ("Inventory South 1", south))
+        ]
+        ship_1, ship_2, ship_3 = [
+            (await admin.create_starship(CreateStarshipRequest(starship_name=f"Inventory Ship {i}", starship_model="Hauler", planet_id=planet_id))).starship_id
+            for i, planet_id in enumerate((north_1, north_1, south_1))
+        ]
+        fuel, ore = (await admin.bulk_create_cargo_type(BulkCreateCargoTypeRequest(cargo_names=["Inventory Fuel", "Inventory Ore"]))).cargo_type_ids
+
+        await admin.bulk_create_manifest(
+            BulkCreateManifestRequest(
+                [
+                    ManifestObject(starship_id=ship_1, cargo_type_id=fuel, quantity=5),
+                    ManifestObject(starship_id=ship_1, cargo_type_id=ore, quantity=3),
+                    ManifestObject(starship_id=ship_2, cargo_type_id=fuel, quantity=2),
+                ]
+            )
+        )
+        await admin.stream_manifests([BulkCreateManifestRequest([ManifestObject(starship_id=ship_3, cargo_type_id=fuel, quantity=4)])])
+
+        assert await _planet_inventory(user, north_1) == {fuel: 7, ore: 3}
+        assert await _sector_inventory(user, north) == {fuel: 7, ore: 3}
+        assert await _sector_inventory(user, south) == {fuel: 4}
+
+        # Within a sector, only the planet totals change.
+        await user.move_starship(MoveStarshipRequest(starship_id=ship_1, planet_id=north_2))
+        assert await _planet_inventory(user, north_1) == {fuel: 2}
+        assert await _planet_inventory(user, north_2) == {fuel: 5, ore: 3}
+        assert await _sector_inventory(user, north) == {fuel: 7, ore: 3}
+
+        await user.bulk_move_starships(
+            BulkMoveStarshipsRequest([MoveStarshipRequest(starship_id=ship_2, planet_id=south_1), MoveStarshipRequest(starship_id=ship_3, planet_id=north_1)])
+        )
+        assert await _planet_inventory(user, north_1) == {fuel: 4}
+        assert await _planet_inventory(user, south_1) == {fuel: 2}
+        assert await _sector_inventory(user, north) == {fuel: 9, ore: 3}
+        assert await _sector_inventory(user, south) == {fuel: 2}
+
+        invalid = await user.get_planet_inventory(GetPlanetInventoryRequest())
+        assert invalid.message.status_code == StatusCode.VALIDATION_ERROR
+        assert invalid.message.error_fields == {"planet_id": strings.validation_error_required_field}
+
+        async with unit_of_work() as session:
+            assert await rebuild_inventory(session) == (0, 0)
+
+        async with unit_of_work() as session:
+            await session.execute(update(PlanetInventory).where(PlanetInventory.planet_id == north_1).values(quantity=999))
+            await session.execute(delete(SectorInventory).where(SectorInventory.sector_id == south))
+
+        async with unit_of_work() as session:
+            assert await rebuild_inventory(session) == (1, 1)
+
+        assert await _planet_inventory(user, north_1) == {fuel: 4}
+        assert await _sector_inventory(user, south) == {fuel: 2}
@@ -0,0 +1,133 @@
+import asyncio
+
+import pytest
+from grpclib.testing import ChannelFor
+from sqlalchemy import select
+
+from src.generated.co.za.planet import (
+    BulkCreateCargoTypeRequest,
+    BulkCreateManifestRequest,
+    CreatePlanetRequest,
+    CreateStarshipRequest,
+    GetJobStatusRequest,
+    GetOrCreateSectorRequest,
+    JobState,
+    JobType,
+    ManifestObject,
+    PlanetAdminStub,
+    StatusCode,
+)
+from src.resources.database.config import unit_of_work
+from src.resources.database.job_queries import advance_job, claim_job, get_job_db
+from src.resources.database.models import Manifest
+from src.resources.job_runner import JobRunner, jobs_finished
+from src.services.planets_admin_service import JOB_HANDLERS
+from src.strings import en_za as strings
+
+
+async def _finished(admin: PlanetAdminStub, job_id: int):
+    while True:
+        status = await admin.get_job_status(GetJobStatusRequest(job_id=job_id))
+        if status.state in (JobState.SUCCEEDED, JobState.FAILED):
+            return status
+        await asyncio.sleep(0.01)
+
+
+@pytest.mark.asyncio
+async def test_submitted_jobs_run_in_chunks_and_report_progress(planets_service):
+    runner = JobRunner(JOB_HANDLERS, workers=2, chunk_size=2, poll_interval=0.05)
+    runner.start()
+
+    try:
+        async with ChannelFor([planets_service]) as channel:
+            admin = PlanetAdminStub(channel)
+
+            sector_id = (await admin.get_or_create_sector(GetOrCreateSectorRequest(sector_name="Job Sector"))).sector_id
+            planet_id = (await admin.create_planet(CreatePlanetRequest(planet_name="Job Planet", sector_id=sector_id))).planet_id
+            ship = (await admin.create_starship(CreateStarshipRequest(starship_name="Job Ship", starship_model="Hauler", planet_id=planet_id))).starship_id
+
+            # validation
+            invalid = await admin.submit_bulk_create_cargo_type(BulkCreateCargoTypeRequest(cargo_names=["Job Ore", " "]))
+            assert invalid.message.error_fields == {"cargo_names": strings.validation_error_required_field}
+            invalid = await admin.submit_bulk_create_manifest(BulkCreateManifestRequest())
+            assert invalid.message.error_fields == {"manifests": strings.validation_error_required_field}
+            invalid = await admin.get_job_status(GetJobStatusRequest())
+            assert invalid.message.error_fields == {"job_id": strings.validation_error_required_field}
+            missing = await admin.get_job_status(GetJobStatusRequest(job_id=999999))
+            assert missing.message.status_code == StatusCode.NOT_FOUND
+
+            # cargo types
+            cargo_names = [" Job Ore", "Job Fuel", "Job Ore", "Job Ice", "Job Gas"]
+            submitted = await admin.submit_bulk_create_cargo_type(BulkCreateCargoTypeRequest(cargo_names=cargo_names))
+            assert submitted.message.status_code == StatusCode.SUCCESS
+
+            cargo_job = await _finished(admin, submitted.job_id)
+            assert (cargo_job.job_type, cargo_job.state, cargo_job.outcome.status_code) == (
+                JobType.BULK_CREATE_CARGO_TYPE,
+                JobState.SUCCEEDED,
+                StatusCode.SUCCESS,
+            )
+            assert (cargo_job.total_items, cargo_job.completed_items) == (5, 5)
+            resolved = await admin.bulk_create_cargo_type(BulkCreateCargoTypeRequest(cargo_names=cargo_names))
+            assert cargo_job.cargo_type_ids == resolved.cargo_type_ids
+            ore, fuel = resolved.cargo_type_ids[:2]
+
+            # manifests
+            succeeded = jobs_finished.value(job_type=JobType.BULK_CREATE_MANIFEST.name, state=JobState.SUCCEEDED.name)
+            manifests = [ManifestObject(starship_id=ship, cargo_type_id=c, quantity=q) for c, q in ((ore, 1), (fuel, 2), (ore, 3), (fuel, 4), (ore, 5))]
+            submitted = await admin.submit_bulk_create_manifest(BulkCreateManifestRequest(manifests=manifests))
+
+            manifest_job = await _finished(admin, submitted.job_id)
+            assert (manifest_job.state, manifest_job.completed_items, manifest_job.cargo_type_ids) == (JobState.SUCCEEDED, 5, [])
+            assert jobs_finished.value(job_type=JobType.BULK_CREATE_MANIFEST.name, state=JobState.SUCCEEDED.name) == succeeded + 1
+
+            async with unit_of_work() as session:
+                quantities = (await session.execute(select(Manifest.cargo_type_id, Manifest.quantity).where(Manifest.starship_id == ship))).all()
+            assert dict(quantities) == {ore: 9, fuel: 6}
+
+            # A bad chunk fails the job with the synchronous RPC's message, and the chunks before it stay written.
+            manifests = [ManifestObject(starship_id=ship, cargo_type_id=ore, quantity=1)] * 2 + [
+                ManifestObject(starship_id=999999, cargo_type_id=ore, quantity=1)
+            ]
+            failed = await _finished(admin, (await admin.submit_bulk_create_manifest(BulkCreateManifestRequest(manifests=manifests))).job_id)
+            assert (failed.state, failed.completed_items) == (JobState.FAILED, 2)
+            assert failed.outcome.status_code == StatusCode.NOT_FOUND
+            assert failed.outcome.status_message == strings.validation_error_invalid_starship_or_cargo_type
+    finally:
+        await runner.stop(timeout=5)
+
+
+@pytest.mark.asyncio
+async def test_jobs_resume_after_a_lost_worker_and_are_released_at_shutdown(planets_service):
+    async with ChannelFor([planets_service]) as channel:
+        admin = PlanetAdminStub(channel)
+        cargo_names = [f"Resumed Cargo {i}" for i in range(4)]
+        job_id = (await admin.submit_bulk_create_cargo_type(BulkCreateCargoTypeRequest(cargo_names=cargo_names))).job_id
+
+        # A worker that writes one chunk and then dies without renewing its lease.
+        async with unit_of_work() as session:
+            lost = await claim_job(session, lease=0)
+        assert (lost.job_id, lost.attempts) == (job_id, 1)
+        async with unit_of_work() as session:
+            assert await advance_job(session, job_id, lost.attempts, 1, [123], lease=0)
+
+        # A worker shutting down hands the reclaimed job back to the queue before its next chunk.
+        stopping = JobRunner(JOB_HANDLERS, chunk_size=1)
+        stopping.closed = True
+        assert await stopping.run_next()
+        async with unit_of_work() as session:
+            released = await get_job_db(session, job_id)
+        assert (released.state, released.completed_items) == (JobState.QUEUED, 1)
+
+        runner = JobRunner(JOB_HANDLERS, chunk_size=1)
+        assert await runner.run_next()
+        assert not await runner.run_next()
+
+        # The lost worker's claim no longer counts once the job has been claimed again.
+        async with unit_of_work() as session:
+            assert not await advance_job(session, job_id, lost.attempts, 1, [456], lease=0)
+
+        status = await admin.get_job_status(GetJobStatusRequest(job_id=job_id))
+        resolved = await admin.bulk_create_cargo_type(BulkCreateCargoTypeRequest(cargo_names=cargo_names))
+        assert (status.state, status.completed_items) == (JobState.SUCCEEDED, 4)
+        assert status.cargo_type_ids == [123] + resolved.cargo_type_ids[1:]
@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+from grpclib.testing import ChannelFor
+from sqlalchemy import delete, insert, update
+
+from src.generated.co.za.planet import GetOrCreateSectorRequest, PlanetAdminStub, StatusCode, BulkCreateCargoTypeRequest
+from src.resources.database.config import session_maker
+from src.resources.database.models import LOOKUP_INVALIDATION_CHANNEL, CargoType, Sector
+from src.resources.database.notifications import NotificationListener
+from src.resources.lookup_cache import LookupCache
+from src.services.planets_admin_service import PlanetsService
+
+
+def test_lookup_cache_evicts_least_recently_used_and_expired():
+    cache = LookupCache(maxsize=2, ttl=60)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    assert cache.get("a") == 1
+
+    cache.put("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1
+    assert cache.stats() == {"hits": 2, "misses": 1, "size": 2}
+
+    expired = LookupCache(ttl=-1)
+    expired.put("a", 1)
+    assert expired.get("a") is None
+    assert len(expired) == 0
+
+
+@pytest.mark.asyncio
+async def test_get_or_create_sector_is_served_from_cache(db_setup):
+    service = PlanetsService()
+
+    async with ChannelFor([service]) as channel:
+        stub = PlanetAdminStub(channel)
+
+        first = await stub.get_or_create_sector(GetOrCreateSectorRequest(sector_name="Cached Sector"))
+        second = await stub.get_or_create_sector(GetOrCreateSectorRequest(sector_name="Cached Sector"))
+        assert first.sector_id == second.sector_id
+        assert service.sector_cache.stats() == {"hits": 1, "misses": 1, "size": 1}
+
+        created = await stub.bulk_create_cargo_type(BulkCreateCargoTypeRequest(cargo_names=["Cached Cargo"]))
+        assert created.message.status_code == StatusCode.SUCCESS
+        assert service.cargo_type_cache.get("Cached Cargo") == created.cargo_type_ids[0]
+
+        # Existing names resolve to their ids from the cache, without another round trip.
+        misses = service.cargo_type_cache.misses
+        again = await stub.bulk_create_cargo_type(BulkCreateCargoTypeRequest(cargo_names=["Cached Cargo"]))
+        assert again.message.status_code == StatusCode.SUCCESS
+        assert again.cargo_type_ids == created.cargo_type_ids
+        assert service.cargo_type_cache.misses == misses
+
+
+@pytest.mark.asyncio
+async def test_renaming_or_deleting_a_lookup_row_invalidates_cache(db_setup):
+    service = PlanetsService()
+    service.sector_cache.put("Stale Sector", 3)
+
+    listener = NotificationListener(db_setup)
+    listener.subscribe(LOOKUP_INVALIDATION_CHANNEL, service.on_lookup_invalidation)
+    listener.start()
+    try:
+        await asyncio.wait_for(listener.connected.wait(), timeout=5)
+        assert service.sector_cache.get("Stale Sector") is None
+
+        async with session_maker() as session:
+            sector_id = await session.scalar(insert(Sector).values(name="Renamed Sector").returning(Sector.sector_id))
+            cargo_type_id = await session.scalar(insert(CargoType).values(name="Deleted Cargo").returning(CargoType.cargo_type_id))
+            await session.commit()
+        service.sector_cache.put("Renamed Sector", sector_id)
+        service.cargo_type_cache.put("Deleted Cargo", cargo_type_id)
+        service.cargo_type_cache.put("Other Cargo", 2)
+
+        async with session_maker() as session:
+            await session.execute(update(Sector).where(Sector.sector_id == sector_id).values(name="Sector Renamed"))
+            await session.execute(delete(CargoType).where(CargoType.cargo_type_id == cargo_type_id))
+            await session.commit()
+
+        for _ in range(50):
+            if service.sector_cache.get("Renamed Sector") is None and service.cargo_type_cache.get("Deleted Cargo") is None:
+                break
+            await asyncio.sleep(0.05)
+
+        assert service.sector_cache.get("Renamed Sector") is None
+        assert service.cargo_type_cache.get("Deleted Cargo") is None
+        assert service.cargo_type_cache.get("Other Cargo") == 2
+    finally:
+        await listener.stop()
@@ -0,0 +1,113 @@
+import os
+import random
+import time
+
+import pytest
+from sqlalchemy import text
+
+from src.resources.database.config import session_maker
+from src.resources.database.models import MANIFEST_PARTITIONS
+
+ROWS = int(os.environ.get("BENCHMARK_MANIFEST_ROWS", 1_000_000))
+BATCH_SIZE = 5_000
+CARGO_TYPES = 20
+SCHEMA = "manifest_benchmark"
+
+# The same upsert bulk_create_manifest runs, against scratch tables without foreign keys so no fleet has to be seeded.
+UPSERT = """
+    INSERT INTO {table} (starship_id, cargo_type_id, quantity)
+    SELECT * FROM unnest(CAST(:starship_ids AS BIGINT[]), CAST(:cargo_type_ids AS BIGINT[]), CAST(:quantities AS BIGINT[]))
+    ON CONFLICT (starship_id, cargo_type_id) DO UPDATE SET quantity = {table}.quantity + excluded.quantity
+"""
+
+LARGEST_UNIQUE_INDEX = """
+    SELECT max(pg_relation_size(i.indexrelid))
+    FROM pg_index i
+    JOIN pg_class c ON c.oid = i.indrelid
+    WHERE i.indisunique AND c.relnamespace = CAST(:schema AS regnamespace)
+      AND coalesce(pg_partition_root(c.oid), c.oid) = CAST(:table AS regclass)
+      AND array_length(i.indkey, 1) = 2 AND c.relkind = 'r'
+"""
+
+
+def _create_tables() -> list[str]:
+    columns = """
+        manifest_id BIGINT GENERATED BY DEFAULT AS IDENTITY,
+        starship_id BIGINT NOT NULL,
+        cargo_type_id BIGINT NOT NULL,
+        quantity BIGINT NOT NULL,
+        UNIQUE (starship_id, cargo_type_id)
+    """
+    statements = [
+        f"DROP SCHEMA IF EXISTS {SCHEMA} CASCADE",
+        f"CREATE SCHEMA {SCHEMA}",
+        f"CREATE TABLE {SCHEMA}.unpartitioned ({columns}, PRIMARY KEY (manifest_id))",
+        f"CREATE TABLE {SCHEMA}.partitioned ({columns}, PRIMARY KEY (manifest_id, starship_id)) PARTITION BY HASH (starship_id)",
+    ]
+    statements += [
+        f"CREATE TABLE {SCHEMA}.partitioned_p{remainder} PARTITION OF {SCHEMA}.partitioned "
+        f"FOR VALUES WITH (MODULUS {MANIFEST_PARTITIONS}, REMAINDER {remainder})"
+        for remainder in range(MANIFEST_PARTITIONS)
+    ]
+    return statements
+
+
+def _batches(starship_count: int) -> list[dict]:
+    rows = [(starship_id, cargo_type_id) for starship_id in range(1, starship_count + 1) for cargo_type_id in range(1, CARGO_TYPES + 1)]
+    random.Random(17).shuffle(rows)
+    batches = []
+    for offset in range(0, len(rows), BATCH_SIZE):
+        batch = sorted(rows[offset : offset + BATCH_SIZE])
+        batches.append(
+            {
+                "starship_ids": [starship_id for starship_id, _ in batch],
+                "cargo_type_ids": [cargo_type_id for _, cargo_type_id in batch],
+                "quantities": [1] * len(batch),
+            }
+        )
+    return batches
+
+
+async def _load(session, table: str, batches: list[dict]) -> float:
+    upsert = text(UPSERT.format(table=f"{SCHEMA}.{table}"))
+    start = time.perf_counter()
+    for batch in batches:
+        await session.execute(upsert, batch)
+        await session.commit()
+    return sum(len(batch["starship_ids"]) for batch in batches) / (time.perf_counter() - start)
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_partitioned_manifest_upsert_throughput(db_setup):
+    batches = _batches(ROWS // CARGO_TYPES)
+
+    async with session_maker() as session:
+        for statement in _create_tables():
+            await session.execute(text(statement))
+        await session.commit()
+
+        try:
+            for table in ("unpartitioned", "partitioned"):
+                inserted = await _load(session, table, batches)
+                accumulated = await _load(session, table, batches)
+                await session.execute(text(f"ANALYZE {SCHEMA}.{table}"))
+                index_size = await session.scalar(text(LARGEST_UNIQUE_INDEX), {"schema": SCHEMA, "table": f"{SCHEMA}.{table}"})
+                await session.commit()
+                print(f"{table}: {inserted:,.0f} inserted rows/s, {accumulated:,.0f} accumulated rows/s, largest unique index {index_size / 2**20:.1f} MiB")
+
+            different = await session.scalar(
+                text(
+                    f"SELECT count(*) FROM ("
+                    f"(SELECT starship_id, cargo_type_id, quantity FROM {SCHEMA}.unpartitioned "
+                    f"EXCEPT SELECT starship_id, cargo_type_id, quantity FROM {SCHEMA}.partitioned) UNION ALL "
+                    f"(SELECT starship_id, cargo_type_id, quantity FROM {SCHEMA}.partitioned "
+                    f"EXCEPT SELECT starship_id, cargo_type_id, quantity FROM {SCHEMA}.unpartitioned)) AS difference"
+                )
+            )
+            assert different == 0
+            assert await session.scalar(text(f"SELECT count(*) FROM {SCHEMA}.partitioned WHERE quantity <> 2")) == 0
+        finally:
+            await session.rollback()
+            await session.execute(text(f"DROP SCHEMA {SCHEMA} CASCADE"))
+            await session.commit()
@@ -1,5 +1,8 @@
+import asyncio
+
 import pytest
 from grpclib.testing import ChannelFor
+from sqlalchemy import event, select
 
 from src.generated.co.za.planet import (
     GetOrCreateSectorRequest,
@@ -10,7 +13,14 @@ from src.generated.co.za.planet import (
     BulkCreateCargoTypeRequest,
     BulkCreateManifestRequest,
     ManifestObject,
+    OnboardFleetRequest,
+    FleetPlanet,
+    FleetStarship,
+    FleetCargo,
 )
+from src.resources.database.config import session_maker
+from src.resources.database.models import Manifest, Planet, StarShip
+from src.resources.database.retry import DEADLOCK_DETECTED, transaction_retries
 from src.strings import en_za as strings
 
 
@@ -39,6 +49,16 @@ async def test_create_planet(planets_service):
 
         create_cargo_type_success = await stub.bulk_create_cargo_type(BulkCreateCargoTypeRequest(cargo_names=cargo_names))
         assert create_cargo_type_success.message.status_code == StatusCode.SUCCESS
+        assert len(set(create_cargo_type_success.cargo_type_ids)) == len(cargo_names)
+
+        # Existing names come back with their ids alongside new ones, one id per name in request order.
+        planets_service.cargo_type_cache.clear()
+        resolve_cargo_types = await stub.bulk_create_cargo_type(BulkCreateCargoTypeRequest(cargo_names=["Cargo 2", "Cargo 4", "Cargo 2", "Cargo 1"]))
+        assert resolve_cargo_types.message.status_code == StatusCode.SUCCESS
+        cargo_1, cargo_2, _ = create_cargo_type_success.cargo_type_ids
+        assert resolve_cargo_types.cargo_type_ids[0] == resolve_cargo_types.cargo_type_ids[2] == cargo_2
+        assert resolve_cargo_types.cargo_type_ids[1] not in create_cargo_type_success.cargo_type_ids
+        assert resolve_cargo_types.cargo_type_ids[3] == cargo_1
 
         # planet
         create_empty_planet_response = await stub.create_planet(CreatePlanetRequest())
@@ -125,3 +145,195 @@ async def test_create_planet(planets_service):
             )
         )
         assert create_manifest_success_response.message.status_code == StatusCode.SUCCESS
+
+
+@pytest.mark.asyncio
+async def test_stream_manifests(planets_service):
+    async with ChannelFor([planets_service]) as channel:
+        stub = PlanetAdminStub(channel)
+
+        sector = await stub.get_or_create_sector(GetOrCreateSectorRequest(sector_name="Stream Sector"))
+        planet = await stub.create_planet(CreatePlanetRequest(planet_name="Stream Planet", sector_id=sector.sector_id))
+        starship = await stub.create_starship(CreateStarshipRequest(starship_name="Stream Ship", starship_model="Hauler", planet_id=planet.planet_id))
+        cargo = await stub.bulk_create_cargo_type(BulkCreateCargoTypeRequest(cargo_names=["Stream Cargo 1", "Stream Cargo 2"]))
+        cargo_1, cargo_2 = cargo.cargo_type_ids
+
+        empty_response = await stub.stream_manifests([BulkCreateManifestRequest()])
+        assert empty_response.message.status_code == StatusCode.VALIDATION_ERROR
+
+        chunks = [
+            BulkCreateManifestRequest(
+                [
+                    ManifestObject(starship_id=starship.starship_id, cargo_type_id=cargo_1, quantity=5),
+                    ManifestObject(starship_id=starship.starship_id, cargo_type_id=cargo_1, quantity=3),
+                    ManifestObject(starship_id=starship.starship_id, cargo_type_id=cargo_2, quantity=1),
+                ]
+            ),
+            BulkCreateManifestRequest([ManifestObject(starship_id=starship.starship_id, cargo_type_id=cargo_1, quantity=2)]),
+        ]
+        stream_response = await stub.stream_manifests(chunks)
+        assert stream_response.message.status_code == StatusCode.SUCCESS
+        assert stream_response.chunk_row_counts == [2, 1]
+        assert stream_response.total_row_count == 3
+
+        async with session_maker() as session:
+            quantities = dict(
+                (await session.execute(select(Manifest.cargo_type_id, Manifest.quantity).where(Manifest.starship_id == starship.starship_id))).all()
+            )
+        assert quantities == {cargo_1: 10, cargo_2: 1}
+
+        error_response = await stub.stream_manifests(
+            [
+                BulkCreateManifestRequest([ManifestObject(starship_id=starship.starship_id, cargo_type_id=cargo_2, quantity=1)]),
+                BulkCreateManifestRequest([ManifestObject(starship_id=starship.starship_id, cargo_type_id=999999, quantity=1)]),
+            ]
+        )
+        assert error_response.message.status_code == StatusCode.NOT_FOUND
+        assert error_response.chunk_row_counts == [1]
+
+
+@pytest.mark.asyncio
+async def test_onboard_fleet(planets_service):
+    async with ChannelFor([planets_service]) as channel:
+        stub = PlanetAdminStub(channel)
+
+        cargo_ids = (await stub.bulk_create_cargo_type(BulkCreateCargoTypeRequest(cargo_names=["Fleet Cargo 1", "Fleet Cargo 2"]))).cargo_type_ids
+
+        def fleet(planet_names, cargo_type_id):
+            return OnboardFleetRequest(
+                sector_name="Fleet Sector",
+                planets=[
+                    FleetPlanet(
+                        planet_name=name,
+                        starships=[
+                            FleetStarship(
+                                starship_name=f"{name} Ship {i}",
+                                starship_model="Fleet Model",
+                                cargo=[FleetCargo(cargo_type_id=cargo_type_id, quantity=2), FleetCargo(cargo_type_id=cargo_type_id, quantity=3)],
+                            )
+                            for i in range(2)
+                        ],
+                    )
+                    for name in planet_names
+                ],
+            )
+
+        invalid_response = await stub.onboard_fleet(OnboardFleetRequest(sector_name="Fleet Sector", planets=[FleetPlanet(planet_name="")]))
+        assert invalid_response.message.status_code == StatusCode.VALIDATION_ERROR
+        assert invalid_response.message.error_fields == {"planets": strings.validation_error_fleet_names_required}
+
+        response = await stub.onboard_fleet(fleet(["Fleet Planet 1", "Fleet Planet 2"], cargo_ids[0]))
+        assert response.message.status_code == StatusCode.SUCCESS
+        assert len(response.planet_ids) == 2
+        assert len(response.starship_ids) == 4
+
+        async with session_maker() as session:
+            quantities = (await session.scalars(select(Manifest.quantity).where(Manifest.starship_id.in_(response.starship_ids)))).all()
+        assert quantities == [5, 5, 5, 5]
+
+        # A bad cargo type on the last starship rolls back the new planet and every starship before it.
+        missing_cargo_response = await stub.onboard_fleet(fleet(["Fleet Planet 3"], 999999))
+        assert missing_cargo_response.message.status_code == StatusCode.NOT_FOUND
+        assert missing_cargo_response.message.status_message == strings.validation_error_cargo_type_id_does_not_exist
+
+        taken_name_response = await stub.onboard_fleet(fleet(["Fleet Planet 4", "Fleet Planet 1"], cargo_ids[1]))
+        assert taken_name_response.message.status_code == StatusCode.ALREADY_EXISTS
+        assert taken_name_response.message.status_message == strings.validation_error_planet_name_exists
+
+        # A quantity the manifest cannot hold is a validation error, not a missing cargo type.
+        negative_cargo = fleet(["Fleet Planet 5"], cargo_ids[1])
+        negative_cargo.planets[0].starships[0].cargo = [FleetCargo(cargo_type_id=cargo_ids[1], quantity=-1)]
+        negative_cargo_response = await stub.onboard_fleet(negative_cargo)
+        assert negative_cargo_response.message.status_code == StatusCode.VALIDATION_ERROR
+        assert negative_cargo_response.message.error_fields == {"planets": strings.validation_error_manifest_quantity_out_of_range}
+
+        async with session_maker() as session:
+            planet_names = set(await session.scalars(select(Planet.name).where(Planet.sector_id == response.sector_id)))
+            starship_count = len((await session.scalars(select(StarShip.starship_id).where(StarShip.model == "Fleet Model"))).all())
+        assert planet_names == {"Fleet Planet 1", "Fleet Planet 2"}
+        assert starship_count == 4
+
+
+@pytest.mark.asyncio
+async def test_concurrent_overlapping_manifests_merge_without_deadlocking(planets_service):
+    async with ChannelFor([planets_service]) as channel:
+        stub = PlanetAdminStub(channel)
+
+        sector = await stub.get_or_create_sector(GetOrCreateSectorRequest(sector_name="Contention Sector"))
+        planet = await stub.create_planet(CreatePlanetRequest(planet_name="Contention Planet", sector_id=sector.sector_id))
+        starships = [
+            (
+                await stub.create_starship(CreateStarshipRequest(starship_name=f"Contention Ship {i}", starship_model="Hauler", planet_id=planet.planet_id))
+            ).starship_id
+            for i in range(4)
+        ]
+        cargo = await stub.bulk_create_cargo_type(BulkCreateCargoTypeRequest(cargo_names=[f"Contention Cargo {i}" for i in range(5)]))
+
+        keys = [(starship_id, cargo_type_id) for starship_id in starships for cargo_type_id in cargo.cargo_type_ids]
+        # Every batch names each key twice, and half of them walk the keys backwards.
+        batches = [
+            BulkCreateManifestRequest([ManifestObject(starship_id=s, cargo_type_id=c, quantity=1) for s, c in (keys[::-1] if i % 2 else keys) * 2])
+            for i in range(8)
+        ]
+        deadlocks = transaction_retries.value(sqlstate=DEADLOCK_DETECTED)
+        responses = await asyncio.gather(*(stub.bulk_create_manifest(batch) for batch in batches))
+        assert transaction_retries.value(sqlstate=DEADLOCK_DETECTED) == deadlocks
+        assert all(response.message.status_code == StatusCode.SUCCESS for response in responses)
+
+        # Each batch gets one id per manifest it sent, in its own order, however the keys were sorted for writing.
+        async with session_maker() as session:
+            rows = (
+                await session.execute(select(Manifest.starship_id, Manifest.cargo_type_id, Manifest.manifest_id).where(Manifest.starship_id.in_(starships)))
+            ).all()
+        ids = {(s, c): manifest_id for s, c, manifest_id in rows}
+        for batch, response in zip(batches, responses):
+            assert response.manifest_id == [ids[m.starship_id, m.cargo_type_id] for m in batch.manifests]
+
+        async with session_maker() as session:
+            quantities = (await session.scalars(select(Manifest.quantity).where(Manifest.starship_id.in_(starships)))).all()
+        assert quantities == [16] * len(keys)
+
+        below_zero_response = await stub.bulk_create_manifest(
+            BulkCreateManifestRequest([ManifestObject(starship_id=starships[0], cargo_type_id=cargo.cargo_type_ids[0], quantity=-17)])
+        )
+        assert below_zero_response.message.status_code == StatusCode.VALIDATION_ERROR
+        assert below_zero_response.message.error_fields == {"manifests": strings.validation_error_manifest_quantity_out_of_range}
+
+
+@pytest.mark.asyncio
+async def test_duplicate_heavy_manifest_batches_are_aggregated_before_writing(planets_service):
+    async with ChannelFor([planets_service]) as channel:
+        stub = PlanetAdminStub(channel)
+
+        sector = await stub.get_or_create_sector(GetOrCreateSectorRequest(sector_name="Duplicate Sector"))
+        planet = await stub.create_planet(CreatePlanetRequest(planet_name="Duplicate Planet", sector_id=sector.sector_id))
+        starship = await stub.create_starship(CreateStarshipRequest(starship_name="Duplicate Ship", starship_model="Hauler", planet_id=planet.planet_id))
+        cargo = await stub.bulk_create_cargo_type(BulkCreateCargoTypeRequest(cargo_names=[f"Duplicate Cargo {i}" for i in range(3)]))
+
+        manifests = [ManifestObject(starship_id=starship.starship_id, cargo_type_id=cargo.cargo_type_ids[i % 3], quantity=1) for i in range(3_000)]
+
+        rows_sent = []
+        engine = session_maker.kw["bind"]
+
+        def capture(conn, cursor, statement, parameters, context, executemany):
+            if statement.startswith("INSERT INTO planet.manifest "):
+                rows_sent.append(len(parameters["quantities"]))
+
+        event.listen(engine.sync_engine, "before_cursor_execute", capture)
+        try:
+            response = await stub.bulk_create_manifest(BulkCreateManifestRequest(manifests))
+        finally:
+            event.remove(engine.sync_engine, "before_cursor_execute", capture)
+        assert response.message.status_code == StatusCode.SUCCESS
+        assert len(response.manifest_id) == 3_000
+        assert len(set(response.manifest_id)) == 3
+        assert response.manifest_id[3:6] == response.manifest_id[:3]
+        assert rows_sent == [3]
+
+        stream_response = await stub.stream_manifests([BulkCreateManifestRequest(manifests)])
+        assert stream_response.message.status_code == StatusCode.SUCCESS
+        assert stream_response.chunk_row_counts == [3]
+
+        async with session_maker() as session:
+            quantities = (await session.scalars(select(Manifest.quantity).where(Manifest.starship_id == starship.starship_id))).all()
+        assert quantities == [2_000] * 3
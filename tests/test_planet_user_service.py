@@ -0,0 +1,234 @@
+import pytest
+from grpclib.testing import ChannelFor
+from sqlalchemy import text
+
+from src.generated.co.za.planet import (
+    PlanetAdminStub,
+    PlanetUserStub,
+    StatusCode,
+    GetOrCreateSectorRequest,
+    CreatePlanetRequest,
+    CreateStarshipRequest,
+    ListPlanetsRequest,
+    ListStarshipsRequest,
+    BulkMoveStarshipsRequest,
+    MoveStarshipRequest,
+    MoveOutcome,
+    BulkCreateCargoTypeRequest,
+    BulkCreateManifestRequest,
+    ManifestObject,
+    SetScarceCargoTypeRequest,
+    FindSuppliersRequest,
+    FindAllSuppliersRequest,
+)
+from src.resources.database.config import session_maker
+from src.resources.database.planets_user_queries import lock_planets_stmt
+from src.strings import en_za as strings
+
+
+@pytest.mark.asyncio
+async def test_list_planets_and_starships(planets_service, planets_user_service):
+    async with ChannelFor([planets_service, planets_user_service]) as channel:
+        admin = PlanetAdminStub(channel)
+        user = PlanetUserStub(channel)
+
+        sector = await admin.get_or_create_sector(GetOrCreateSectorRequest(sector_name="Listing Sector"))
+        planet_ids = []
+        for i in range(5):
+            planet = await admin.create_planet(CreatePlanetRequest(planet_name=f"Listing Planet {i}", sector_id=sector.sector_id))
+            planet_ids.append(planet.planet_id)
+
+        starship_ids = []
+        for i in range(3):
+            starship = await admin.create_starship(
+                CreateStarshipRequest(starship_name=f"Listing Ship {i}", starship_model="Freighter", planet_id=planet_ids[i % 2]),
+            )
+            starship_ids.append(starship.starship_id)
+
+        # planets
+        invalid = [r async for r in user.list_planets(ListPlanetsRequest())]
+        assert len(invalid) == 1
+        assert invalid[0].message.status_code == StatusCode.VALIDATION_ERROR
+        assert invalid[0].message.error_fields == {"sector_id": strings.validation_error_required_field}
+
+        pages = [r async for r in user.list_planets(ListPlanetsRequest(sector_id=sector.sector_id, page_size=2))]
+        assert [len(p.planets) for p in pages] == [2, 2, 1, 0]
+        assert [p.planet_id for page in pages for p in page.planets] == planet_ids
+        assert all(page.message.status_code == StatusCode.SUCCESS for page in pages)
+        assert pages[-1].last_planet_id == planet_ids[-1]
+
+        resumed = [r async for r in user.list_planets(ListPlanetsRequest(sector_id=sector.sector_id, after_planet_id=pages[0].last_planet_id))]
+        assert [p.planet_id for page in resumed for p in page.planets] == planet_ids[2:]
+
+        empty = await admin.get_or_create_sector(GetOrCreateSectorRequest(sector_name="Empty Listing Sector"))
+        [finished] = [r async for r in user.list_planets(ListPlanetsRequest(sector_id=empty.sector_id))]
+        assert finished.message.status_code == StatusCode.SUCCESS
+        assert not finished.planets
+
+        [unknown] = [r async for r in user.list_planets(ListPlanetsRequest(sector_id=empty.sector_id + 1000))]
+        assert unknown.message.status_code == StatusCode.NOT_FOUND
+        assert unknown.message.status_message == strings.validation_error_sector_id_does_not_exist
+
+        # starships
+        invalid = [r async for r in user.list_starships(ListStarshipsRequest(page_size=-1))]
+        assert invalid[0].message.status_code == StatusCode.VALIDATION_ERROR
+        assert invalid[0].message.error_fields["page_size"] == strings.validation_error_page_size_out_of_range
+
+        by_sector = [r async for r in user.list_starships(ListStarshipsRequest(sector_id=sector.sector_id, page_size=2))]
+        assert [len(p.starships) for p in by_sector] == [2, 1, 0]
+        assert [s.starship_id for page in by_sector for s in page.starships] == starship_ids
+        assert by_sector[-1].message.status_code == StatusCode.SUCCESS
+        assert by_sector[-1].last_starship_id == starship_ids[-1]
+
+        by_planet = [r async for r in user.list_starships(ListStarshipsRequest(planet_id=planet_ids[0]))]
+        assert [s.starship_id for page in by_planet for s in page.starships] == [starship_ids[0], starship_ids[2]]
+
+        [idle] = [r async for r in user.list_starships(ListStarshipsRequest(planet_id=planet_ids[4]))]
+        assert idle.message.status_code == StatusCode.SUCCESS
+
+        [unknown] = [r async for r in user.list_starships(ListStarshipsRequest(planet_id=planet_ids[-1] + 1000))]
+        assert unknown.message.status_code == StatusCode.NOT_FOUND
+        assert unknown.message.status_message == strings.validation_error_planet_id_does_not_exist
+
+        [unknown] = [r async for r in user.list_starships(ListStarshipsRequest(sector_id=empty.sector_id + 1000))]
+        assert unknown.message.status_message == strings.validation_error_sector_id_does_not_exist
+
+
+@pytest.mark.asyncio
+async def test_bulk_move_starships(planets_service, planets_user_service):
+    async with ChannelFor([planets_service, planets_user_service]) as channel:
+        admin = PlanetAdminStub(channel)
+        user = PlanetUserStub(channel)
+
+        sector = await admin.get_or_create_sector(GetOrCreateSectorRequest(sector_name="Fleet Sector"))
+        origin = await admin.create_planet(CreatePlanetRequest(planet_name="Fleet Origin", sector_id=sector.sector_id))
+        destination = await admin.create_planet(CreatePlanetRequest(planet_name="Fleet Destination", sector_id=sector.sector_id))
+
+        ships = []
+        for i in range(3):
+            ship = await admin.create_starship(CreateStarshipRequest(starship_name=f"Fleet Ship {i}", starship_model="Corvette", planet_id=origin.planet_id))
+            ships.append(ship.starship_id)
+
+        invalid = await user.bulk_move_starships(BulkMoveStarshipsRequest(moves=[MoveStarshipRequest(starship_id=ships[0])]))
+        assert invalid.message.status_code == StatusCode.VALIDATION_ERROR
+        assert invalid.message.error_fields == {"moves": strings.validation_error_move_ids_required}
+
+        response = await user.bulk_move_starships(
+            BulkMoveStarshipsRequest(
+                moves=[
+                    MoveStarshipRequest(starship_id=ships[0], planet_id=destination.planet_id),
+                    MoveStarshipRequest(starship_id=ships[1], planet_id=origin.planet_id),
+                    MoveStarshipRequest(starship_id=ships[2], planet_id=999999),
+                    MoveStarshipRequest(starship_id=999999, planet_id=destination.planet_id),
+                    MoveStarshipRequest(starship_id=ships[1], planet_id=destination.planet_id),
+                ]
+            )
+        )
+        assert response.message.status_code == StatusCode.SUCCESS
+        assert [(r.starship_id, r.planet_id, r.outcome) for r in response.results] == [
+            (ships[0], destination.planet_id, MoveOutcome.MOVED),
+            (ships[1], destination.planet_id, MoveOutcome.MOVED),
+            (ships[2], 999999, MoveOutcome.PLANET_NOT_FOUND),
+            (999999, destination.planet_id, MoveOutcome.STARSHIP_NOT_FOUND),
+        ]
+
+        single = await user.move_starship(MoveStarshipRequest(starship_id=ships[2], planet_id=destination.planet_id))
+        assert single.message.status_code == StatusCode.SUCCESS
+
+        single_again = await user.move_starship(MoveStarshipRequest(starship_id=ships[2], planet_id=destination.planet_id))
+        assert single_again.message.status_code == StatusCode.NOT_FOUND
+
+        again = await user.bulk_move_starships(BulkMoveStarshipsRequest(moves=[MoveStarshipRequest(starship_id=ships[0], planet_id=destination.planet_id)]))
+        assert again.results[0].outcome == MoveOutcome.ALREADY_THERE
+
+        docked = [r async for r in user.list_starships(ListStarshipsRequest(planet_id=destination.planet_id))]
+        assert [s.starship_id for page in docked for s in page.starships] == ships
+
+
+@pytest.mark.asyncio
+async def test_find_suppliers_of_scarce_cargo(planets_service, planets_user_service):
+    async with ChannelFor([planets_service, planets_user_service]) as channel:
+        admin = PlanetAdminStub(channel)
+        user = PlanetUserStub(channel)
+
+        near = await admin.get_or_create_sector(GetOrCreateSectorRequest(sector_name="Supply Near"))
+        far = await admin.get_or_create_sector(GetOrCreateSectorRequest(sector_name="Supply Far"))
+        needy, neighbour, outpost, distant = [
+            (await admin.create_planet(CreatePlanetRequest(planet_name=f"Supply Planet {i}", sector_id=sector.sector_id))).planet_id
+            for i, sector in enumerate((near, near, near, far))
+        ]
+        fuel, ore = (await admin.bulk_create_cargo_type(BulkCreateCargoTypeRequest(cargo_names=["Supply Fuel", "Supply Ore"]))).cargo_type_ids
+
+        holds = [(neighbour, fuel, 5), (distant, fuel, 50), (outpost, fuel, 8), (needy, fuel, 100), (distant, fuel, 0), (neighbour, ore, 99)]
+        ships = []
+        for i, (planet_id, cargo_type_id, quantity) in enumerate(holds):
+            ship = await admin.create_starship(CreateStarshipRequest(starship_name=f"Supply Ship {i}", starship_model="Tanker", planet_id=planet_id))
+            ships.append(ship.starship_id)
+        await admin.bulk_create_manifest(
+            BulkCreateManifestRequest([ManifestObject(starship_id=s, cargo_type_id=c, quantity=q) for s, (_, c, q) in zip(ships, holds)])
+        )
+
+        # scarce cargo
+        invalid = await admin.set_scarce_cargo_type(SetScarceCargoTypeRequest(cargo_type_id=fuel))
+        assert invalid.message.error_fields == {"planet_id": strings.validation_error_required_field}
+
+        missing_cargo = await admin.set_scarce_cargo_type(SetScarceCargoTypeRequest(planet_id=needy, cargo_type_id=999999))
+        assert missing_cargo.message.status_code == StatusCode.NOT_FOUND
+        assert missing_cargo.message.status_message == strings.validation_error_cargo_type_id_does_not_exist
+
+        missing_planet = await admin.set_scarce_cargo_type(SetScarceCargoTypeRequest(planet_id=999999, cargo_type_id=fuel))
+        assert missing_planet.message.status_message == strings.validation_error_planet_id_does_not_exist
+
+        for planet_id, cargo_type_id in ((needy, fuel), (neighbour, ore), (outpost, fuel), (outpost, 0)):
+            response = await admin.set_scarce_cargo_type(SetScarceCargoTypeRequest(planet_id=planet_id, cargo_type_id=cargo_type_id))
+            assert response.message.status_code == StatusCode.SUCCESS
+
+        # one planet
+        invalid = await user.find_suppliers(FindSuppliersRequest(limit=101))
+        assert invalid.message.error_fields == {
+            "planet_id": strings.validation_error_required_field,
+            "limit": strings.validation_error_supplier_limit_out_of_range,
+        }
+
+        missing = await user.find_suppliers(FindSuppliersRequest(planet_id=999999))
+        assert missing.message.status_code == StatusCode.NOT_FOUND
+
+        # Ships on the planet itself and empty holds are not suppliers; the same sector ranks ahead of larger holds elsewhere.
+        found = await user.find_suppliers(FindSuppliersRequest(planet_id=needy))
+        assert found.message.status_code == StatusCode.SUCCESS
+        assert found.scarce_cargo_type_id == fuel
+        assert [(s.starship_id, s.planet_id, s.quantity, s.same_sector) for s in found.suppliers] == [
+            (ships[2], outpost, 8, True),
+            (ships[0], neighbour, 5, True),
+            (ships[1], distant, 50, False),
+        ]
+
+        limited = await user.find_suppliers(FindSuppliersRequest(planet_id=needy, limit=2))
+        assert [s.starship_id for s in limited.suppliers] == [ships[2], ships[0]]
+
+        unneeded = await user.find_suppliers(FindSuppliersRequest(planet_id=outpost))
+        assert unneeded.message.status_code == StatusCode.SUCCESS
+        assert (unneeded.scarce_cargo_type_id, unneeded.suppliers) == (0, [])
+
+        # every scarce planet
+        pages = [r async for r in user.find_all_suppliers(FindAllSuppliersRequest(after_planet_id=needy - 1, limit=2, page_size=1))]
+        assert all(page.message.status_code == StatusCode.SUCCESS and len(page.planets) == 1 for page in pages)
+        matches = {p.planet_id: p for page in pages for p in page.planets}
+        assert set(matches) & {needy, neighbour, outpost, distant} == {needy, neighbour}
+        assert [s.starship_id for s in matches[needy].suppliers] == [ships[2], ships[0]]
+        assert (matches[neighbour].scarce_cargo_type_id, matches[neighbour].suppliers) == (ore, [])
+
+
+@pytest.mark.asyncio
+async def test_moves_to_the_same_planet_do_not_block_each_other(planets_service):
+    async with ChannelFor([planets_service]) as channel:
+        admin = PlanetAdminStub(channel)
+        sector = await admin.get_or_create_sector(GetOrCreateSectorRequest(sector_name="Shared Destination Sector"))
+        planet = await admin.create_planet(CreatePlanetRequest(planet_name="Shared Destination", sector_id=sector.sector_id))
+
+    async with session_maker() as first, session_maker() as second:
+        assert list(await first.scalars(lock_planets_stmt, {"planet_ids": [planet.planet_id]})) == [planet.planet_id]
+
+        # The second lock fails instead of waiting if it conflicts with the first.
+        await second.execute(text("SET LOCAL lock_timeout = '1s'"))
+        assert list(await second.scalars(lock_planets_stmt, {"planet_ids": [planet.planet_id]})) == [planet.planet_id]
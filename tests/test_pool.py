@@ -0,0 +1,97 @@
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from src.resources.database.config import session_maker
+from src.resources.database.pool import InstrumentedPool, PoolMaintainer
+
+
+@pytest.mark.asyncio
+async def test_pool_grows_on_checkout_wait_and_shrinks_when_idle(db_setup):
+    engine = create_async_engine(db_setup, poolclass=InstrumentedPool, pool_size=1, max_overflow=0, pool_timeout=5)
+    maintainer = PoolMaintainer(engine, min_size=1, max_size=4, target_wait=0.01, resize_step=2, shrink_after=2)
+    try:
+        holder = await engine.connect()
+        waiter = asyncio.create_task(engine.connect().start())
+        await asyncio.sleep(0.1)
+        await holder.close()
+        await (await waiter).close()
+
+        assert await maintainer.adjust_size() == 3
+
+        connections = [await engine.connect() for _ in range(3)]
+        for connection in connections:
+            await connection.close()
+        assert engine.sync_engine.pool.checkedin() == 3
+
+        assert await maintainer.adjust_size() == 3
+        assert await maintainer.adjust_size() == 3
+        assert await maintainer.adjust_size() == 1
+        assert engine.sync_engine.pool.checkedin() == 1
+        assert engine.sync_engine.pool.checkedout() == 0
+
+        async with engine.connect() as connection:
+            assert await connection.scalar(text("SELECT 1")) == 1
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_idle_validation_discards_dead_connections(db_setup):
+    engine = create_async_engine(db_setup, poolclass=InstrumentedPool, pool_size=2, max_overflow=0)
+    maintainer = PoolMaintainer(engine, validate_interval=0.01)
+    try:
+        first, second = await engine.connect(), await engine.connect()
+        victim = await first.scalar(text("SELECT pg_backend_pid()"))
+        await first.close()
+        await second.close()
+
+        async with session_maker() as session:
+            await session.execute(text("SELECT pg_terminate_backend(CAST(:pid AS integer))"), {"pid": victim})
+        await asyncio.sleep(0.05)
+
+        assert await maintainer.validate_idle() == 2
+
+        # Only live connections are handed out afterwards.
+        for _ in range(2):
+            async with engine.connect() as connection:
+                assert await connection.scalar(text("SELECT pg_backend_pid()")) != victim
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_resize_adjusts_the_queue_pool_internals_it_relies_on(db_setup):
+    # QueuePool has no public resize, so InstrumentedPool.resize changes these private attributes. This fails on a
+    # SQLAlchemy upgrade that renames or drops them, instead of the pool silently keeping its old size.
+    engine = create_async_engine(db_setup, poolclass=InstrumentedPool, pool_size=2, max_overflow=0)
+    pool = engine.sync_engine.pool
+    try:
+        assert (pool._pool.maxsize, pool._pool._queue._maxsize, pool._overflow) == (2, 2, -2)
+        pool.resize(3)
+        assert (pool.size(), pool._pool._queue.maxsize, pool.overflow()) == (3, 3, -3)
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_idle_validation_leaves_an_idle_connection_for_requests(db_setup):
+    engine = create_async_engine(db_setup, poolclass=InstrumentedPool, pool_size=3, max_overflow=0, pool_timeout=1)
+    maintainer = PoolMaintainer(engine, validate_interval=0.01)
+    try:
+        connections = [await engine.connect() for _ in range(3)]
+        await connections[2].close()
+        await asyncio.sleep(0.05)
+
+        # Requests hold two connections, so the last idle one is left for them instead of being pinged.
+        assert await maintainer.validate_idle() == 0
+
+        await connections[1].close()
+        await asyncio.sleep(0.05)
+        assert await maintainer.validate_idle() == 2
+        assert (engine.sync_engine.pool.checkedin(), engine.sync_engine.pool.checkedout()) == (2, 1)
+        await connections[0].close()
+    finally:
+        await engine.dispose()
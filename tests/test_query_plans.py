@@ -0,0 +1,174 @@
+import inspect
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import event, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+import src.resources.database.change_queries as change_queries
+import src.resources.database.inventory_queries as inventory_queries
+import src.resources.database.job_queries as job_queries
+import src.resources.database.planets_admin_queries as admin_queries
+import src.resources.database.planets_user_queries as user_queries
+from src.generated.co.za.planet import JobState, JobType, ManifestObject, ResponseMessage
+from src.resources.database.config import session_maker
+
+# Tables at least this big must never be read with a sequential scan. The seed keeps the per-sector and per-planet
+# selectivity close to production, so the planner only picks a Seq Scan when no index can serve the query.
+LARGE_TABLE_ROWS = 10_000
+
+# Recomputing the summary tables reads every manifest by design.
+FULL_SCAN_FUNCTIONS = {"rebuild_inventory"}
+
+SEED_STATEMENTS = (
+    "INSERT INTO planet.sector (name) SELECT 'Plan Sector ' || i FROM generate_series(1, 1000) i",
+    "INSERT INTO planet.cargo_type (name) SELECT 'Plan Cargo ' || i FROM generate_series(1, 200) i",
+    """
+    INSERT INTO planet.planet (name, sector_id, scarce_cargo_type_id)
+    SELECT 'Plan Planet ' || i, s.sector_id, c.cargo_type_id
+    FROM generate_series(1, 20000) i
+    JOIN planet.sector s ON s.name = 'Plan Sector ' || (i % 1000 + 1)
+    JOIN planet.cargo_type c ON c.name = 'Plan Cargo ' || (i % 200 + 1)
+    """,
+    """
+    INSERT INTO planet.starship (name, model, planet_id)
+    SELECT 'Plan Ship ' || i, 'Plan Model', p.planet_id
+    FROM generate_series(1, 100000) i
+    JOIN planet.planet p ON p.name = 'Plan Planet ' || (i % 20000 + 1)
+    """,
+    """
+    INSERT INTO planet.manifest (starship_id, cargo_type_id, quantity)
+    SELECT s.starship_id, c.cargo_type_id, 10
+    FROM planet.starship s
+    JOIN planet.cargo_type c ON c.name IN ('Plan Cargo 1', 'Plan Cargo 2')
+    WHERE s.model = 'Plan Model'
+    """,
+    "ANALYZE planet.sector, planet.cargo_type, planet.planet, planet.starship, planet.manifest",
+)
+
+SAMPLE_IDS = """
+SELECT
+    (SELECT sector_id FROM planet.sector WHERE name = 'Plan Sector 1') AS sector_id,
+    (SELECT planet_id FROM planet.planet WHERE name = 'Plan Planet 1') AS planet_id,
+    (SELECT planet_id FROM planet.planet WHERE name = 'Plan Planet 2') AS other_planet_id,
+    (SELECT starship_id FROM planet.starship WHERE name = 'Plan Ship 1') AS starship_id,
+    (SELECT cargo_type_id FROM planet.cargo_type WHERE name = 'Plan Cargo 3') AS cargo_type_id
+"""
+
+
+def _query_calls(ids: SimpleNamespace) -> dict:
+    """One representative call per query function, keyed by function name."""
+
+    async def drain(pages):
+        return [page async for page in pages]
+
+    manifests = [ManifestObject(starship_id=ids.starship_id, cargo_type_id=ids.cargo_type_id, quantity=1)]
+
+    return {
+        "create_planet_db": lambda s: admin_queries.create_planet_db(s, "Plan New Planet", ids.sector_id),
+        "bulk_create_planets_db": lambda s: admin_queries.bulk_create_planets_db(s, [("Plan Batch Planet", ids.sector_id), ("Plan Planet 1", ids.sector_id)]),
+        "get_or_create_sector_db": lambda s: admin_queries.get_or_create_sector_db(s, "Plan Sector 1"),
+        "bulk_get_or_create_cargo_types_db": lambda s: admin_queries.bulk_get_or_create_cargo_types_db(s, ["Plan Cargo 1", "Plan New Cargo", "Plan Cargo 1"]),
+        "create_starship_db": lambda s: admin_queries.create_starship_db(s, "Plan New Ship", "Plan Model", ids.planet_id),
+        "bulk_create_starships_db": lambda s: admin_queries.bulk_create_starships_db(s, [("Plan Batch Ship", "Plan Model", ids.planet_id)]),
+        "bulk_create_manifest": lambda s: admin_queries.bulk_create_manifest(s, manifests),
+        "copy_manifest_chunk": lambda s: admin_queries.copy_manifest_chunk(s, manifests),
+        "move_starship_to_planet": lambda s: user_queries.move_starship_to_planet(s, ids.starship_id, ids.other_planet_id),
+        "bulk_move_starships": lambda s: user_queries.bulk_move_starships(s, {ids.starship_id: ids.planet_id}),
+        "stream_planets": lambda s: drain(user_queries.stream_planets(s, ids.sector_id, 0, 100)),
+        "stream_starships": lambda s: drain(user_queries.stream_starships(s, 0, 100, sector_id=ids.sector_id)),
+        "sector_exists_db": lambda s: user_queries.sector_exists_db(s, ids.sector_id),
+        "planet_exists_db": lambda s: user_queries.planet_exists_db(s, ids.planet_id),
+        "set_scarce_cargo_type_db": lambda s: admin_queries.set_scarce_cargo_type_db(s, ids.planet_id, ids.cargo_type_id),
+        "find_suppliers_db": lambda s: user_queries.find_suppliers_db(s, ids.planet_id, 10),
+        "stream_supplier_matches": lambda s: drain(user_queries.stream_supplier_matches(s, ids.planet_id, 10, 100)),
+        "get_planet_inventory_db": lambda s: user_queries.get_planet_inventory_db(s, ids.planet_id),
+        "get_sector_inventory_db": lambda s: user_queries.get_sector_inventory_db(s, ids.sector_id),
+        "add_manifest_inventory": lambda s: inventory_queries.add_manifest_inventory(s, [(ids.starship_id, ids.cargo_type_id, 1)]),
+        "move_inventory": lambda s: inventory_queries.move_inventory(s, [(ids.starship_id, ids.planet_id, ids.other_planet_id)]),
+        "rebuild_inventory": inventory_queries.rebuild_inventory,
+        "record_moves": lambda s: change_queries.record_moves(s, [(ids.starship_id, ids.planet_id, ids.other_planet_id)]),
+        "record_manifest_changes": lambda s: change_queries.record_manifest_changes(s, [(ids.starship_id, ids.cargo_type_id, 1)]),
+        "read_changes": lambda s: change_queries.read_changes(s, 0, 0, 100),
+        "submit_job": lambda s: job_queries.submit_job(s, JobType.BULK_CREATE_CARGO_TYPE, b"", 1),
+        "claim_job": lambda s: job_queries.claim_job(s, 60),
+        "advance_job": lambda s: job_queries.advance_job(s, 0, 1, 1, [ids.cargo_type_id], 60),
+        "finish_job": lambda s: job_queries.finish_job(s, 0, 1, JobState.SUCCEEDED, ResponseMessage()),
+        "release_job": lambda s: job_queries.release_job(s, 0, 1),
+        "get_job_db": lambda s: job_queries.get_job_db(s, 0),
+    }
+
+
+def _query_functions() -> set[str]:
+    return {
+        name
+        for module in (admin_queries, user_queries, inventory_queries, change_queries, job_queries)
+        for name, function in inspect.getmembers(module, lambda f: inspect.iscoroutinefunction(f) or inspect.isasyncgenfunction(f))
+        if function.__module__ == module.__name__ and not name.startswith("_")
+    }
+
+
+def _seq_scans(plan: dict):
+    if plan["Node Type"] == "Seq Scan":
+        yield plan["Relation Name"]
+    for child in plan.get("Plans", ()):
+        yield from _seq_scans(child)
+
+
+@pytest.mark.asyncio
+async def test_queries_do_not_seq_scan_large_tables(db_setup):
+    engine = session_maker.kw["bind"]
+
+    async with engine.connect() as connection:
+        transaction = await connection.begin()
+        try:
+            for statement in SEED_STATEMENTS:
+                await connection.execute(text(statement))
+            # Created outside the session's savepoint, so the staging table is still there when its merge is explained.
+            await connection.execute(admin_queries.create_manifest_staging_stmt)
+
+            ids = SimpleNamespace(**(await connection.execute(text(SAMPLE_IDS))).mappings().one())
+            # Plans scan partitions rather than their partitioned parent, so large partitions count as large tables.
+            large_tables = dict(
+                (
+                    await connection.execute(
+                        text(
+                            "SELECT c.relname, r.relname FROM pg_class c JOIN pg_class r ON r.oid = coalesce(pg_partition_root(c.oid), c.oid) "
+                            "WHERE c.relnamespace = 'planet'::regnamespace AND c.relkind = 'r' AND c.reltuples >= :rows"
+                        ),
+                        {"rows": LARGE_TABLE_ROWS},
+                    )
+                ).all()
+            )
+            assert {"planet", "starship", "manifest"} <= set(large_tables.values())
+
+            calls = _query_calls(ids)
+            assert set(calls) == _query_functions(), "every query function needs a representative call in _query_calls"
+
+            captured = []
+
+            def capture(conn, cursor, statement, parameters, context, executemany):
+                if statement.lstrip().split(None, 1)[0].upper() in ("SELECT", "INSERT", "UPDATE", "DELETE", "WITH"):
+                    captured.append((function_name, statement, parameters))
+
+            event.listen(connection.sync_connection, "before_cursor_execute", capture)
+            try:
+                # The session joins the seeded transaction through a savepoint, so its writes are rolled back with the seed.
+                session = AsyncSession(bind=connection, join_transaction_mode="create_savepoint", expire_on_commit=False)
+                for function_name, call in calls.items():
+                    await call(session)
+                await session.close()
+            finally:
+                event.remove(connection.sync_connection, "before_cursor_execute", capture)
+
+            violations = []
+            for function_name, statement, parameters in captured:
+                result = await connection.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {statement}", parameters)
+                plan = result.scalar()[0]["Plan"]
+                for relation in _seq_scans(plan):
+                    if relation in large_tables and function_name not in FULL_SCAN_FUNCTIONS:
+                        violations.append(f"{function_name}: Seq Scan on {relation}\n{statement}")
+
+            assert not violations, "\n\n".join(violations)
+        finally:
+            await transaction.rollback()
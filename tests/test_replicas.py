@@ -0,0 +1,65 @@
+import socket
+from collections import Counter
+
+import pytest
+from grpclib.exceptions import GRPCError
+from grpclib.testing import ChannelFor
+from sqlalchemy import event
+
+import src.resources.database.config as config
+from src.generated.co.za.planet import GetOrCreateSectorRequest, ListPlanetsRequest, PlanetAdminStub, PlanetUserStub, StatusCode
+from src.resources.database.config import create_database_engine, session_maker
+from src.resources.database.replicas import ReplicaRouter
+
+
+def _unreachable_url(db_setup: str) -> str:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    return db_setup.replace(db_setup.split("@", 1)[1].split("/", 1)[0], f"127.0.0.1:{port}")
+
+
+@pytest.mark.asyncio
+async def test_list_reads_rotate_across_healthy_replicas(db_setup, planets_service, planets_user_service, monkeypatch):
+    replicas = [create_database_engine(db_setup, 1, 0), create_database_engine(_unreachable_url(db_setup), 1, 0), create_database_engine(db_setup, 1, 0)]
+    router = ReplicaRouter(session_maker.kw["bind"], replicas)
+    monkeypatch.setattr(config, "replica_router", router)
+    try:
+        assert await router.check() == 2
+
+        statements = Counter()
+        for replica in replicas:
+            event.listen(replica.sync_engine, "before_cursor_execute", lambda conn, *_, replica=replica: statements.update([replica]))
+
+        async with ChannelFor([planets_service, planets_user_service]) as channel:
+            sector = await PlanetAdminStub(channel).get_or_create_sector(GetOrCreateSectorRequest(sector_name="Replica Sector"))
+            for _ in range(4):
+                async for response in PlanetUserStub(channel).list_planets(ListPlanetsRequest(sector_id=sector.sector_id)):
+                    assert response.message.status_code == StatusCode.SUCCESS
+
+        # Each listing of the empty sector streams nothing and then checks that the sector exists.
+        assert statements == {replicas[0]: 4, replicas[2]: 4}
+    finally:
+        for replica in replicas:
+            await replica.dispose()
+
+
+@pytest.mark.asyncio
+async def test_failed_replica_is_skipped_until_it_passes_a_check(db_setup, planets_user_service, monkeypatch):
+    replica = create_database_engine(_unreachable_url(db_setup), 1, 0)
+    router = ReplicaRouter(session_maker.kw["bind"], [replica])
+    monkeypatch.setattr(config, "replica_router", router)
+    try:
+        async with ChannelFor([planets_user_service]) as channel:
+            user = PlanetUserStub(channel)
+            with pytest.raises(GRPCError):
+                [r async for r in user.list_planets(ListPlanetsRequest(sector_id=1))]
+
+            # With no healthy replica left, reads fall back to the primary.
+            assert router.choose() is router.primary
+            responses = [r async for r in user.list_planets(ListPlanetsRequest(sector_id=1))]
+            assert responses[-1].message.status_code in (StatusCode.SUCCESS, StatusCode.NOT_FOUND)
+
+        assert await router.check() == 0
+    finally:
+        await replica.dispose()
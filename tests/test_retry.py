@@ -0,0 +1,43 @@
+import psycopg
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError, OperationalError
+
+from src.resources.database.retry import DEADLOCK_DETECTED, run_transaction, transaction_retries
+
+
+def _failing(errors):
+    attempts = []
+
+    async def work(session):
+        attempts.append(await session.scalar(text("SELECT txid_current()")))
+        if len(attempts) <= len(errors):
+            raise errors[len(attempts) - 1]
+        return len(attempts)
+
+    return work, attempts
+
+
+@pytest.mark.asyncio
+async def test_deadlocks_and_serialization_failures_are_retried_in_a_new_transaction(db_setup):
+    retries = transaction_retries.value(sqlstate=DEADLOCK_DETECTED)
+    deadlock = OperationalError("UPDATE", {}, psycopg.errors.DeadlockDetected())
+    serialization_failure = OperationalError("UPDATE", {}, psycopg.errors.SerializationFailure())
+
+    work, attempts = _failing([deadlock, serialization_failure])
+    assert await run_transaction(work, base_delay=0) == 3
+    assert len(set(attempts)) == 3
+    assert transaction_retries.value(sqlstate=DEADLOCK_DETECTED) == retries + 1
+
+    work, attempts = _failing([deadlock] * 3)
+    with pytest.raises(OperationalError):
+        await run_transaction(work, attempts=3, base_delay=0)
+    assert len(attempts) == 3
+
+
+@pytest.mark.asyncio
+async def test_other_errors_are_raised_without_retrying(db_setup):
+    work, attempts = _failing([IntegrityError("INSERT", {}, psycopg.errors.ForeignKeyViolation())])
+    with pytest.raises(IntegrityError):
+        await run_transaction(work, base_delay=0)
+    assert len(attempts) == 1
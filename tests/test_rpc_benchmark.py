@@ -0,0 +1,458 @@
+"""
+Load test for every RPC, over grpclib's in-memory ChannelFor and over a real socket.
+
+Volumes, request counts and concurrency come from the environment, so a quick local run and a production-sized one use
+the same code:
+
+    BENCHMARK_STARSHIPS=100000 BENCHMARK_MANIFESTS=1000000 pytest -m benchmark -s tests/test_rpc_benchmark.py
+
+Results are written as JSON to ``BENCHMARK_OUTPUT`` and compared with ``BENCHMARK_BASELINE``: an RPC whose p95 latency
+or throughput is worse than the baseline by more than ``BENCHMARK_TOLERANCE`` fails the run, as do a missing baseline and
+an RPC the baseline has no results for. A baseline recorded with other volumes or concurrency is not comparable, so the
+run only warns. ``BENCHMARK_UPDATE_BASELINE=1`` stores this run as the new baseline instead.
+
+The socket transport serves the services through ``build_server``, with the same hooks as a production worker.
+"""
+
+import asyncio
+import json
+import math
+import os
+import random
+import socket
+import statistics
+import time
+import warnings
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from pathlib import Path
+from typing import AsyncIterator, Awaitable, Callable, Optional
+
+import pytest
+from grpclib.client import Channel
+from grpclib.testing import ChannelFor
+from sqlalchemy import text
+
+from src.generated.co.za.planet import (
+    PlanetAdminStub,
+    PlanetUserStub,
+    StatusCode,
+    GetOrCreateSectorRequest,
+    CreatePlanetRequest,
+    BulkCreateCargoTypeRequest,
+    CreateStarshipRequest,
+    BulkCreateManifestRequest,
+    ManifestObject,
+    OnboardFleetRequest,
+    FleetPlanet,
+    FleetStarship,
+    FleetCargo,
+    MoveStarshipRequest,
+    BulkMoveStarshipsRequest,
+    ListPlanetsRequest,
+    ListStarshipsRequest,
+    GetPlanetInventoryRequest,
+    GetSectorInventoryRequest,
+    FindSuppliersRequest,
+    FindAllSuppliersRequest,
+    SetScarceCargoTypeRequest,
+    WatchChangesRequest,
+    ChangeCursor,
+    GetJobStatusRequest,
+)
+from src.resources.database.config import session_maker, unit_of_work
+from src.resources.database.inventory_queries import rebuild_inventory
+from src.server import ServerSettings, build_server
+from src.services.planets_admin_service import PlanetsService
+from src.services.planets_user_service import PlanetsUserService
+
+VOLUMES = {
+    "sectors": int(os.getenv("BENCHMARK_SECTORS", 10_000)),
+    "planets": int(os.getenv("BENCHMARK_PLANETS", 100_000)),
+    "starships": int(os.getenv("BENCHMARK_STARSHIPS", 1_000_000)),
+    "manifests": int(os.getenv("BENCHMARK_MANIFESTS", 10_000_000)),
+}
+REQUESTS = int(os.getenv("BENCHMARK_REQUESTS", 500))
+CONCURRENCY = int(os.getenv("BENCHMARK_CONCURRENCY", 16))
+OUTPUT = Path(os.getenv("BENCHMARK_OUTPUT", "benchmark-results.json"))
+BASELINE = Path(os.getenv("BENCHMARK_BASELINE", Path(__file__).with_name("benchmark_baseline.json")))
+TOLERANCE = float(os.getenv("BENCHMARK_TOLERANCE", 0.25))
+UPDATE_BASELINE = os.getenv("BENCHMARK_UPDATE_BASELINE", "").lower() in ("1", "true")
+
+MOVES_PER_REQUEST = 100
+
+
+def _manifests_per_starship() -> int:
+    return max(1, math.ceil(VOLUMES["manifests"] / max(VOLUMES["starships"], 1)))
+
+
+def _cargo_types() -> int:
+    # Each starship's cargo types are picked with a stride of 17, which must be coprime with the count to stay distinct.
+    count = max(200, _manifests_per_starship())
+    return count + 1 if count % 17 == 0 else count
+
+
+SEED_STATEMENTS = (
+    "INSERT INTO planet.sector (name) SELECT 'Bench Sector ' || i FROM generate_series(1, :sectors) i",
+    "INSERT INTO planet.cargo_type (name) SELECT 'Bench Cargo ' || i FROM generate_series(1, :cargo_types) i",
+    """
+    INSERT INTO planet.planet (name, sector_id, scarce_cargo_type_id)
+    SELECT 'Bench Planet ' || i, s.sector_id, c.ids[i % cardinality(c.ids) + 1]
+    FROM generate_series(1, :planets) i
+    JOIN (SELECT sector_id, row_number() OVER (ORDER BY sector_id) AS rn FROM planet.sector WHERE name LIKE 'Bench Sector %') s
+        ON s.rn = i % :sectors + 1
+    CROSS JOIN (SELECT array_agg(cargo_type_id ORDER BY cargo_type_id) AS ids FROM planet.cargo_type WHERE name LIKE 'Bench Cargo %') c
+    """,
+    """
+    INSERT INTO planet.starship (name, model, planet_id)
+    SELECT 'Bench Ship ' || i, 'Bench Model', p.planet_id
+    FROM generate_series(1, :starships) i
+    JOIN (SELECT planet_id, row_number() OVER (ORDER BY planet_id) AS rn FROM planet.planet WHERE name LIKE 'Bench Planet %') p
+        ON p.rn = i % :planets + 1
+    """,
+    """
+    INSERT INTO planet.manifest (starship_id, cargo_type_id, quantity)
+    SELECT s.starship_id, c.ids[(s.rn + k * 17) % cardinality(c.ids) + 1], 1 + (s.rn + k) % 100
+    FROM (SELECT starship_id, row_number() OVER (ORDER BY starship_id) AS rn FROM planet.starship WHERE model = 'Bench Model') s
+    CROSS JOIN generate_series(0, :per_starship - 1) k
+    CROSS JOIN (SELECT array_agg(cargo_type_id ORDER BY cargo_type_id) AS ids FROM planet.cargo_type WHERE name LIKE 'Bench Cargo %') c
+    WHERE (s.rn - 1) * :per_starship + k < :manifests
+    """,
+)
+
+SAMPLE_STATEMENTS = {
+    "sector_ids": "SELECT sector_id FROM planet.sector WHERE name LIKE 'Bench Sector %'",
+    "cargo_type_ids": "SELECT cargo_type_id FROM planet.cargo_type WHERE name LIKE 'Bench Cargo %'",
+    "planet_ids": "SELECT planet_id FROM planet.planet WHERE name LIKE 'Bench Planet %' ORDER BY random() LIMIT 10000",
+    "starship_ids": "SELECT starship_id FROM planet.starship WHERE model = 'Bench Model' ORDER BY random() LIMIT 20000",
+    "last_scarce_planet_ids": "SELECT planet_id FROM planet.planet WHERE scarce_cargo_type_id IS NOT NULL ORDER BY planet_id DESC LIMIT 100",
+}
+
+RECENT_CHANGE_STATEMENT = "SELECT transaction_id, change_event_id FROM planet.change_event ORDER BY transaction_id DESC, change_event_id DESC OFFSET 50 LIMIT 1"
+
+
+@dataclass
+class BenchData:
+    sector_ids: list[int]
+    cargo_type_ids: list[int]
+    planet_ids: list[int]
+    starship_ids: list[int]
+    last_scarce_planet_ids: list[int]
+
+
+_bench_data: Optional[BenchData] = None
+
+
+async def _seed() -> BenchData:
+    """Seed the benchmark volumes once per session and sample ids for requests to use."""
+    global _bench_data
+    if _bench_data is not None:
+        return _bench_data
+
+    engine = session_maker.kw["bind"]
+    parameters = {**VOLUMES, "cargo_types": _cargo_types(), "per_starship": _manifests_per_starship()}
+
+    started = time.perf_counter()
+    for statement in SEED_STATEMENTS:
+        async with engine.begin() as connection:
+            await connection.execute(text(statement), parameters)
+
+    # The seed bypasses the RPCs, so the inventory summaries are built from it in one pass.
+    async with unit_of_work() as session:
+        await rebuild_inventory(session)
+
+    async with engine.connect() as connection:
+        autocommit = await connection.execution_options(isolation_level="AUTOCOMMIT")
+        await autocommit.execute(
+            text(
+                "VACUUM ANALYZE planet.sector, planet.cargo_type, planet.planet, planet.starship, planet.manifest, planet.planet_inventory, planet.sector_inventory"
+            )
+        )
+    print(f"seeded {VOLUMES} in {time.perf_counter() - started:.1f}s")
+
+    async with engine.connect() as connection:
+        samples = {name: list(await connection.scalars(text(statement))) for name, statement in SAMPLE_STATEMENTS.items()}
+
+    _bench_data = BenchData(**samples)
+    return _bench_data
+
+
+@dataclass
+class Scenario:
+    name: str
+    call: Callable[[PlanetAdminStub, PlanetUserStub, int], Awaitable[list[StatusCode]]]
+    allowed: frozenset = frozenset({StatusCode.SUCCESS})
+
+
+async def _first_message(stream: AsyncIterator):
+    """Read the first message of a stream that does not end by itself, then hang up."""
+    try:
+        return await stream.__anext__()
+    finally:
+        await stream.aclose()
+
+
+async def _recent_change_cursor() -> ChangeCursor:
+    """A cursor 50 events behind the head of the outbox, or its start when it holds fewer."""
+    async with session_maker.kw["bind"].connect() as connection:
+        row = (await connection.execute(text(RECENT_CHANGE_STATEMENT))).first()
+    return ChangeCursor(transaction_id=row.transaction_id, change_event_id=row.change_event_id) if row else ChangeCursor()
+
+
+def _scenarios(data: BenchData, run: str) -> list[Scenario]:
+    """One scenario per RPC; ``run`` keeps names created by different transports apart."""
+
+    def rng(i: int) -> random.Random:
+        return random.Random(f"{run}-{i}")
+
+    async def get_or_create_sector(admin, user, i):
+        response = await admin.get_or_create_sector(GetOrCreateSectorRequest(sector_name=f"Bench Sector {rng(i).randint(1, VOLUMES['sectors'])}"))
+        return [response.message.status_code]
+
+    async def create_planet(admin, user, i):
+        response = await admin.create_planet(CreatePlanetRequest(planet_name=f"Bench {run} Planet {i}", sector_id=rng(i).choice(data.sector_ids)))
+        return [response.message.status_code]
+
+    async def bulk_create_cargo_type(admin, user, i):
+        response = await admin.bulk_create_cargo_type(BulkCreateCargoTypeRequest(cargo_names=[f"Bench {run} Cargo {i} {j}" for j in range(5)]))
+        return [response.message.status_code]
+
+    async def create_starship(admin, user, i):
+        request = CreateStarshipRequest(starship_name=f"Bench {run} Ship {i}", starship_model="Bench Model", planet_id=rng(i).choice(data.planet_ids))
+        return [(await admin.create_starship(request)).message.status_code]
+
+    async def bulk_create_manifest(admin, user, i):
+        r = rng(i)
+        starship_id = r.choice(data.starship_ids)
+        # Sorted keys keep concurrent upserts on the same starship from deadlocking.
+        manifests = [ManifestObject(starship_id=starship_id, cargo_type_id=c, quantity=1) for c in sorted(r.sample(data.cargo_type_ids, 10))]
+        return [(await admin.bulk_create_manifest(BulkCreateManifestRequest(manifests=manifests))).message.status_code]
+
+    async def stream_manifests(admin, user, i):
+        r = rng(i)
+        chunks = []
+        for _ in range(4):
+            keys = sorted({(r.choice(data.starship_ids), r.choice(data.cargo_type_ids)) for _ in range(250)})
+            chunks.append(BulkCreateManifestRequest(manifests=[ManifestObject(starship_id=s, cargo_type_id=c, quantity=1) for s, c in keys]))
+        return [(await admin.stream_manifests(chunks)).message.status_code]
+
+    async def onboard_fleet(admin, user, i):
+        r = rng(i)
+        cargo = [FleetCargo(cargo_type_id=c, quantity=5) for c in r.sample(data.cargo_type_ids, 2)]
+        request = OnboardFleetRequest(
+            sector_name=f"Bench {run} Fleet Sector {i % 50}",
+            planets=[
+                FleetPlanet(
+                    planet_name=f"Bench {run} Fleet Planet {i} {p}",
+                    starships=[FleetStarship(starship_name=f"Bench {run} Fleet Ship {s}", starship_model="Bench Fleet", cargo=cargo) for s in range(2)],
+                )
+                for p in range(2)
+            ],
+        )
+        return [(await admin.onboard_fleet(request)).message.status_code]
+
+    async def move_starship(admin, user, i):
+        r = rng(i)
+        response = await user.move_starship(MoveStarshipRequest(starship_id=r.choice(data.starship_ids), planet_id=r.choice(data.planet_ids)))
+        return [response.message.status_code]
+
+    async def bulk_move_starships(admin, user, i):
+        r = rng(i)
+        # Concurrent requests take disjoint slices of starships, so their row locks cannot deadlock.
+        start = (i * MOVES_PER_REQUEST) % len(data.starship_ids)
+        starship_ids = data.starship_ids[start : start + MOVES_PER_REQUEST]
+        moves = [MoveStarshipRequest(starship_id=s, planet_id=r.choice(data.planet_ids)) for s in starship_ids]
+        return [(await user.bulk_move_starships(BulkMoveStarshipsRequest(moves=moves))).message.status_code]
+
+    async def list_planets(admin, user, i):
+        request = ListPlanetsRequest(sector_id=rng(i).choice(data.sector_ids))
+        return [page.message.status_code async for page in user.list_planets(request)]
+
+    async def list_starships(admin, user, i):
+        request = ListStarshipsRequest(sector_id=rng(i).choice(data.sector_ids))
+        return [page.message.status_code async for page in user.list_starships(request)]
+
+    async def get_planet_inventory(admin, user, i):
+        return [(await user.get_planet_inventory(GetPlanetInventoryRequest(planet_id=rng(i).choice(data.planet_ids)))).message.status_code]
+
+    async def get_sector_inventory(admin, user, i):
+        return [(await user.get_sector_inventory(GetSectorInventoryRequest(sector_id=rng(i).choice(data.sector_ids)))).message.status_code]
+
+    async def find_suppliers(admin, user, i):
+        return [(await user.find_suppliers(FindSuppliersRequest(planet_id=rng(i).choice(data.planet_ids)))).message.status_code]
+
+    async def set_scarce_cargo_type(admin, user, i):
+        r = rng(i)
+        request = SetScarceCargoTypeRequest(planet_id=r.choice(data.planet_ids), cargo_type_id=r.choice(data.cargo_type_ids))
+        return [(await admin.set_scarce_cargo_type(request)).message.status_code]
+
+    async def find_all_suppliers(admin, user, i):
+        # Starting among the last planets with a scarce cargo type keeps each stream to at most two pages.
+        request = FindAllSuppliersRequest(after_planet_id=rng(i).choice(data.last_scarce_planet_ids) - 1, page_size=50)
+        return [page.message.status_code async for page in user.find_all_suppliers(request)]
+
+    recent_cursor: list[asyncio.Future] = []
+
+    async def watch_changes(admin, user, i):
+        # A watcher resuming near the head of the outbox the move and manifest scenarios filled. Its first page is partial,
+        # so the stream is waiting for new events, not reading, when the client hangs up.
+        if not recent_cursor:
+            recent_cursor.append(asyncio.ensure_future(_recent_change_cursor()))
+        request = WatchChangesRequest(after=await recent_cursor[0], page_size=100)
+        return [(await _first_message(user.watch_changes(request))).message.status_code]
+
+    # No job runner is started, so submitted jobs stay queued and only the submit and status reads are measured.
+    job_ids: list[int] = []
+
+    async def submit_bulk_create_manifest(admin, user, i):
+        r = rng(i)
+        keys = sorted({(r.choice(data.starship_ids), r.choice(data.cargo_type_ids)) for _ in range(1000)})
+        request = BulkCreateManifestRequest(manifests=[ManifestObject(starship_id=s, cargo_type_id=c, quantity=1) for s, c in keys])
+        response = await admin.submit_bulk_create_manifest(request)
+        job_ids.append(response.job_id)
+        return [response.message.status_code]
+
+    async def submit_bulk_create_cargo_type(admin, user, i):
+        request = BulkCreateCargoTypeRequest(cargo_names=[f"Bench {run} Job Cargo {i} {j}" for j in range(100)])
+        response = await admin.submit_bulk_create_cargo_type(request)
+        job_ids.append(response.job_id)
+        return [response.message.status_code]
+
+    async def get_job_status(admin, user, i):
+        return [(await admin.get_job_status(GetJobStatusRequest(job_id=rng(i).choice(job_ids)))).message.status_code]
+
+    return [
+        Scenario("GetOrCreateSector", get_or_create_sector),
+        Scenario("CreatePlanet", create_planet),
+        Scenario("BulkCreateCargoType", bulk_create_cargo_type),
+        Scenario("CreateStarship", create_starship),
+        Scenario("BulkCreateManifest", bulk_create_manifest),
+        Scenario("StreamManifests", stream_manifests),
+        Scenario("OnboardFleet", onboard_fleet),
+        # A random destination is occasionally the planet the starship is already on.
+        Scenario("MoveStarship", move_starship, frozenset({StatusCode.SUCCESS, StatusCode.NOT_FOUND})),
+        Scenario("BulkMoveStarships", bulk_move_starships),
+        Scenario("ListPlanets", list_planets),
+        Scenario("ListStarships", list_starships),
+        Scenario("GetPlanetInventory", get_planet_inventory),
+        Scenario("GetSectorInventory", get_sector_inventory),
+        Scenario("FindSuppliers", find_suppliers),
+        Scenario("SetScarceCargoType", set_scarce_cargo_type),
+        Scenario("FindAllSuppliers", find_all_suppliers),
+        Scenario("WatchChanges", watch_changes),
+        Scenario("SubmitBulkCreateManifest", submit_bulk_create_manifest),
+        Scenario("SubmitBulkCreateCargoType", submit_bulk_create_cargo_type),
+        Scenario("GetJobStatus", get_job_status),
+    ]
+
+
+def _percentile(ordered: list[float], fraction: float) -> float:
+    return ordered[min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1)]
+
+
+async def _drive(scenario: Scenario, admin: PlanetAdminStub, user: PlanetUserStub) -> dict:
+    latencies = []
+    unexpected = []
+    indexes = iter(range(REQUESTS))
+
+    async def worker():
+        for i in indexes:
+            started = time.perf_counter()
+            statuses = await scenario.call(admin, user, i)
+            latencies.append(time.perf_counter() - started)
+            unexpected.extend(s for s in statuses if s not in scenario.allowed)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(CONCURRENCY)))
+    elapsed = time.perf_counter() - started
+
+    assert not unexpected, f"{scenario.name} returned {sorted(set(unexpected))}"
+
+    latencies.sort()
+    return {
+        "requests": REQUESTS,
+        "concurrency": CONCURRENCY,
+        "throughput": REQUESTS / elapsed,
+        "mean_ms": statistics.fmean(latencies) * 1000,
+        "p50_ms": _percentile(latencies, 0.50) * 1000,
+        "p95_ms": _percentile(latencies, 0.95) * 1000,
+        "p99_ms": _percentile(latencies, 0.99) * 1000,
+    }
+
+
+@asynccontextmanager
+async def _channel(transport: str, database_url: str, admin_service: PlanetsService, user_service: PlanetsUserService) -> AsyncIterator[Channel]:
+    if transport == "memory":
+        async with ChannelFor([admin_service, user_service]) as channel:
+            yield channel
+        return
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server, _ = build_server(ServerSettings(database_url=database_url), admin_service, user_service)
+    await server.start("127.0.0.1", port)
+    channel = Channel("127.0.0.1", port)
+    try:
+        yield channel
+    finally:
+        channel.close()
+        server.close()
+        await server.wait_closed()
+
+
+def _regressions(transport: str, results: dict, baseline: dict) -> list[str]:
+    if baseline.get("volumes") != VOLUMES or baseline.get("concurrency") != CONCURRENCY:
+        warnings.warn(
+            f"{BASELINE} was recorded with volumes {baseline.get('volumes')} at concurrency {baseline.get('concurrency')}, "
+            f"not {VOLUMES} at {CONCURRENCY}; results were not compared"
+        )
+        return []
+
+    regressions = []
+    for rpc, result in results.items():
+        expected = baseline.get("transports", {}).get(transport, {}).get(rpc)
+        if expected is None:
+            regressions.append(f"{transport} {rpc}: no baseline results; record them with BENCHMARK_UPDATE_BASELINE=1")
+            continue
+        if result["p95_ms"] > expected["p95_ms"] * (1 + TOLERANCE):
+            regressions.append(f"{transport} {rpc}: p95 {result['p95_ms']:.2f} ms against a baseline of {expected['p95_ms']:.2f} ms")
+        if result["throughput"] < expected["throughput"] * (1 - TOLERANCE):
+            regressions.append(f"{transport} {rpc}: {result['throughput']:.0f} req/s against a baseline of {expected['throughput']:.0f} req/s")
+    return regressions
+
+
+def _merge_into(path: Path, transport: str, results: dict) -> None:
+    report = json.loads(path.read_text()) if path.exists() else {}
+    report.update(volumes=VOLUMES, concurrency=CONCURRENCY)
+    report.setdefault("transports", {})[transport] = results
+    path.write_text(json.dumps(report, indent=2, sort_keys=True) + "\n")
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+@pytest.mark.parametrize("transport", ["memory", "socket"])
+async def test_rpc_throughput_and_latency(db_setup, transport):
+    data = await _seed()
+
+    results = {}
+    user_service = PlanetsUserService()
+    async with _channel(transport, db_setup, PlanetsService(), user_service) as channel:
+        admin, user = PlanetAdminStub(channel), PlanetUserStub(channel)
+        for scenario in _scenarios(data, transport):
+            results[scenario.name] = await _drive(scenario, admin, user)
+            r = results[scenario.name]
+            print(f"{transport:>6} {scenario.name:<26} {r['throughput']:>8.0f} req/s  p50 {r['p50_ms']:.2f}  p95 {r['p95_ms']:.2f}  p99 {r['p99_ms']:.2f} ms")
+        # Change streams that outlived their clients end here, as they do when a worker drains.
+        user_service.change_feed.close()
+
+    _merge_into(OUTPUT, transport, results)
+
+    if UPDATE_BASELINE:
+        _merge_into(BASELINE, transport, results)
+        return
+
+    assert BASELINE.exists(), f"no baseline at {BASELINE}; record one with BENCHMARK_UPDATE_BASELINE=1"
+    regressions = _regressions(transport, results, json.loads(BASELINE.read_text()))
+    assert not regressions, "\n".join(regressions)
@@ -0,0 +1,62 @@
+import time
+
+import pytest
+from sqlalchemy import select, func, literal_column
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+import src.resources.database.models as models
+from src.resources.database.config import session_maker
+from src.resources.database.planets_admin_queries import get_or_create_sector_db
+
+ITERATIONS = 500
+HOT_SECTOR = "Benchmark Hot Sector"
+
+
+async def _upsert_sector_db(session, sector_name):
+    """The previous implementation, which turned every lookup of an existing sector into an UPDATE."""
+    insert_sector = (
+        pg_insert(models.Sector)
+        .values(name=sector_name)
+        .on_conflict_do_update(
+            index_elements=[models.Sector.name],
+            set_={"name": sector_name},
+        )
+        .returning(models.Sector)
+    )
+
+    result = await session.execute(insert_sector)
+    return result.scalar_one()
+
+
+def _wal_position():
+    return select(func.pg_wal_lsn_diff(func.pg_current_wal_insert_lsn(), literal_column("'0/0'::pg_lsn")))
+
+
+async def _measure(resolve) -> tuple[int, float]:
+    async with session_maker() as session:
+        await resolve(session, HOT_SECTOR)
+        start_position = await session.scalar(_wal_position())
+        await session.commit()
+
+        start = time.perf_counter()
+        for _ in range(ITERATIONS):
+            await resolve(session, HOT_SECTOR)
+            await session.commit()
+        elapsed = time.perf_counter() - start
+
+        wal_bytes = await session.scalar(_wal_position()) - start_position
+        await session.commit()
+
+    return int(wal_bytes), elapsed / ITERATIONS
+
+
+@pytest.mark.benchmark
+@pytest.mark.asyncio
+async def test_get_or_create_sector_hot_path_wal_and_latency(db_setup):
+    upsert_wal, upsert_latency = await _measure(_upsert_sector_db)
+    select_wal, select_latency = await _measure(get_or_create_sector_db)
+
+    print(f"upsert path: {upsert_wal} WAL bytes, {upsert_latency * 1000:.3f} ms per call")
+    print(f"select-first path: {select_wal} WAL bytes, {select_latency * 1000:.3f} ms per call")
+
+    assert select_wal < upsert_wal / 10
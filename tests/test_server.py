@@ -0,0 +1,129 @@
+import asyncio
+import os
+import signal
+import socket
+import time
+
+import pytest
+from grpclib.client import Channel
+from grpclib.const import Status
+from grpclib.exceptions import GRPCError
+
+import src.server
+from src.generated.co.za.planet import GetOrCreateSectorRequest, PlanetAdminStub, StatusCode
+from src.server import ServerSettings, parse_settings, run, serve
+from src.services.planets_admin_service import PlanetsService
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+@pytest.mark.asyncio
+async def test_serve_drains_in_flight_rpcs(db_setup, monkeypatch):
+    started = asyncio.Event()
+    get_or_create_sector = PlanetsService.get_or_create_sector
+
+    async def slow_get_or_create_sector(self, request):
+        started.set()
+        await asyncio.sleep(0.2)
+        return await get_or_create_sector(self, request)
+
+    monkeypatch.setattr(PlanetsService, "get_or_create_sector", slow_get_or_create_sector)
+
+    settings = ServerSettings(database_url=db_setup, host="127.0.0.1", port=_free_port(), drain_timeout=5, metrics_port=0)
+    stop, ready = asyncio.Event(), asyncio.Event()
+    server_task = asyncio.create_task(serve(settings, stop, ready=ready))
+    await asyncio.wait_for(ready.wait(), timeout=5)
+
+    channel = Channel("127.0.0.1", settings.port)
+    try:
+        stub = PlanetAdminStub(channel)
+        rpc = asyncio.create_task(stub.get_or_create_sector(GetOrCreateSectorRequest(sector_name="Drain Sector")))
+        await started.wait()
+        stop.set()
+        await asyncio.sleep(0.05)
+
+        # The open connection still takes new streams, but the draining worker refuses them rather than cancel them later.
+        with pytest.raises(GRPCError) as refused:
+            await stub.get_or_create_sector(GetOrCreateSectorRequest(sector_name="Late Sector"))
+        assert refused.value.status == Status.UNAVAILABLE
+
+        response = await rpc
+        assert response.message.status_code == StatusCode.SUCCESS
+        await asyncio.wait_for(server_task, timeout=5)
+    finally:
+        channel.close()
+
+
+async def _scrape(port: int) -> dict[str, float]:
+    reader, writer = await asyncio.open_connection("127.0.0.1", port)
+    writer.write(b"GET /metrics HTTP/1.1\r\nHost: localhost\r\n\r\n")
+    response = (await reader.read()).decode()
+    writer.close()
+
+    head, body = response.split("\r\n\r\n", 1)
+    assert head.startswith("HTTP/1.1 200 OK")
+    return {sample: float(value) for sample, value in (line.rsplit(" ", 1) for line in body.splitlines() if not line.startswith("#"))}
+
+
+@pytest.mark.asyncio
+async def test_serve_exports_rpc_and_database_metrics(db_setup):
+    settings = ServerSettings(database_url=db_setup, host="127.0.0.1", port=_free_port(), metrics_port=_free_port())
+    stop, ready = asyncio.Event(), asyncio.Event()
+    server_task = asyncio.create_task(serve(settings, stop, ready=ready))
+    await asyncio.wait_for(ready.wait(), timeout=5)
+
+    channel = Channel("127.0.0.1", settings.port)
+    try:
+        response = await PlanetAdminStub(channel).get_or_create_sector(GetOrCreateSectorRequest(sector_name="Metrics Sector"))
+        assert response.message.status_code == StatusCode.SUCCESS
+
+        samples = await _scrape(settings.metrics_port)
+        # The registry is per process, so earlier tests' RPCs are counted too.
+        method = 'method="/co.za.planet.PlanetAdmin/GetOrCreateSector"'
+        calls = samples[f'planets_rpc_total{{{method},status="OK"}}']
+        assert calls >= 1
+        assert samples[f"planets_rpc_in_flight{{{method}}}"] == 0
+        assert samples[f'planets_rpc_duration_seconds_bucket{{{method},le="+Inf"}}'] == calls
+        # Every call resolves its sector with at least one statement, attributed to the RPC that ran it.
+        assert samples[f"planets_rpc_db_statements_sum{{{method}}}"] >= calls
+        assert samples[f"planets_rpc_db_duration_seconds_sum{{{method}}}"] > 0
+        assert samples['planets_lookup_cache_misses_total{cache="sector"}'] == 1
+    finally:
+        channel.close()
+        stop.set()
+        await asyncio.wait_for(server_task, timeout=5)
+
+
+def test_parse_settings_requires_database_url(monkeypatch):
+    monkeypatch.delenv("DATABASE_URL", raising=False)
+    with pytest.raises(SystemExit):
+        parse_settings([])
+
+    monkeypatch.setenv("DATABASE_URL", "postgresql+psycopg://localhost/planets")
+    assert parse_settings([]).database_url == "postgresql+psycopg://localhost/planets"
+
+
+def _crash_first_worker(settings, worker_index=0):
+    if worker_index == 0:
+        os._exit(3)
+    time.sleep(30)
+
+
+def test_run_exits_non_zero_when_a_worker_dies(monkeypatch):
+    handlers = {sig: signal.getsignal(sig) for sig in (signal.SIGTERM, signal.SIGINT)}
+    monkeypatch.setattr(src.server, "_run_worker", _crash_first_worker)
+    started = time.monotonic()
+    try:
+        with pytest.raises(SystemExit) as exited:
+            run(ServerSettings(database_url="postgresql+psycopg://localhost/planets", workers=2))
+    finally:
+        for sig, handler in handlers.items():
+            signal.signal(sig, handler)
+
+    assert exited.value.code == 1
+    # The surviving worker was stopped rather than left running until it finished by itself.
+    assert time.monotonic() - started < 10
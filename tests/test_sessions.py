@@ -0,0 +1,76 @@
+import asyncio
+import socket
+
+import pytest
+from grpclib.client import Channel
+from grpclib.server import Server
+from sqlalchemy import text
+
+from src.generated.co.za.planet import GetOrCreateSectorRequest, PlanetAdminStub, StatusCode
+from src.resources.database.config import db_session_leaks, db_sessions_open, request_scope, scope_sessions, session_maker, unit_of_work
+
+
+@pytest.mark.asyncio
+async def test_units_of_work_in_a_request_share_a_session_and_release_its_connection(db_setup):
+    pool = session_maker.kw["bind"].sync_engine.pool
+    checked_out, sessions_open = pool.checkedout(), db_sessions_open.value()
+
+    async with request_scope("test"):
+        async with unit_of_work() as first:
+            await first.execute(text("SELECT 1"))
+        assert not first.in_transaction()
+        assert pool.checkedout() == checked_out
+
+        async with unit_of_work() as second:
+            await second.execute(text("SELECT 1"))
+        assert second is first
+
+        # A task started by the request may run alongside it, so it gets a session of its own.
+        async def in_child_task():
+            async with unit_of_work() as session:
+                return session
+
+        assert await asyncio.create_task(in_child_task()) is not first
+        assert db_sessions_open.value() == sessions_open + 1
+
+    assert db_sessions_open.value() == sessions_open
+
+
+@pytest.mark.asyncio
+async def test_requests_that_return_mid_transaction_are_counted_as_leaks_and_rolled_back(db_setup):
+    pool = session_maker.kw["bind"].sync_engine.pool
+    checked_out, leaks = pool.checkedout(), db_session_leaks.value(method="abandoned")
+
+    async with request_scope("abandoned"):
+        # A stream abandoned by its client leaves its unit of work suspended.
+        unit = unit_of_work()
+        session = await unit.__aenter__()
+        await session.execute(text("SELECT 1"))
+        assert pool.checkedout() == checked_out + 1
+
+    assert db_session_leaks.value(method="abandoned") == leaks + 1
+    assert not session.in_transaction()
+    assert pool.checkedout() == checked_out
+
+
+@pytest.mark.asyncio
+async def test_server_scopes_a_session_to_each_rpc(planets_service):
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    server = Server([planets_service])
+    scope_sessions(server)
+    await server.start("127.0.0.1", port)
+
+    sessions_open = db_sessions_open.value()
+    channel = Channel("127.0.0.1", port)
+    try:
+        admin = PlanetAdminStub(channel)
+        response = await admin.get_or_create_sector(GetOrCreateSectorRequest(sector_name="Scoped Sector"))
+        assert response.message.status_code == StatusCode.SUCCESS
+        assert db_sessions_open.value() == sessions_open
+    finally:
+        channel.close()
+        server.close()
+        await server.wait_closed()
@@ -0,0 +1,90 @@
+import asyncio
+
+import pytest
+
+from src.generated.co.za.planet import GetOrCreateSectorRequest, BulkCreateCargoTypeRequest, StatusCode
+from src.resources.single_flight import SingleFlight
+from src.services.planets_admin_service import PlanetsService
+
+
+@pytest.mark.asyncio
+async def test_single_flight_shares_result_and_exception():
+    flights = SingleFlight()
+    calls = 0
+
+    async def work():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return calls
+
+    assert await asyncio.gather(*(flights.do("key", work) for _ in range(5))) == [1] * 5
+    assert flights.joined == 4
+    assert len(flights) == 0
+
+    async def fail():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+
+    results = await asyncio.gather(flights.do("key", fail), flights.do("key", fail), return_exceptions=True)
+    assert [type(r) for r in results] == [ValueError, ValueError]
+
+
+@pytest.mark.asyncio
+async def test_single_flight_batches_join_per_key():
+    flights = SingleFlight()
+    batches = []
+
+    async def work(keys):
+        batches.append(keys)
+        await asyncio.sleep(0.01)
+        return [key.upper() for key in keys]
+
+    results = await asyncio.gather(flights.do_many(["a", "b"], work), flights.do_many(["b", "c", "b"], work))
+    assert results == [["A", "B"], ["B", "C", "B"]]
+    assert batches == [["a", "b"], ["c"]]
+    assert flights.joined == 1
+    assert len(flights) == 0
+
+
+@pytest.mark.asyncio
+async def test_single_flight_survives_cancelled_caller():
+    flights = SingleFlight()
+
+    async def work():
+        await asyncio.sleep(0.05)
+        return "done"
+
+    leader = asyncio.create_task(flights.do("key", work))
+    await asyncio.sleep(0)
+    follower = asyncio.create_task(flights.do("key", work))
+    await asyncio.sleep(0)
+
+    leader.cancel()
+    assert await follower == "done"
+
+
+@pytest.mark.asyncio
+async def test_concurrent_identical_creates_share_one_call(db_setup):
+    service = PlanetsService()
+
+    sectors = await asyncio.gather(*(service.get_or_create_sector(GetOrCreateSectorRequest(sector_name=" Burst Sector ")) for _ in range(20)))
+    assert {s.sector_id for s in sectors} == {sectors[0].sector_id}
+    assert service.sector_flights.joined == 19
+    assert service.sector_cache.get("Burst Sector") == sectors[0].sector_id
+
+    cargos = await asyncio.gather(
+        *(service.bulk_create_cargo_type(BulkCreateCargoTypeRequest(cargo_names=["Burst Cargo 1", "Burst Cargo 2"])) for _ in range(20))
+    )
+    assert all(c.message.status_code == StatusCode.SUCCESS for c in cargos)
+    assert {tuple(c.cargo_type_ids) for c in cargos} == {tuple(cargos[0].cargo_type_ids)}
+    assert service.cargo_type_flights.joined == 19 * 2
+
+    # Batches that share only some names still share the calls for those names.
+    joined = service.cargo_type_flights.joined
+    overlapping = await asyncio.gather(
+        *(service.bulk_create_cargo_type(BulkCreateCargoTypeRequest(cargo_names=["Shared Burst Cargo", f"Own Burst Cargo {i}"])) for i in range(5))
+    )
+    assert len({c.cargo_type_ids[0] for c in overlapping}) == 1
+    assert len({c.cargo_type_ids[1] for c in overlapping}) == 5
+    assert service.cargo_type_flights.joined == joined + 4
@@ -0,0 +1,49 @@
+import pytest
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from src.resources.database.config import create_database_engine
+from src.resources.database.planets_admin_queries import bulk_create_planets_db, get_or_create_sector_db
+from src.resources.database.warmup import WARMUP_STATEMENTS, warm_database
+
+PREPARED = text("SELECT count(*) FROM pg_prepared_statements")
+
+
+@pytest.mark.asyncio
+async def test_warm_database_prepares_statements_shared_by_every_batch_size(db_setup):
+    engine = create_database_engine(db_setup, database_pool_size=2, database_overflow_size=0)
+    try:
+        assert await warm_database(engine) == 2
+
+        first, second = await engine.connect(), await engine.connect()
+        for connection in (first, second):
+            assert await connection.scalar(PREPARED) >= len(WARMUP_STATEMENTS)
+            await connection.commit()
+        await second.close()
+
+        # Batches of any size reuse the statements prepared at startup instead of preparing one per size.
+        prepared = await first.scalar(PREPARED)
+        async with AsyncSession(bind=first) as session:
+            sector = await get_or_create_sector_db(session, "Warmup Sector")
+            for size in (1, 3, 7):
+                planets = await bulk_create_planets_db(session, [(f"Warmup Planet {size}-{i}", sector.sector_id) for i in range(size)])
+                assert all(planets)
+            # The sector insert is the only statement left to prepare on first use.
+            assert await session.scalar(PREPARED) == prepared + 1
+            await session.rollback()
+        await first.close()
+    finally:
+        await engine.dispose()
+
+
+@pytest.mark.asyncio
+async def test_int_parameters_are_sent_as_bigint(db_setup):
+    engine = create_database_engine(db_setup, database_pool_size=1, database_overflow_size=0)
+    try:
+        async with engine.connect() as connection:
+            assert await connection.scalar(text("SELECT :n"), {"n": 5}) == 5
+            assert await connection.scalar(text("SELECT greatest(:a, :b)"), {"a": 1, "b": 2}) == 2
+            assert await connection.scalar(text("SELECT array_length(:ids, 1)"), {"ids": [1, 2, 3]}) == 3
+            assert await connection.scalar(text("SELECT pg_typeof(:small)::text"), {"small": 1}) == "bigint"
+    finally:
+        await engine.dispose()
@@ -0,0 +1,91 @@
+import asyncio
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.exc import IntegrityError
+
+from src.generated.co.za.planet import CreatePlanetRequest, CreateStarshipRequest, GetOrCreateSectorRequest, StatusCode
+from src.resources.database.config import session_maker
+from src.resources.database.planets_admin_queries import bulk_create_planets_db, bulk_create_starships_db
+from src.resources.write_combiner import WriteCombiner
+from src.services.planets_admin_service import PlanetsService
+
+
+@pytest.mark.asyncio
+async def test_write_combiner_batches_and_routes_results():
+    batches = []
+
+    async def flush(items):
+        batches.append(items)
+        return [ValueError(item) if item < 0 else item * 2 for item in items]
+
+    combiner = WriteCombiner(flush, max_delay=0.01, max_batch=4)
+    results = await asyncio.gather(*(combiner.submit(i) for i in (1, 2, -3, 4, 5)), return_exceptions=True)
+
+    assert results[:2] == [2, 4] and results[3:] == [8, 10]
+    assert isinstance(results[2], ValueError)
+    # The fourth submission fills a batch; the fifth waits out the window on its own.
+    assert batches == [[1, 2, -3, 4], [5]]
+
+
+@pytest.mark.asyncio
+async def test_cancelled_flush_cancels_its_callers():
+    started = asyncio.Event()
+
+    async def flush(items):
+        started.set()
+        await asyncio.sleep(60)
+
+    combiner = WriteCombiner(flush, max_delay=0, max_batch=10)
+    callers = [asyncio.create_task(combiner.submit(i)) for i in range(3)]
+    await started.wait()
+
+    for task in combiner._flushing:
+        task.cancel()
+    results = await asyncio.wait_for(asyncio.gather(*callers, return_exceptions=True), timeout=1)
+    assert all(isinstance(result, asyncio.CancelledError) for result in results)
+
+
+@pytest.mark.asyncio
+async def test_combined_creates_match_uncombined_results(db_setup):
+    service = PlanetsService(write_combine_window=0.05)
+    sector = await service.get_or_create_sector(GetOrCreateSectorRequest(sector_name="Combined Sector"))
+
+    planet_requests = [CreatePlanetRequest(planet_name=f"Combined Planet {i}", sector_id=sector.sector_id) for i in range(10)]
+    planet_requests.append(CreatePlanetRequest(planet_name="Combined Orphan", sector_id=10**12))
+    planet_requests.append(CreatePlanetRequest(planet_name="Combined Planet 0", sector_id=sector.sector_id))
+
+    planets = await asyncio.gather(*(service.create_planet(r) for r in planet_requests), return_exceptions=True)
+
+    assert all(p.message.status_code == StatusCode.SUCCESS for p in planets[:10])
+    assert len({p.planet_id for p in planets[:10]}) == 10
+    assert planets[10].message.status_code == StatusCode.INTERNAL_ERROR
+    assert isinstance(planets[11], IntegrityError)
+    assert service.planet_writes.flushes == 1
+
+    starship_requests = [CreateStarshipRequest(starship_name=f"Combined Ship {i}", starship_model="Batch", planet_id=planets[i].planet_id) for i in range(10)]
+    starship_requests.insert(5, CreateStarshipRequest(starship_name="Combined Stray", starship_model="Batch", planet_id=10**12))
+
+    starships = await asyncio.gather(*(service.create_starship(r) for r in starship_requests))
+
+    assert starships[5].message.status_code == StatusCode.NOT_FOUND
+    created = [s.starship_id for s in starships if s.message.status_code == StatusCode.SUCCESS]
+    # Ids come back in request order, so each caller gets the row built from its own request.
+    assert len(created) == 10 and created == sorted(created)
+    assert service.starship_writes.flushes == 1
+
+
+@pytest.mark.asyncio
+async def test_combined_batches_referencing_the_same_rows_do_not_block_each_other(db_setup):
+    service = PlanetsService()
+    sector = await service.get_or_create_sector(GetOrCreateSectorRequest(sector_name="Shared Batch Sector"))
+    planet = await service.create_planet(CreatePlanetRequest(planet_name="Shared Batch Planet", sector_id=sector.sector_id))
+
+    async with session_maker() as first, session_maker() as second:
+        await first.execute(text("SET LOCAL lock_timeout = '1s'"))
+        await second.execute(text("SET LOCAL lock_timeout = '1s'"))
+
+        # Each batch fails instead of waiting if it conflicts with the other's uncommitted one.
+        for i, session in enumerate((first, second)):
+            assert (await bulk_create_planets_db(session, [(f"Shared Batch Planet {i}", sector.sector_id)]))[0] is not None
+            assert (await bulk_create_starships_db(session, [(f"Shared Batch Ship {i}", "Shuttle", planet.planet_id)]))[0] is not None